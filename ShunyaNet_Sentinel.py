@@ -1,41 +1,32 @@
 import sys
-import feedparser
-import requests
+
+# Headless and one-shot modes never touch Qt: hand straight over to the engine CLI
+if __name__ == "__main__" and {"--headless", "--once", "--worker"} & set(sys.argv[1:]):
+    from sentinel_engine import main
+    sys.exit(main(sys.argv[1:]))
+
 import time
-import json
 import os
 import random
 import atexit
-from datetime import datetime, timezone
-from dateutil import parser as dateparser
+from datetime import datetime
+from collections import OrderedDict
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTextEdit, QLabel, QLineEdit,
-    QScrollArea, QComboBox, QInputDialog, QFileDialog, QSplitter, QDialog
+    QPushButton, QTextEdit, QPlainTextEdit, QLabel, QLineEdit,
+    QScrollArea, QComboBox, QInputDialog, QFileDialog, QSplitter, QDialog,
+    QListView, QStyledItemDelegate, QAbstractItemView
 )
-from PySide6.QtCore import Qt, QMetaObject, Q_ARG, QTimer, QThread, Signal, QEvent, QEasingCurve, QPropertyAnimation, QObject, Property
-from PySide6.QtGui import QIcon, QPixmap, QPainter, QFont, QColor, QFontMetrics, QPalette, QTransform, QFontDatabase
-from concurrent.futures import ThreadPoolExecutor
-
-
-
-# Determine directory where app should read/write user-editable files
-if getattr(sys, 'frozen', False):
-    # When frozen on macOS, sys.executable is:
-    #   <app>/Contents/MacOS/<exe>
-    exe_dir = os.path.dirname(sys.executable)  # .../Contents/MacOS
-    app_bundle_dir = os.path.abspath(os.path.join(exe_dir, "..", ".."))  # .../MyApp.app
-    APP_DIR = os.path.abspath(os.path.join(app_bundle_dir, ".."))  # parent folder containing the .app
-else:
-    APP_DIR = os.path.dirname(os.path.abspath(__file__))
+from PySide6.QtCore import (
+    Qt, QMetaObject, Q_ARG, QTimer, Slot, QEvent, QEasingCurve,
+    QPropertyAnimation, Property, QAbstractListModel, QModelIndex, QPointF, QSize
+)
+from PySide6.QtGui import (
+    QIcon, QPixmap, QPainter, QFont, QColor, QFontMetrics, QPalette, QFontDatabase,
+    QTextLayout, QTextOption
+)
+from sentinel_engine import MAX_TOPICS, MAX_PROFILES, LOG_FLUSH_MS, resource_path, SentinelEngine
 
-# --------------------------
-# Helper to load bundled files
-# --------------------------
-def resource_path(relative_path):
-    """Get the absolute path to a resource, works for dev and PyInstaller"""
-    base_path = getattr(sys, "_MEIPASS", os.path.dirname(__file__))
-    return os.path.join(base_path, relative_path)
 
 # --------------------------
 # Load all files in assets
@@ -66,62 +57,23 @@ else:
 # Load assets once
 assets = load_assets()
 
-# Example Default Feeds - this is replaced with the feeds in your .txt list, when it is loaded. NRC and FEMA lists
-FEEDS = [
-    "http://rss.cnn.com/rss/cnn_topstories.rss",
-    "http://rss.cnn.com/rss/cnn_world.rss",
-    "http://rss.cnn.com/rss/cnn_us.rss",
-    "http://feeds.bbci.co.uk/news/rss.xml",
-    "http://www.euronews.com/rss",
-    "https://feeds.bbci.co.uk/news/world/latin_america/rss.xml",
-    "https://www.spc.noaa.gov/products/spcrss.xml",
-    "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_hour.atom"
-]
-
-#These some of these values are immediately overwritten by the app_state.json file, which offers improved default values
-LMSTUDIO_URL = "YOUR URL HERE/v1/chat/completions" #app_state overwrites 
-MAX_TOKENS = 3000 #app_state overwrites 
-MAX_TOKENS_BULK = 4000 #app_state overwrites 
-FETCH_INTERVAL = 600 #app_state overwrites 
-ITEMS_PER_FEED = 50 #app_state overwrites 
-MAX_TOPICS = 10
-MAX_PROFILES = 20
-ROLLING_FILE = os.path.join(APP_DIR, "rolling_rss.txt")
-PROFILE_FILE = os.path.join(APP_DIR, "topic_profiles.json")
-SLACK_WEBHOOK_URL = "YOUR SLACK WEBHOOK URL HERE" #app_state overwrites 
-STATE_FILE = os.path.join(APP_DIR, "app_state.json")
-
-
-
-# -------- Thread worker for background fetch/send --------
-class FetchSendWorker(QThread):
-    log_signal = Signal(str)
-    reply_signal = Signal(str)
-    history_signal = Signal(str)
-
-    def __init__(self, app_instance):
-        super().__init__()
-        self.app_instance = app_instance
-
-    def run(self):
-        self.app_instance.fetch_and_send()
-
-
-# Worker for analysis
-class AnalysisWorker(QThread):
-    log_signal = Signal(str)
-    reply_signal = Signal(str)
+HISTORY_CACHED_LAYOUTS = 256  # text layouts kept by the report delegate
+LOG_MAX_LINES = 5000  # TERMINAL LOGS panel keeps only the newest lines
 
-    def __init__(self, app_instance):
-        super().__init__()
-        self.app_instance = app_instance
-
-    def run(self):
-        self.app_instance.perform_bulk_analysis_if_ready()
 
 
 # -------- Green rain overlay (transparent, non-blocking) --------
 class GreenRainOverlay(QWidget):
+    """
+    Matrix-style rain. Glyphs are rendered once into an atlas (one row per
+    quantised alpha level), each column's trail is cached as a strip pixmap
+    rebuilt only when its characters change, and a frame is one blit per
+    column. The timer only runs while the overlay is visible and not suspended.
+    """
+    ALPHA_LEVELS = 24
+    MIN_LENGTH = 6
+    MAX_LENGTH = 20
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAttribute(Qt.WA_TransparentForMouseEvents, True)
@@ -131,41 +83,97 @@ class GreenRainOverlay(QWidget):
 
         # Use cross-platform monospace font
         self.font = QFont("Courier New", 14)
-
-    
-        self.char_width = QFontMetrics(self.font).horizontalAdvance('M')
+        metrics = QFontMetrics(self.font)
+        self.char_width = metrics.horizontalAdvance('M') or 12
+        self.line_h = metrics.height()
+        self.ascent = metrics.ascent()
+
+        self.glyphs = [chr(c) for c in range(33, 127)]
+        self.katakana_start = len(self.glyphs)
+        self.glyphs += [chr(c) for c in range(0x30A0, 0x3100)]
+        self.cell_w = max(self.char_width, max(metrics.horizontalAdvance(g) for g in self.glyphs))
+        self.build_atlas()
+        self.build_alpha_ramps()
+
+        self._suspended = False
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_rain)
-        self.timer.start(50)  # ~20 FPS
 
         self.columns = []
         self.init_columns()
 
+    def build_atlas(self):
+        # Row 0 is the head colour, rows 1..ALPHA_LEVELS are the trail colour at rising alpha
+        self.atlas = QPixmap(self.cell_w * len(self.glyphs), self.line_h * (self.ALPHA_LEVELS + 1))
+        self.atlas.fill(Qt.transparent)
+        painter = QPainter(self.atlas)
+        painter.setFont(self.font)
+        colors = [QColor(180, 255, 150, 220)]
+        for level in range(1, self.ALPHA_LEVELS + 1):
+            colors.append(QColor(0, 255, 65, int(220 * level / self.ALPHA_LEVELS)))
+        for row, color in enumerate(colors):
+            painter.setPen(color)
+            for idx, glyph in enumerate(self.glyphs):
+                painter.drawText(idx * self.cell_w, row * self.line_h + self.ascent, glyph)
+        painter.end()
+
+    def build_alpha_ramps(self):
+        # ramps[length][k] -> atlas row for strip cell k (the last cell is the head)
+        self.ramps = {}
+        for length in range(self.MIN_LENGTH, self.MAX_LENGTH + 1):
+            ramp = []
+            for k in range(length - 1):
+                i = length - 2 - k
+                alpha = max(20, int(220 * (1 - (i + 1) / (length + 1))))
+                ramp.append(max(1, round(alpha * self.ALPHA_LEVELS / 220)))
+            ramp.append(0)
+            self.ramps[length] = ramp
+
     def init_columns(self):
         parent = self.parent() or self
         width = max(1, parent.width())
-        self.char_width = QFontMetrics(self.font).horizontalAdvance('M') or 12
         cols = max(2, width // self.char_width)
         self.columns = []
         for i in range(cols):
-            x = i * self.char_width
-            y = random.randint(-800, 0)
-            speed = random.randint(4, 14)
-            length = random.randint(6, 20)
-            chars = [self.random_char() for _ in range(length)]
+            strip = QPixmap(self.cell_w, self.line_h * self.MAX_LENGTH)
+            strip.fill(Qt.transparent)
             self.columns.append({
-                "x": x,
-                "y": y,
-                "speed": speed,
-                "length": length,
-                "chars": chars,
+                "x": i * self.char_width,
+                "strip": strip,
             })
+            self.reset_column(self.columns[-1], random.randint(-800, 0))
+
+    def reset_column(self, col, y):
+        col["y"] = y
+        col["speed"] = random.randint(4, 14)
+        col["length"] = random.randint(self.MIN_LENGTH, self.MAX_LENGTH)
+        col["chars"] = [self.random_char() for _ in range(col["length"])]
+        col["dirty"] = True
 
     def random_char(self):
         if random.random() < 0.25:
-            return chr(random.randint(0x30A0, 0x30FF))
+            return random.randrange(self.katakana_start, len(self.glyphs))
+        else:
+            return random.randrange(0, self.katakana_start)
+
+    def set_suspended(self, suspended):
+        self._suspended = suspended
+        self.sync_timer()
+
+    def sync_timer(self):
+        if self.isVisible() and not self._suspended:
+            if not self.timer.isActive():
+                self.timer.start(50)  # ~20 FPS
         else:
-            return chr(random.randint(33, 126))
+            self.timer.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.sync_timer()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.sync_timer()
 
     def resizeEvent(self, event):
         self.init_columns()
@@ -176,118 +184,229 @@ class GreenRainOverlay(QWidget):
         for col in self.columns:
             col["y"] += col["speed"]
             if random.random() < 0.2:
-                col["chars"] = [self.random_char() if random.random() < 0.15 else c for c in col["chars"]]
-            if col["y"] - col["length"] * QFontMetrics(self.font).height() > h:
-                col["y"] = random.randint(-600, 0)
-                col["speed"] = random.randint(4, 14)
-                col["length"] = random.randint(6, 20)
-                col["chars"] = [self.random_char() for _ in range(col["length"])]
+                chars = col["chars"]
+                for k in range(len(chars)):
+                    if random.random() < 0.15:
+                        chars[k] = self.random_char()
+                        col["dirty"] = True
+            if col["y"] - col["length"] * self.line_h > h:
+                self.reset_column(col, random.randint(-600, 0))
         self.update()
 
+    def render_strip(self, col):
+        strip = col["strip"]
+        strip.fill(Qt.transparent)
+        painter = QPainter(strip)
+        ramp = self.ramps[col["length"]]
+        for k, glyph in enumerate(col["chars"]):
+            painter.drawPixmap(0, k * self.line_h, self.atlas,
+                               glyph * self.cell_w, ramp[k] * self.line_h, self.cell_w, self.line_h)
+        painter.end()
+        col["dirty"] = False
+
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setFont(self.font)
+        h = self.height()
         for col in self.columns:
-            x = col["x"]
-            y = col["y"]
-            length = col["length"]
-            chars = col["chars"]
-            head_color = QColor(180, 255, 150, 220)
-            painter.setPen(head_color)
-            head_char = chars[-1] if chars else self.random_char()
-            painter.drawText(x, y, head_char)
-            for i in range(length - 1):
-                idx = (len(chars) - 2) - i
-                if idx < 0:
-                    break
-                ch = chars[idx]
-                alpha = int(220 * (1 - (i + 1) / (length + 1)))
-                alpha = max(20, alpha)
-                painter.setPen(QColor(0, 255, 65, alpha))
-                char_y = y - (i + 1) * QFontMetrics(self.font).height()
-                painter.drawText(x, char_y, ch)
+            strip_h = col["length"] * self.line_h
+            top = col["y"] - self.ascent - strip_h + self.line_h
+            if top >= h or top + strip_h <= 0:
+                continue
+            if col["dirty"]:
+                self.render_strip(col)
+            painter.drawPixmap(col["x"], top, col["strip"], 0, 0, self.cell_w, strip_h)
 
 # -------- Custom scalable QLabel --------
 class ScalableLabel(QLabel):
+    """
+    Logo that can be zoomed by animating its ``scale`` property. Scaled
+    frames are cached per scale bucket and painted centred, so after the
+    first hover/click animation no pixmaps are created.
+    """
+    SCALE_BUCKETS = 100  # cache one frame per 0.01 of scale
+    MAX_CACHED_FRAMES = 64
+
     def __init__(self, pixmap):
         super().__init__()
         self._scale = 1.0
         self._original_pix = pixmap
+        self._frames = {}
         self.setAlignment(Qt.AlignCenter)
-        self.updatePixmap()
-
-    def updatePixmap(self):
-        size = self._original_pix.size()
-        new_w = int(size.width() * self._scale)
-        new_h = int(size.height() * self._scale)
-        scaled_pix = self._original_pix.scaled(new_w, new_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        canvas = QPixmap(self.size())
-        canvas.fill(Qt.transparent)
-        painter = QPainter(canvas)
-        x = (canvas.width() - scaled_pix.width()) // 2
-        y = (canvas.height() - scaled_pix.height()) // 2
-        painter.drawPixmap(x, y, scaled_pix)
-        painter.end()
-        self.setPixmap(canvas)
 
-    def resizeEvent(self, event):
-        self.updatePixmap()
-        super().resizeEvent(event)
+    def sizeHint(self):
+        return self._original_pix.size()
+
+    def frameForScale(self):
+        bucket = round(self._scale * self.SCALE_BUCKETS)
+        frame = self._frames.get(bucket)
+        if frame is None:
+            size = self._original_pix.size()
+            new_w = max(1, int(size.width() * bucket / self.SCALE_BUCKETS))
+            new_h = max(1, int(size.height() * bucket / self.SCALE_BUCKETS))
+            frame = self._original_pix.scaled(new_w, new_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            if len(self._frames) >= self.MAX_CACHED_FRAMES:
+                self._frames.clear()
+            self._frames[bucket] = frame
+        return frame
+
+    def paintEvent(self, event):
+        frame = self.frameForScale()
+        painter = QPainter(self)
+        x = (self.width() - frame.width()) // 2
+        y = (self.height() - frame.height()) // 2
+        painter.drawPixmap(x, y, frame)
+        painter.end()
 
     def getScale(self):
         return self._scale
 
     def setScale(self, s):
         self._scale = s
-        self.updatePixmap()
+        self.update()
 
     scale = Property(float, getScale, setScale)
 
 
+# -------- Report history: list model and delegate over the engine's store --------
+class ReportHistoryModel(QAbstractListModel):
+    TimestampRole = Qt.UserRole + 1
+    SizeEstimateRole = Qt.UserRole + 2
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == ReportHistoryModel.SizeEstimateRole:
+            return self.store.chars[row], self.store.newlines[row]
+        if role == Qt.DisplayRole:
+            return self.store.get(row)[1]
+        if role == ReportHistoryModel.TimestampRole:
+            return self.store.get(row)[0]
+        return None
+
+    def add_report(self, text):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        row = len(self.store)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.store.append(timestamp, text)
+        self.endInsertRows()
+
+
+class ReportDelegate(QStyledItemDelegate):
+    """
+    Paints a report as a bordered box: bold timestamp, then word-wrapped body.
+    Wrapped layouts are cached per (row, width); rows never laid out get an
+    estimated height so the view never has to load them just to scroll.
+    """
+    PADDING = 5
+    SPACING = 4
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.body_font = QFont(view.font())
+        self.body_font.setBold(False)
+        self.header_font = QFont(self.body_font)
+        self.header_font.setBold(True)
+        header_metrics = QFontMetrics(self.header_font)
+        self.header_h = header_metrics.height()
+        self.header_ascent = header_metrics.ascent()
+        body_metrics = QFontMetrics(self.body_font)
+        self.line_h = body_metrics.lineSpacing()
+        self.avg_char_w = max(1, body_metrics.averageCharWidth())
+        self.border_pen = QColor(0, 255, 65)
+        self.background = QColor(0, 25, 0)
+        self._layouts = OrderedDict()
+        self._heights = {}
+        self._heights_width = -1
+
+    def _text_width(self):
+        return max(20, self.view.viewport().width() - 2 * self.PADDING - 2)
+
+    def _layout_for(self, index, width):
+        key = (index.row(), width)
+        cached = self._layouts.get(key)
+        if cached is not None:
+            self._layouts.move_to_end(key)
+            return cached
+        # QTextLayout only breaks lines on U+2028, not on "\n"
+        text = (index.data(Qt.DisplayRole) or "").replace("\n", "\u2028")
+        layout = QTextLayout(text, self.body_font)
+        option = QTextOption()
+        option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+        layout.setTextOption(option)
+        layout.setCacheEnabled(True)
+        y = 0.0
+        layout.beginLayout()
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(width)
+            line.setPosition(QPointF(0, y))
+            y += line.height()
+        layout.endLayout()
+        cached = (layout, int(y + 0.5))
+        self._layouts[key] = cached
+        while len(self._layouts) > HISTORY_CACHED_LAYOUTS:
+            self._layouts.popitem(last=False)
+        return cached
+
+    def _box_height(self, body_h):
+        return body_h + self.header_h + self.SPACING + 2 * self.PADDING + 2
+
+    def _estimate_body_height(self, index, width):
+        chars, newlines = index.data(ReportHistoryModel.SizeEstimateRole)
+        per_line = max(1, width // self.avg_char_w)
+        return (newlines + 1 + chars // per_line) * self.line_h
+
+    def sizeHint(self, option, index):
+        width = self._text_width()
+        if width != self._heights_width:
+            self._heights.clear()
+            self._heights_width = width
+        body_h = self._heights.get(index.row())
+        if body_h is None:
+            body_h = self._estimate_body_height(index, width)
+        return QSize(width, self._box_height(body_h) + self.SPACING)
+
+    def paint(self, painter, option, index):
+        width = self._text_width()
+        layout, body_h = self._layout_for(index, width)
+        if self._heights_width == width and self._heights.get(index.row()) != body_h:
+            self._heights[index.row()] = body_h
+            self.sizeHintChanged.emit(index)
+
+        rect = option.rect.adjusted(0, 0, -1, -self.SPACING - 1)
+        painter.save()
+        painter.setClipRect(option.rect)
+        painter.fillRect(rect, self.background)
+        painter.setPen(self.border_pen)
+        painter.drawRect(rect)
+        x = rect.left() + self.PADDING + 1
+        y = rect.top() + self.PADDING + 1
+        painter.setFont(self.header_font)
+        painter.drawText(x, y + self.header_ascent, index.data(ReportHistoryModel.TimestampRole) or "")
+        layout.draw(painter, QPointF(x, y + self.header_h + self.SPACING))
+        painter.restore()
+
+
 class RSSApp(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("ShunyaNet Sentinel")
-        self.seen_guids = set()
-        self.profiles = {}
-        self.feeds = FEEDS.copy()
-        self.executor = ThreadPoolExecutor(max_workers=1)
-        self.active_threads = []
+        self.engine = SentinelEngine()
+        self.settings = self.engine.settings
         self._shutting_down = False
 
-        # ================================================================
-        # SETTINGS DICTIONARY WITH DEFAULTS
-        # ================================================================
-        self.settings = {
-            "LMSTUDIO_URL": LMSTUDIO_URL,
-            "SLACK_WEBHOOK_URL": SLACK_WEBHOOK_URL,
-            "MAX_TOKENS": MAX_TOKENS,
-            "MAX_TOKENS_BULK": MAX_TOKENS_BULK,
-            "FETCH_INTERVAL": FETCH_INTERVAL,
-            "ITEMS_PER_FEED": ITEMS_PER_FEED,
-            "USE_CHUNKED_MODE": "1",
-            "CHUNK_SIZE": 4000,
-            "WRITE_TO_FILE": "1",
-            "ANALYSIS_WINDOW": 3600,
-            "BULK_ANALYSIS": "0"
-        }
-
         self.settings_fields = {}  # for pop-up editing
-        self.rolling_file_start_time = time.time()
-
-
-        # ================================================================
-        # PROMPT HANDLING
-        # ================================================================
-        self.prompt_file = "default_prompt.txt"
-        self.base_prompt = ""
-
-        # Load default prompt if available
-        if os.path.exists(self.prompt_file):
-            with open(self.prompt_file, "r", encoding="utf-8") as f:
-                self.base_prompt = f.read()
-        else:
-            self.base_prompt = "No prompt loaded."
 
 
         # ================================================================
@@ -349,7 +468,7 @@ class RSSApp(QWidget):
         self.add_topic_button.clicked.connect(lambda: self.add_topic_field(""))
         left_panel.addWidget(self.add_topic_button)
 
-        for t in ["Venezuela", "regional or national air traffic disruption", "transcontinental internet outage"]:
+        for t in self.engine.topics:
             self.add_topic_field(t)
 
         # Fetch button
@@ -468,7 +587,8 @@ class RSSApp(QWidget):
         main_splitter.addWidget(middle_widget)
 
         self.middle_layout.addWidget(QLabel("TERMINAL LOGS:"))
-        self.log = QTextEdit(readOnly=True)
+        self.log = QPlainTextEdit(readOnly=True)
+        self.log.setMaximumBlockCount(LOG_MAX_LINES)
         # Optional: keep logs dark as well
         log_palette = self.log.palette()
         log_palette.setColor(QPalette.Base, QColor(0, 0, 0))        # black background
@@ -476,6 +596,10 @@ class RSSApp(QWidget):
         self.log.setPalette(log_palette)
         self.middle_layout.addWidget(self.log)
 
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.timeout.connect(self.flush_log)
+        self.log_flush_timer.start(LOG_FLUSH_MS)
+
         self.middle_layout.addWidget(QLabel("LATEST REPORT:"))
         self.reply_box = QTextEdit(readOnly=True)
         # Apply palette so it doesn't turn white
@@ -498,6 +622,7 @@ class RSSApp(QWidget):
         self.save_profile_btn.clicked.connect(self.save_current_profile)
         self.load_profile_btn.clicked.connect(self.load_selected_profile)
         self.delete_profile_btn.clicked.connect(self.delete_selected_profile)
+        self.profile_select.currentTextChanged.connect(self.sync_active_profile)
 
         # ================================================================
         # RIGHT PANEL — Prior Replies
@@ -509,14 +634,24 @@ class RSSApp(QWidget):
         main_splitter.addWidget(right_widget)
 
         right_layout.addWidget(QLabel("REPORT FEED:"))
-        self.history_scroll = QScrollArea()
-        self.history_widget = QWidget()
-        self.history_layout = QVBoxLayout()
-        self.history_widget.setLayout(self.history_layout)
-        self.history_scroll.setWidget(self.history_widget)
-        self.history_scroll.setWidgetResizable(True)
-        right_layout.addWidget(self.history_scroll)
-
+        self.history_model = ReportHistoryModel(self.engine.history, self)
+        self.history_view = QListView()
+        self.history_view.setModel(self.history_model)
+        self.history_view.setItemDelegate(ReportDelegate(self.history_view))
+        self.history_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.history_view.setLayoutMode(QListView.Batched)
+        self.history_view.setBatchSize(200)
+        self.history_view.setResizeMode(QListView.Adjust)
+        self.history_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.history_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.history_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        right_layout.addWidget(self.history_view)
+        QTimer.singleShot(0, self.history_view.scrollToBottom)
+
+
+        # Engine results come back through the GUI thread
+        self.engine.on_reply = self.thread_safe_reply
+        self.engine.on_report = self.queue_report
 
         #=======================================================
         # RESUME APP STATE
@@ -527,18 +662,25 @@ class RSSApp(QWidget):
         # ================================================================
         # TIMERS — use defaults from self.settings
         # ================================================================
+        # Each feed group keeps its own interval; this just polls which ones are due
         self.auto_fetch_timer = QTimer()
-        self.auto_fetch_timer.timeout.connect(self.start_fetch_thread)
-        self.auto_fetch_timer.start(self.settings["FETCH_INTERVAL"] * 1000)
+        self.auto_fetch_timer.timeout.connect(self.engine.tick_due_groups)
+        self.auto_fetch_timer.start(1000)
 
         self.bulk_timer = QTimer()
-        self.bulk_timer.setInterval(self.settings["ANALYSIS_WINDOW"] * 1000)
-        self.bulk_timer.timeout.connect(self.perform_bulk_analysis_if_ready)
+        self.bulk_timer.setInterval(self.engine.config.analysis_window * 1000)
+        self.bulk_timer.timeout.connect(self.engine.request_bulk_analysis)
         self.bulk_timer.start()
 
         # Default splitter sizes
         main_splitter.setSizes([250, 450, 350])
 
+        # Warm restart: restore dedupe/cursors/bulk window and fetch right away
+        self.engine.load_pipeline_state()
+        self.engine.start_metrics_server()
+        self.engine.start_shards()
+        self.engine.trigger_all("startup")
+
 
 
     # ================================================================
@@ -552,11 +694,12 @@ class RSSApp(QWidget):
         layout = QVBoxLayout(dlg)
         self.settings_fields.clear()  # clear previous fields
 
-        # Create editable fields
+        # Create editable fields; list settings (e.g. FANOUT_PROFILES) are shown comma-separated
+        sequences = {name for name, value in self.settings.items() if isinstance(value, (list, tuple))}
         for name, value in self.settings.items():
             row = QHBoxLayout()
             row.addWidget(QLabel(name + ":"))
-            edit = QLineEdit(str(value))
+            edit = QLineEdit(self.setting_text(value))
             row.addWidget(edit)
             layout.addLayout(row)
             self.settings_fields[name] = edit
@@ -571,13 +714,15 @@ class RSSApp(QWidget):
                         val = int(val)
                     except ValueError:
                         pass
+                elif name in sequences:
+                    val = [part.strip() for part in val.split(",") if part.strip()]
                 self.settings[name] = val
+            # Validated into a new snapshot; invalid values are logged and ignored
+            self.engine.apply_settings()
 
-            # Update timers only if they exist
-            if hasattr(self, "auto_fetch_timer"):
-                self.auto_fetch_timer.setInterval(self.settings["FETCH_INTERVAL"] * 1000)
+            # Update timers only if they exist (feed groups read FETCH_INTERVAL live)
             if hasattr(self, "bulk_timer"):
-                self.bulk_timer.setInterval(self.settings["ANALYSIS_WINDOW"] * 1000)
+                self.bulk_timer.setInterval(self.engine.config.analysis_window * 1000)
 
             dlg.close()
 
@@ -591,6 +736,12 @@ class RSSApp(QWidget):
             self.green_overlay.resize(self.size())
         return super().eventFilter(obj, event)
 
+    def changeEvent(self, event):
+        # No point animating the screen saver while the window is minimised
+        if event.type() == QEvent.WindowStateChange and hasattr(self, "green_overlay"):
+            self.green_overlay.set_suspended(self.isMinimized())
+        super().changeEvent(event)
+
     def toggle_rain(self):
         if self.rain_toggle.isChecked():
             self.green_overlay.show()
@@ -603,61 +754,14 @@ class RSSApp(QWidget):
     def start_fetch_thread(self):
         if self._shutting_down:
             return
-        worker = FetchSendWorker(self)
-        self.active_threads.append(worker)
-        worker.log_signal.connect(self.thread_safe_log)
-        worker.reply_signal.connect(self.thread_safe_reply)
-        worker.history_signal.connect(self.add_to_history)
-        worker.finished.connect(lambda: self.active_threads.remove(worker) if worker in self.active_threads else None)
-        worker.finished.connect(worker.deleteLater)
-        worker.start()
-
-    # ------------- Bulk Analysis Starter --------
-    def start_bulk_analysis(self):
-        if self.get_setting("BULK_ANALYSIS", int) != 1:
-            return
-        if self._shutting_down:
-            return
-        worker = AnalysisWorker(self)
-        self.active_threads.append(worker)
-        worker.log_signal.connect(self.thread_safe_log)
-        worker.reply_signal.connect(self.thread_safe_reply)
-        worker.finished.connect(lambda: self.active_threads.remove(worker) if worker in self.active_threads else None)
-        worker.finished.connect(worker.deleteLater)
-        worker.start()
-
+        self.engine.trigger_all("manual")
 
     # ---------- Settings ----------
-    def add_setting_field(self, name, default_value):
-        hbox = QHBoxLayout()
-        label = QLabel(name + ":")
-        edit = QLineEdit(str(default_value))
-        hbox.addWidget(label)
-        hbox.addWidget(edit)
-        self.settings_fields_layout.addLayout(hbox)  # use the layout we created
-        self.settings_fields[name] = edit
-
-
-    def toggle_additional_settings(self, checked):
-        self.settings_container.setVisible(checked)
-
-    def get_setting(self, name, type_cast=str):
-        # If settings field does not yet exist (startup), fall back to the stored settings dict
-        if name not in self.settings_fields:
-            return type_cast(self.settings.get(name))
-
-        # Otherwise read from UI field
-        try:
-            return type_cast(self.settings_fields[name].text())
-        except Exception:
-            return type_cast(self.settings.get(name))
-
-
-    def update_timer_interval(self):
-        interval = self.get_setting("FETCH_INTERVAL", int)
-        if interval and interval > 0:
-            self.auto_fetch_timer.start(interval * 1000)
-            self.thread_safe_log(f"Auto-fetch interval updated to {interval} seconds.")
+    @staticmethod
+    def setting_text(value):
+        if isinstance(value, (list, tuple)):
+            return ", ".join(str(part) for part in value)
+        return str(value)
 
     def update_analysis_timer_interval(self):
         """
@@ -665,7 +769,7 @@ class RSSApp(QWidget):
         in ANALYSIS_WINDOW (seconds). Uses the bulk_timer QTimer created
         in __init__.
         """
-        interval = self.get_setting("ANALYSIS_WINDOW", int)
+        interval = self.engine.config.analysis_window
         if interval and interval > 0:
             # Update the existing timer's interval (no start/stop drift)
             self.bulk_timer.setInterval(interval * 1000)
@@ -676,9 +780,14 @@ class RSSApp(QWidget):
     def thread_safe_log(self, msg: str):
         if self._shutting_down:
             return
+        self.engine.log(msg)
+
+    def flush_log(self):
+        """Runs on the GUI thread every LOG_FLUSH_MS; one append per batch."""
         try:
-            QMetaObject.invokeMethod(self.log, "append", Qt.QueuedConnection, Q_ARG(str, msg))
-            print(msg)
+            lines = self.engine.log_sink.drain()
+            if lines:
+                self.log.appendPlainText("\n".join(lines))
         except Exception as e:
             print(f"Log error: {e}")
 
@@ -691,27 +800,22 @@ class RSSApp(QWidget):
             print(f"Reply error: {e}")
 
     # ---------- History ----------
+    def queue_report(self, text: str):
+        """Engine hook, called from worker threads; hands the report to the GUI thread."""
+        if self._shutting_down:
+            return
+        QMetaObject.invokeMethod(self, "add_to_history", Qt.QueuedConnection, Q_ARG(str, text))
+
+    @Slot(str)
     def add_to_history(self, text: str):
         if self._shutting_down:
             return
         try:
-            while self.history_layout.count() >= 25:
-                item = self.history_layout.itemAt(0)
-                widget = item.widget()
-                if widget:
-                    widget.setParent(None)
-
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            entry_text = f"<b>{timestamp}</b><br>{text.replace(chr(10), '<br>')}"
-            entry_label = QLabel(entry_text)
-            entry_label.setWordWrap(True)
-
-            entry_label.setStyleSheet(
-                "background-color: #001900; border: 1px solid #00FF41; color: #00FF41; padding: 5px;"
-            )
-
-            self.history_layout.addWidget(entry_label)
-            self.history_scroll.verticalScrollBar().setValue(self.history_scroll.verticalScrollBar().maximum())
+            bar = self.history_view.verticalScrollBar()
+            follow = bar.value() >= bar.maximum() - 4
+            self.history_model.add_report(text)
+            if follow:
+                self.history_view.scrollToBottom()
         except Exception as e:
             print(f"History error: {e}")
 
@@ -728,7 +832,9 @@ class RSSApp(QWidget):
         hbox.addWidget(remove_btn)
         self.topics_container.addLayout(hbox)
         remove_btn.clicked.connect(lambda: self.remove_topic_field(hbox, line))
+        line.textChanged.connect(self.sync_topics)
         self.topic_entries.append(line)
+        self.sync_topics()
 
     def remove_topic_field(self, hbox, line):
         for i in reversed(range(hbox.count())):
@@ -738,13 +844,27 @@ class RSSApp(QWidget):
         if line in self.topic_entries:
             self.topic_entries.remove(line)
         self.topics_container.removeItem(hbox)
+        self.sync_topics()
 
     def get_topics_list(self):
         return [t.text().strip() for t in self.topic_entries if t.text().strip()]
 
-    def get_topics_string(self):
-        topics = self.get_topics_list()
-        return ", ".join(topics) if topics else "No topics defined"
+    def sync_topics(self):
+        """Push the topic fields to the engine; a cycle reads them once when it builds prompts."""
+        self.engine.topics = self.get_topics_list()
+
+    def clear_topic_fields(self):
+        for i in reversed(range(self.topics_container.count())):
+            item = self.topics_container.itemAt(i)
+            if item.layout():
+                hbox = item.layout()
+                for j in reversed(range(hbox.count())):
+                    widget = hbox.itemAt(j).widget()
+                    if widget:
+                        widget.setParent(None)
+                self.topics_container.removeItem(hbox)
+        self.topic_entries.clear()
+        self.sync_topics()
 
     # ---------- Data sources ----------
     def load_data_sources(self):
@@ -752,18 +872,7 @@ class RSSApp(QWidget):
             file_path, _ = QFileDialog.getOpenFileName(self, "Select Data Source File", "", "Text Files (*.txt);;JSON Files (*.json)")
             if not file_path:
                 return
-            if file_path.endswith(".txt"):
-                with open(file_path, "r") as f:
-                    self.feeds = [line.strip() for line in f.readlines() if line.strip() and not line.startswith("#")]
-            elif file_path.endswith(".json"):
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                if isinstance(data, list):
-                    self.feeds = [url.strip() for url in data if url.strip() and not url.strip().startswith("#")]
-                else:
-                    self.thread_safe_log("JSON must contain a list of URLs.")
-                    return
-            self.thread_safe_log(f"{len(self.feeds)} data sources loaded.")
+            self.engine.load_data_source_file(file_path)
         except Exception as e:
             self.thread_safe_log(f"Failed to load data sources: {e}")
 
@@ -775,58 +884,33 @@ class RSSApp(QWidget):
             )
             if not file_path:
                 return
-            with open(file_path, "r", encoding="utf-8") as f:
-                self.base_prompt = f.read()
-            self.thread_safe_log(f"Loaded prompt file: {file_path}")
+            self.engine.load_prompt_file(file_path)
         except Exception as e:
             self.thread_safe_log(f"Failed to load prompt: {e}")
 
 
-    #--------- Append RSS Results to File ----------
-    def append_to_rolling_file(self, text):
-        try:
-            with open(ROLLING_FILE, "a", encoding="utf-8") as f:
-                f.write(text + "\n\n")
-            self.thread_safe_log(f"Appended {len(text)} chars to {ROLLING_FILE}")
-        except Exception as e:
-            self.thread_safe_log(f"Failed to write to rolling file: {e}")
-
-
     # ---------- Profiles ----------
     def load_profiles(self):
-        """Load profiles from the JSON file."""
-        try:
-            if os.path.exists(PROFILE_FILE):
-                with open(PROFILE_FILE, "r", encoding="utf-8") as f:
-                    self.profiles = json.load(f)
-                self.thread_safe_log(f"Loaded {len(self.profiles)} saved profiles.")
-            else:
-                self.profiles = {}
-        except Exception as e:
-            self.thread_safe_log(f"Failed to load profiles, starting fresh. Error: {e}")
-            self.profiles = {}
+        self.engine.load_profiles()
 
     def save_profiles(self):
-        """Save profiles to the JSON file."""
-        try:
-            with open(PROFILE_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.profiles, f, indent=2)
-            self.thread_safe_log(f"Profiles saved to {PROFILE_FILE}.")
-        except Exception as e:
-            self.thread_safe_log(f"Failed to save profiles. Error: {e}")
+        self.engine.save_profiles()
+
+    def sync_active_profile(self, name):
+        self.engine.active_profile = name
 
     def update_profile_combobox(self):
         """Update the profile dropdown."""
         try:
             self.profile_select.clear()
-            for name in self.profiles.keys():
+            for name in self.engine.profiles.keys():
                 self.profile_select.addItem(name)
         except Exception as e:
             print(f"Profile combobox error: {e}")
 
     def save_current_profile(self):
         """Prompt for a profile name and save current topics."""
-        if len(self.profiles) >= MAX_PROFILES:
+        if len(self.engine.profiles) >= MAX_PROFILES:
             self.thread_safe_log(f"Cannot save more than {MAX_PROFILES} profiles.")
             return
         try:
@@ -834,7 +918,7 @@ class RSSApp(QWidget):
             if not ok or not name.strip():
                 return
             name = name.strip()
-            self.profiles[name] = self.get_topics_list()  # Assumes this method exists
+            self.engine.profiles[name] = self.get_topics_list()
             self.save_profiles()
             self.update_profile_combobox()
             self.thread_safe_log(f"Profile '{name}' saved.")
@@ -845,29 +929,15 @@ class RSSApp(QWidget):
         """Load the currently selected profile into the UI."""
         try:
             name = self.profile_select.currentText()
-            if name not in self.profiles:
+            if name not in self.engine.profiles:
                 self.thread_safe_log("No profile selected.")
                 return
 
-            # Clear current topic widgets
-            for i in reversed(range(self.topics_container.count())):
-                item = self.topics_container.itemAt(i)
-                if item.layout():
-                    hbox = item.layout()
-                    for j in reversed(range(hbox.count())):
-                        widget = hbox.itemAt(j).widget()
-                        if widget:
-                            widget.setParent(None)
-                    self.topics_container.removeItem(hbox)
-
-            # Clear the internal list
-            self.topic_entries.clear()
-
-            # Load new topics
-            for topic in self.profiles[name]:
-                self.add_topic_field(topic)  # Assumes this method exists
-
-            self.thread_safe_log(f"Profile '{name}' loaded with topics: {', '.join(self.profiles[name])}")
+            self.clear_topic_fields()
+            for topic in self.engine.profiles[name]:
+                self.add_topic_field(topic)
+
+            self.thread_safe_log(f"Profile '{name}' loaded with topics: {', '.join(self.engine.profiles[name])}")
         except Exception as e:
             self.thread_safe_log(f"Failed to load profile: {e}")
 
@@ -875,277 +945,35 @@ class RSSApp(QWidget):
         """Delete the currently selected profile."""
         try:
             name = self.profile_select.currentText()
-            if name in self.profiles:
-                del self.profiles[name]
+            if name in self.engine.profiles:
+                del self.engine.profiles[name]
                 self.save_profiles()
                 self.update_profile_combobox()
                 self.thread_safe_log(f"Profile '{name}' deleted.")
         except Exception as e:
             self.thread_safe_log(f"Failed to delete profile: {e}")
 
-    # ---------- RSS ----------
-    def fetch_feed(self, url):
-        try:
-            headers = {"User-Agent": "Python RSS Client"}
-            if "reddit.com" in url:
-                headers["User-Agent"] = (
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/119.0.0.0 Safari/537.36"
-                )
-            timeout = 20 if "fema.gov" in url else 10
-            r = requests.get(url, headers=headers, timeout=timeout)
-            r.raise_for_status()
-            return feedparser.parse(r.content)
-        except Exception as e:
-            self.thread_safe_log(f"Error fetching {url}: {e}")
-            return None
-
-    def fetch_rss_latest(self):
-        items = []
-        for url in self.feeds:
-            feed = self.fetch_feed(url)
-            if not feed:
-                continue
-            self.thread_safe_log(f"Checking {url}, {len(feed.entries)} entries found")
-            for entry in feed.entries[:self.get_setting("ITEMS_PER_FEED", int)]:
-                guid = getattr(entry, "id", None) or getattr(entry, "link", None)
-                if guid in self.seen_guids:
-                    continue
-                self.seen_guids.add(guid)
-                pub_date = getattr(entry, "published", None) or getattr(entry, "updated", None)
-                if pub_date:
-                    try:
-                        pub_dt = dateparser.parse(pub_date)
-                        if pub_dt.tzinfo is None:
-                            pub_dt = pub_dt.replace(tzinfo=timezone.utc)
-                        now = datetime.now(timezone.utc)
-                        if (now - pub_dt).total_seconds() > 86400:  # older than 24h
-                            continue
-                    except Exception:
-                        pub_date = "(Invalid date)"
-                else:
-                    pub_date = "(No date)"
-                title = getattr(entry, "title", "(No title)")
-                link = getattr(entry, "link", "")
-                summary = getattr(entry, "summary", "(No summary)")
-                items.append(f"Title: {title}\nPublished: {pub_date}\nSummary: {summary}\nLink: {link}")
-        self.thread_safe_log(f"Collected {len(items)} items")
-        return "\n\n".join(items)
-
-    # ---------- LMStudio ----------
-    def truncate_tokens(self, text):
-        return text[: self.get_setting("MAX_TOKENS", int) * 4]
-
-    # ---------- Slack ----------
-    def send_slack_notification(self, message):
-        try:
-            webhook_url = self.get_setting("SLACK_WEBHOOK_URL")
-            if not webhook_url:
-                self.thread_safe_log("Slack Webhook URL is empty, skipping notification.")
-                return
-            resp = requests.post(webhook_url, json={"text": message}, timeout=10)
-            if resp.status_code != 200:
-                self.thread_safe_log(f"Slack error: {resp.status_code}, {resp.text}")
-        except Exception as e:
-            self.thread_safe_log(f"Slack exception: {e}")
-
-    # ---------- LMStudio ----------
-    def fetch_and_send(self):
-        try:
-            if self._shutting_down:
-                return
-            self.thread_safe_log("[ShunyaNet Sentinel] Fetching RSS...")
-            text_block = self.fetch_rss_latest()
-            if not text_block:
-                self.thread_safe_log("No new items.")
-                return
-
-            # Optional: write the raw pull to a rolling file
-            if self.get_setting("WRITE_TO_FILE", int) == 1:
-                self.append_to_rolling_file(text_block)
-                if not hasattr(self, "rolling_file_start_time"):
-                    self.rolling_file_start_time = time.time()
-
-            # Now perform bulk trend analysis
-            self.perform_bulk_analysis_if_ready()
-
-            # Truncate input so we never send millions of characters
-            text_block = self.truncate_tokens(text_block)
-            topics_str = self.get_topics_string()
-            self.thread_safe_log(f"Topics sent to LLM: {topics_str}")
-
-            # Check chunk settings
-            use_chunked = self.get_setting("USE_CHUNKED_MODE", int) == 1
-            chunk_size = self.get_setting("CHUNK_SIZE", int) or 4000
-            chunks = [text_block] if not use_chunked else [text_block[i:i + chunk_size] for i in range(0, len(text_block), chunk_size)]
-            self.thread_safe_log(f"{len(chunks)} chunk(s) prepared for LMStudio.")
-
-            for idx, chunk in enumerate(chunks):
-                prompt_text = self.base_prompt.format(CHUNK=chunk, TOPICS=topics_str)
-                self.thread_safe_log(f"Sending chunk {idx + 1}/{len(chunks)} ({len(chunk)} chars)...")
-
-                resp = requests.post(
-                    self.get_setting("LMSTUDIO_URL"),
-                    json={"model": "your_model_name",
-                        "messages": [{"role": "user", "content": prompt_text}],
-                        "max_tokens": self.get_setting("MAX_TOKENS", int)},
-                    timeout=900
-                )
-
-                if resp.status_code != 200:
-                    self.thread_safe_log(f"LMStudio returned HTTP {resp.status_code} for chunk {idx + 1}")
-                    continue
-
-                chunk_reply = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "")
-                if chunk_reply:
-                    self.thread_safe_reply(chunk_reply)
-                    self.send_slack_notification(chunk_reply)
-                    QMetaObject.invokeMethod(
-                        self,
-                        "add_to_history",
-                        Qt.QueuedConnection,
-                        Q_ARG(str, chunk_reply)
-                    )
-        except Exception as e:
-            self.thread_safe_log(f"Error sending: {e}")
-
-    def perform_bulk_analysis_if_ready(self):
-        try:
-            if self._shutting_down:
-                return None  # disabled
-
-            # MUST DEFINE THESE FIRST
-            now = time.time()
-            window = self.get_setting("ANALYSIS_WINDOW", int)
-
-            self.thread_safe_log(
-                f"[Analysis Check] window={window}s elapsed={int(now - self.rolling_file_start_time)}s"
-            )
-
-            # Not enough time has passed
-            if now - self.rolling_file_start_time < window:
-                return None
-
-            # Proceed with analysis
-            file_path = ROLLING_FILE
-            if not os.path.exists(file_path):
-                self.rolling_file_start_time = now
-                return None
-
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    full_text = f.read().strip()
-            except Exception as e:
-                self.thread_safe_log(f"Failed reading rolling file: {e}")
-                self.rolling_file_start_time = now
-                return None
-
-            if not full_text:
-                self.thread_safe_log("Rolling file empty, skipping analysis.")
-                self.rolling_file_start_time = now
-                return None
-
-            # Truncate to avoid token explosion
-            max_chars = self.get_setting("MAX_TOKENS_BULK", int) * 4
-            full_text = full_text[:max_chars]
-
-            self.thread_safe_log("Performing bulk analysis over rolling file...")
-
-            prompt = (
-                "You are analyzing an accumulation of RSS and social media text. "
-                "Produce a structured trend report summarizing major themes, "
-                "emerging risks, and patterns based solely on matching or linked (yet disparate) information in the data feed. "
-                "If there are no patterns that can be pieced together, don't create fake connections just to provide an answer. Do not quote the input.\n\n"
-                "INPUT DATA:\n" + full_text
-            )
-
-            try:
-                resp = requests.post(
-                    self.get_setting("LMSTUDIO_URL"),
-                    json={"model":"your_model_name",
-                        "messages":[{"role":"user","content":prompt}],
-                        "max_tokens": self.get_setting("MAX_TOKENS_BULK", int)},
-                    timeout=900
-                )
-                if resp.status_code == 200:
-                    reply = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "")
-                    if reply:
-                        self.thread_safe_reply(reply)
-                        self.send_slack_notification(reply)
-                        QMetaObject.invokeMethod(
-                            self,
-                            "add_to_history",
-                            Qt.QueuedConnection,
-                            Q_ARG(str, reply)
-                        )
-            except Exception as e:
-                self.thread_safe_log(f"Error during bulk analysis: {e}")
-
-            # Reset and restart the window
-            try:
-                open(file_path, "w").close()
-                self.thread_safe_log("Rolling file cleared after bulk analysis.")
-            except:
-                pass
-
-            self.rolling_file_start_time = now
-        except Exception as e:
-            self.thread_safe_log(f"Error in bulk analysis: {e}")
-
     # ==================
     # SAVE APP STATE AND RESUME STATE
     #====================
 
     def save_app_state(self):
-        try:
-            state = {
-                "active_profile": self.profile_select.currentText(),
-                "topics": self.get_topics_list(),
-                "settings": self.settings,
-                "data_source_file": getattr(self, "current_data_source_file", ""),
-                "prompt_file": getattr(self, "prompt_file", "")
-            }
-            with open(STATE_FILE, "w", encoding="utf-8") as f:
-                json.dump(state, f, indent=2)
-            self.thread_safe_log("App state saved.")
-        except Exception as e:
-            self.thread_safe_log(f"Failed to save app state: {e}")
-    
+        self.sync_topics()
+        self.engine.active_profile = self.profile_select.currentText()
+        self.engine.save_app_state()
+
     def load_app_state(self):
         try:
-            if not os.path.exists(STATE_FILE):
-                return
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
-            # Restore settings
-            self.settings.update(state.get("settings", {}))
-            # Restore prompt file
-            prompt_file = state.get("prompt_file", "")
-            if prompt_file and os.path.exists(prompt_file):
-                self.prompt_file = prompt_file
-                with open(prompt_file, "r", encoding="utf-8") as pf:
-                    self.base_prompt = pf.read()
-            # Restore topics
-            self.topic_entries.clear()
-            for i in reversed(range(self.topics_container.count())):
-                item = self.topics_container.itemAt(i)
-                if item.layout():
-                    for j in reversed(range(item.layout().count())):
-                        widget = item.layout().itemAt(j).widget()
-                        if widget:
-                            widget.setParent(None)
-                    self.topics_container.removeItem(item.layout())
-            for topic in state.get("topics", []):
+            self.engine.load_app_state()
+            # Rebuild topic widgets from the restored topic list
+            topics = list(self.engine.topics)
+            self.clear_topic_fields()
+            for topic in topics:
                 self.add_topic_field(topic)
             # Restore active profile selection
-            active_profile = state.get("active_profile", "")
-            index = self.profile_select.findText(active_profile)
+            index = self.profile_select.findText(self.engine.active_profile)
             if index >= 0:
                 self.profile_select.setCurrentIndex(index)
-            # Restore data source file
-            self.current_data_source_file = state.get("data_source_file", "")
-            self.thread_safe_log("App state loaded.")
         except Exception as e:
             self.thread_safe_log(f"Failed to load app state: {e}")
 
@@ -1154,10 +982,8 @@ class RSSApp(QWidget):
         Robust shutdown sequence for macOS:
         - set a shutting_down flag
         - replace UI callbacks with no-ops
-        - disconnect worker signals
         - stop & delete timers
-        - politely request threads to stop, wait (longer)
-        - shutdown executor (blocking)
+        - stop the engine (schedulers, fast lane, Slack queue)
         - drain Qt event loop a few times
         - save state and allow normal close
         """
@@ -1182,23 +1008,7 @@ class RSSApp(QWidget):
         except Exception:
             pass
 
-        # 2) Disconnect signals on active QThreads (best-effort)
-        try:
-            for thread in list(getattr(self, "active_threads", []) or []):
-                try:
-                    for sig_name in ("log_signal", "reply_signal", "history_signal"):
-                        sig = getattr(thread, sig_name, None)
-                        if sig is not None:
-                            try:
-                                sig.disconnect()
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
-        except Exception:
-            pass
-
-        # 3) Stop timers and remove them (avoid firing while closing)
+        # 2) Stop timers and remove them (avoid firing while closing)
         try:
             if hasattr(self, "auto_fetch_timer") and self.auto_fetch_timer is not None:
                 try:
@@ -1225,50 +1035,21 @@ class RSSApp(QWidget):
         except Exception:
             pass
 
-        # 4) Ask QThreads to stop (requestInterruption + quit) and wait *longer*
         try:
-            for thread in list(getattr(self, "active_threads", []) or []):
-                try:
-                    try:
-                        thread.requestInterruption()
-                    except Exception:
-                        pass
-                    try:
-                        thread.quit()
-                    except Exception:
-                        pass
-                    # Wait up to 5 seconds per thread for a clean stop
-                    try:
-                        thread.wait(timeout=5000)
-                    except TypeError:
-                        try:
-                            thread.wait(5000)
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
+            if hasattr(self, "log_flush_timer") and self.log_flush_timer is not None:
+                self.log_flush_timer.stop()
         except Exception:
             pass
 
-        # 5) Shutdown executor (blocking). This waits for executing futures to finish.
+        # 3) Stop the engine's schedulers (waits briefly for an in-flight cycle)
         try:
-            # prefer to block briefly to allow clean completion
-            try:
-                self.executor.shutdown(wait=True, timeout=5)
-            except TypeError:
-                # older Python doesn't accept timeout kw
-                try:
-                    self.executor.shutdown(wait=True)
-                except Exception:
-                    pass
-            except Exception:
-                pass
+            self.engine.shutdown(timeout=5)
         except Exception:
             pass
 
-        # 6) Block signals on text widgets in case any stray Qt events are posted
+        # 4) Block signals on text widgets in case any stray Qt events are posted
         try:
-            if hasattr(self, "log") and isinstance(self.log, QTextEdit):
+            if hasattr(self, "log") and isinstance(self.log, QPlainTextEdit):
                 try:
                     self.log.blockSignals(True)
                 except Exception:
@@ -1285,7 +1066,7 @@ class RSSApp(QWidget):
         except Exception:
             pass
 
-        # 7) Drain the event queue several times to let pending events run (callbacks are no-ops)
+        # 5) Drain the event queue several times to let pending events run (callbacks are no-ops)
         try:
             for _ in range(8):
                 QApplication.processEvents()
@@ -1294,20 +1075,26 @@ class RSSApp(QWidget):
         except Exception:
             pass
 
-        # 8) Save app state last so state write succeeds with UI callbacks disabled
+        # 6) Save app state last so state write succeeds with UI callbacks disabled
         try:
             self.save_app_state()
         except Exception:
             pass
 
-        # 9) Allow Qt to clean up objects normally (no sys.exit / QApplication.quit here)
+        # Write out whatever is still queued so the on-disk log is complete
+        try:
+            self.engine.log_sink.close()
+        except Exception:
+            pass
+
+        # 7) Allow Qt to clean up objects normally (no sys.exit / QApplication.quit here)
         try:
             self.setAttribute(Qt.WA_DeleteOnClose, True)
             self.deleteLater()
         except Exception:
             pass
 
-        # 10) Finally accept the close and return to event loop so exec() exits cleanly
+        # 8) Finally accept the close and return to event loop so exec() exits cleanly
         event.accept()
 
 # ---------- Global Qt cleanup (prevents PySide6/Shiboken crash on exit) ----------
@@ -1357,7 +1144,7 @@ if __name__ == "__main__":
             color: #00FF41;
         }}
 
-        QLineEdit, QTextEdit, QComboBox {{
+        QLineEdit, QTextEdit, QPlainTextEdit, QComboBox {{
             background-color: #000000;
             color: #00FF41;
             border: 1px solid #00FF41;
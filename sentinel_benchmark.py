@@ -0,0 +1,476 @@
+"""
+Offline benchmark for the Sentinel pipeline. Starts a local HTTP server with
+synthetic RSS/Atom feeds and a fake OpenAI-compatible LLM, then runs the real
+SentinelEngine fetch -> parse -> dedupe -> chunk -> LLM -> Slack cycle against
+it and reports cycle time, items/s, peak RSS and a per-stage breakdown.
+
+    python sentinel_benchmark.py                      # feed count of the largest Data Sources list
+    python sentinel_benchmark.py --feeds 300 --cycles 5 --feed-latency 0.2 --error-rate 0.05
+    python sentinel_benchmark.py --json bench.json    # also write the results as JSON
+    python sentinel_benchmark.py --alloc              # also trace Python allocations per cycle (slower)
+    python sentinel_benchmark.py --hit-rate 0.1 --screen   # put a fast screening model in front of the main one
+    python sentinel_benchmark.py --hit-rate 0.01 --embeddings   # rank items by embedding similarity
+
+Nothing touches the real internet, LM Studio, Slack, or the app's own state
+files; everything the engine writes goes to a temporary directory.
+"""
+import sys
+import os
+import json
+import time
+import re
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+import sentinel_engine
+from sentinel_engine import DEFAULT_GROUP_PRIORITY, SentinelEngine, read_feed_list, resource_path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_FEED_COUNT = 131  # Default_long-v1.txt, used if Data Sources can't be read
+WORDS = ("airport", "outage", "grid", "border", "storm", "ministry", "cable", "protest", "port", "council",
+         "closure", "market", "convoy", "earthquake", "cyber", "strike", "weather", "election")
+FILLER = ("officials", "reported", "residents", "statement", "local", "week", "update", "agency", "sources",
+          "expected", "further", "details", "according", "spokesperson", "monday", "region")  # summary text
+# Appended to the titles of genuine hits; the second is a paraphrase word matching misses
+HIT_MARKERS = ("emergency alert broadcast issued", "sirens sound as civil defence warning goes out")
+BENCH_TOPICS = ["Emergency alert broadcast", "Transcontinental internet outage"]
+EMBEDDING_DIM = 64
+# The stand-in embedding model maps these words onto a shared concept, so paraphrases land close together
+CONCEPTS = {
+    "airspace": "air", "airport": "air", "flights": "air", "flight": "air", "aviation": "air", "traffic": "air",
+    "grounded": "disruption", "delays": "disruption", "halted": "disruption", "suspended": "disruption",
+    "closed": "disruption", "closure": "disruption",
+    "blackout": "outage", "offline": "outage", "severed": "outage", "cable": "internet", "connectivity": "internet",
+    "warning": "alert", "siren": "alert", "sirens": "alert", "broadcast": "alert", "issued": "alert",
+}
+
+
+# -------- Stand-in feed / LLM / Slack server --------
+class FakeUpstream:
+    """
+    Serves /feed/<n>.rss and /feed/<n>.atom, POST /v1/chat/completions,
+    POST /screen/v1/chat/completions, POST /v1/embeddings and POST /slack on
+    127.0.0.1. Each fetch of a feed slides its item window by `new_per_fetch`,
+    so later cycles see a realistic trickle of new items. A `hit_rate` share of entries are genuine
+    hits, marked in their titles (half of them in paraphrase); the stand-in
+    models report a HIT for any chunk that contains one.
+    """
+
+    def __init__(self, items=30, new_per_fetch=5, summary_bytes=400, feed_latency=0.05,
+                 error_rate=0.0, llm_latency=0.5, llm_ms_per_kchar=20.0, hit_rate=0.0, slack_429_rate=0.0, seed=1,
+                 screen_latency=0.05, embed_latency=0.02):
+        self.items = items
+        self.new_per_fetch = new_per_fetch
+        self.summary_bytes = summary_bytes
+        self.feed_latency = feed_latency
+        self.error_rate = error_rate
+        self.llm_latency = llm_latency
+        self.llm_ms_per_kchar = llm_ms_per_kchar
+        self.hit_rate = hit_rate
+        self.slack_429_rate = slack_429_rate
+        self.screen_latency = screen_latency
+        self.embed_latency = embed_latency
+        self.embedded = 0
+        self.slack_posts = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fetches = {}  # feed path -> times served
+        self.server = None
+
+    def start(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                upstream.handle_feed(self)
+
+            def do_POST(self):
+                upstream.handle_post(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="bench-upstream", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def feed_urls(self, count):
+        return [f"{self.base_url}/feed/{n}.{'atom' if n % 4 == 3 else 'rss'}" for n in range(count)]
+
+    def _roll(self):
+        with self._lock:
+            return self._random.random()
+
+    def _text(self, length, words=WORDS):
+        with self._lock:
+            words = [self._random.choice(words) for _ in range(length // 7 + 1)]
+        return " ".join(words)[:length]
+
+    @staticmethod
+    def _send(handler, status, body, content_type):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle_feed(self, handler):
+        path = handler.path.split("?")[0]
+        if not path.startswith("/feed/"):
+            self._send(handler, 404, b"not found", "text/plain")
+            return
+        time.sleep(self.feed_latency * (0.5 + self._roll()))
+        if self._roll() < self.error_rate:
+            self._send(handler, 500, b"synthetic error", "text/plain")
+            return
+        with self._lock:
+            served = self._fetches.get(path, 0)
+            self._fetches[path] = served + 1
+        name = path.rsplit("/", 1)[-1]
+        newest = served * self.new_per_fetch + self.items
+        entries = [(f"{name}-{i}", f"{name} item {i}: {self._text(60)}{self._marker(f'{name}-{i}')}",
+                    self._text(self.summary_bytes, FILLER))
+                   for i in range(newest, newest - self.items, -1)]
+        if name.endswith(".atom"):
+            body, content_type = self._atom(name, entries), "application/atom+xml"
+        else:
+            body, content_type = self._rss(name, entries), "application/rss+xml"
+        self._send(handler, 200, body.encode("utf-8"), content_type)
+
+    def handle_embeddings(self, handler, raw):
+        try:
+            texts = json.loads(raw or b"{}").get("input", [])
+        except ValueError:
+            texts = []
+        if isinstance(texts, str):
+            texts = [texts]
+        time.sleep(self.embed_latency + 0.0005 * len(texts))
+        with self._lock:
+            self.embedded += len(texts)
+        data = [{"object": "embedding", "index": n, "embedding": self.embed(text)} for n, text in enumerate(texts)]
+        self._send(handler, 200, json.dumps({"object": "list", "data": data}).encode("utf-8"), "application/json")
+
+    @staticmethod
+    def embed(text):
+        """Hashed bag of concepts: deterministic, and paraphrases in CONCEPTS share dimensions."""
+        vector = [0.0] * EMBEDDING_DIM
+        for word in re.findall(r"[a-z]+", text.lower()):
+            concept = CONCEPTS.get(word, word)
+            vector[int(hashlib.sha1(concept.encode("utf-8")).hexdigest()[:8], 16) % EMBEDDING_DIM] += 1.0
+        return vector
+
+    def _marker(self, guid):
+        """Stable per entry, so a hit stays a hit however often the feed is served."""
+        draw = int(hashlib.sha1(guid.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        if draw >= self.hit_rate:
+            return ""
+        return f" - {HIT_MARKERS[int(draw / self.hit_rate * len(HIT_MARKERS))]}"
+
+    def _rss(self, name, entries):
+        date = formatdate(usegmt=True)
+        items = "".join(
+            f"<item><title>{escape(title)}</title><link>http://bench.invalid/{guid}</link>"
+            f"<guid>{guid}</guid><pubDate>{date}</pubDate><description>{escape(summary)}</description></item>"
+            for guid, title, summary in entries
+        )
+        return f"<?xml version='1.0'?><rss version='2.0'><channel><title>{name}</title>{items}</channel></rss>"
+
+    def _atom(self, name, entries):
+        date = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        items = "".join(
+            f"<entry><id>urn:bench:{guid}</id><title>{escape(title)}</title>"
+            f"<link href='http://bench.invalid/{guid}'/><updated>{date}</updated>"
+            f"<summary>{escape(summary)}</summary></entry>"
+            for guid, title, summary in entries
+        )
+        return (f"<?xml version='1.0'?><feed xmlns='http://www.w3.org/2005/Atom'><title>{name}</title>"
+                f"<updated>{date}</updated>{items}</feed>")
+
+    def handle_post(self, handler):
+        length = int(handler.headers.get("Content-Length", 0))
+        raw = handler.rfile.read(length) if length else b""
+        if handler.path.startswith("/slack"):
+            if self._roll() < self.slack_429_rate:
+                handler.send_response(429)
+                handler.send_header("Retry-After", "1")
+                handler.send_header("Content-Length", "12")
+                handler.end_headers()
+                handler.wfile.write(b"rate_limited")
+                return
+            with self._lock:
+                self.slack_posts += 1
+            self._send(handler, 200, b"ok", "text/plain")
+            return
+        if handler.path.startswith("/v1/embeddings"):
+            self.handle_embeddings(handler, raw)
+            return
+        screen = handler.path.startswith("/screen/")
+        if not handler.path.split("/screen", 1)[-1].startswith("/v1/chat/completions"):
+            self._send(handler, 404, b"not found", "text/plain")
+            return
+        try:
+            request = json.loads(raw or b"{}")
+            prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+        except ValueError:
+            prompt = ""
+        hit = any(marker in prompt for marker in HIT_MARKERS)
+        noise = self._roll()
+        if screen:
+            time.sleep(self.screen_latency)
+            # A decent but imperfect screen: hits mostly score high, a few misses score low
+            score = (6 + int(noise * 4) if noise > 0.05 else 1) if hit else int(noise * 5)
+            content = str(score)
+        else:
+            time.sleep(self.llm_latency + self.llm_ms_per_kchar * len(prompt) / 1000 / 1000)
+            if hit:
+                content = "REPORT: *** HIT ***\nTopic: benchmark\nSummary: synthetic hit from the stand-in LLM."
+            else:
+                content = "REPORT: *** NO HIT ***"
+        completion = len(content) // 4
+        reply = {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": completion,
+                      "total_tokens": len(prompt) // 4 + completion},
+        }
+        self._send(handler, 200, json.dumps(reply).encode("utf-8"), "application/json")
+
+
+# -------- Harness --------
+def largest_bundled_list():
+    """Feed count of the biggest list in Data Sources, so the default load matches real use."""
+    folder = resource_path("Data Sources")
+    try:
+        sizes = [len(read_feed_list(os.path.join(folder, name))) for name in os.listdir(folder) if name.endswith(".txt")]
+        return max(sizes) if sizes else DEFAULT_FEED_COUNT
+    except OSError:
+        return DEFAULT_FEED_COUNT
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def stage_totals(snapshot):
+    """Collapse a Metrics snapshot into per-stage seconds and counts."""
+    seconds = {}
+    counts = {}
+    for hist in snapshot["histograms"]:
+        seconds[hist["name"]] = seconds.get(hist["name"], 0.0) + hist["sum"]
+    for counter in snapshot["counters"]:
+        key = counter["name"]
+        if key == "sentinel_items_total":
+            key = f"items_{counter['labels']['stage']}"
+        elif key == "sentinel_feed_responses_total":
+            key = f"feeds_http_{counter['labels']['status']}"
+        elif key == "sentinel_llm_tokens_total":
+            key = f"llm_{counter['labels']['type']}"
+        elif key == "sentinel_llm_responses_total":
+            key = f"llm_requests_{counter['labels']['kind']}"
+        counts[key] = counts.get(key, 0) + counter["value"]
+    chunks = sum(h["sum"] for h in snapshot["histograms"] if h["name"] == "sentinel_chunks")
+    return {
+        "fetch_s": seconds.get("sentinel_feed_fetch_seconds", 0.0),
+        "parse_s": seconds.get("sentinel_feed_parse_seconds", 0.0),
+        "llm_s": seconds.get("sentinel_llm_request_seconds", 0.0),
+        "slack_s": seconds.get("sentinel_slack_send_seconds", 0.0),
+        "fetch_to_hit_s": seconds.get("sentinel_fetch_to_hit_seconds", 0.0),
+        "hits": sum(h["count"] for h in snapshot["histograms"] if h["name"] == "sentinel_fetch_to_hit_seconds"),
+        "chunks": chunks,
+        "bytes": counts.pop("sentinel_feed_bytes_total", 0),
+        **{k: v for k, v in counts.items() if not k.startswith("sentinel_")},
+    }
+
+
+def diff_stages(after, before):
+    return {key: value - before.get(key, 0) for key, value in after.items()}
+
+
+def isolate_engine_files(folder):
+    """Point every file the engine writes at `folder` so a run never touches the user's state."""
+    sentinel_engine.ROLLING_FILE = os.path.join(folder, "rolling_rss.txt")
+    sentinel_engine.PIPELINE_STATE_FILE = os.path.join(folder, "pipeline_state.json")
+    sentinel_engine.REPORT_HISTORY_FILE = os.path.join(folder, "report_history.jsonl")
+    sentinel_engine.METRICS_FILE = os.path.join(folder, "metrics.json")
+    sentinel_engine.TOKEN_USAGE_FILE = os.path.join(folder, "token_usage.json")
+    sentinel_engine.LOG_FILE = os.path.join(folder, "sentinel.log")
+    sentinel_engine.EMBEDDING_CACHE_FILE = os.path.join(folder, "embedding_cache.json")
+    sentinel_engine.CYCLE_ARCHIVE_FILE = os.path.join(folder, "cycle_archive.jsonl")
+    sentinel_engine.TRACE_DIR = os.path.join(folder, "traces")
+
+
+def run_benchmark(args, upstream, folder):
+    isolate_engine_files(folder)
+    if args.trace:
+        os.makedirs(args.trace, exist_ok=True)
+        sentinel_engine.TRACE_DIR = os.path.abspath(args.trace)
+    engine = SentinelEngine()
+    engine.log_sink.echo = args.verbose
+    engine.settings.update({
+        "LMSTUDIO_URL": f"{upstream.base_url}/v1/chat/completions",
+        "SLACK_WEBHOOK_URL": f"{upstream.base_url}/slack",
+        "ITEMS_PER_FEED": args.items,
+        "CHUNK_SIZE": args.chunk_size,
+        "USE_CHUNKED_MODE": "1",
+        "MAX_TOKENS": args.max_tokens,
+        "WRITE_TO_FILE": "0",
+        "BULK_ANALYSIS": "0",
+        "URGENT_SOURCES": "",
+        "TRACE_CYCLES": "1" if args.trace else "0",
+        "SCREEN_LMSTUDIO_URL": f"{upstream.base_url}/screen/v1/chat/completions" if args.screen else "",
+        "SCREEN_SAMPLE_RATE": args.screen_sample_rate,
+        "RELEVANCE_ORDER": "0" if args.feed_order else "1",
+        "EMBEDDING_URL": f"{upstream.base_url}/v1/embeddings" if args.embeddings else "",
+        "EMBEDDING_MIN_SIMILARITY": args.min_similarity,
+    })
+    engine.topics = list(BENCH_TOPICS)
+    # The bundled prompt, whatever the working directory, so every run sends the same chunks
+    if not engine.load_prompt_file(resource_path("default_prompt.txt")):
+        raise SystemExit("default_prompt.txt not found next to sentinel_engine.py")
+    engine.apply_settings()
+    engine.feeds = upstream.feed_urls(args.feeds)
+    engine.rebuild_feed_groups()
+    group = engine.groups["default"]
+    group.configure(None, DEFAULT_GROUP_PRIORITY, args.concurrency)
+
+    cycles = []
+    if args.alloc:
+        tracemalloc.start()
+    try:
+        for n in range(args.cycles):
+            before = stage_totals(engine.metrics.snapshot())
+            if args.alloc:
+                tracemalloc.reset_peak()
+                base, _ = tracemalloc.get_traced_memory()
+                blocks = sys.getallocatedblocks()
+            started = time.perf_counter()
+            engine.run_fetch_cycle(group)  # the same cycle the scheduler runs, on this thread
+            elapsed = time.perf_counter() - started
+            alloc = None
+            if args.alloc:
+                current, peak = tracemalloc.get_traced_memory()
+                alloc = {"peak_kib": (peak - base) / 1024, "retained_kib": (current - base) / 1024,
+                         "blocks_retained": sys.getallocatedblocks() - blocks}
+            stages = diff_stages(stage_totals(engine.metrics.snapshot()), before)
+            engine.log_sink.drain()
+            kept = stages.get("items_kept", 0)
+            cycles.append({"cycle": n + 1, "seconds": elapsed, "items_per_s": kept / elapsed if elapsed else 0.0,
+                           "stages": stages, "alloc": alloc})
+            print(f"cycle {n + 1}: {elapsed:.2f}s, {kept} items kept ({kept / elapsed:.0f}/s), "
+                  f"{stages['chunks']:.0f} chunks, fetch {stages['fetch_s']:.2f}s, parse {stages['parse_s']:.2f}s, "
+                  f"llm {stages['llm_s']:.2f}s, slack {stages['slack_s']:.2f}s")
+            if stages["hits"]:
+                print(f"         {stages['hits']} HIT(s), mean fetch-to-HIT {stages['fetch_to_hit_s'] / stages['hits']:.2f}s")
+            if alloc:
+                print(f"         alloc: peak +{alloc['peak_kib']:.0f} KiB over cycle start, "
+                      f"retained +{alloc['retained_kib']:.0f} KiB in {alloc['blocks_retained']} blocks")
+        if args.screen:
+            print(f"screening: {engine.screen_stats.summary()}")
+        if args.embeddings:
+            print(f"embeddings: {upstream.embedded} texts embedded, {len(engine.embeddings)} vectors cached")
+    finally:
+        if args.alloc:
+            tracemalloc.stop()
+        engine.shutdown(timeout=10)  # lets the Slack queue flush
+        engine.log_sink.drain()
+        engine.log_sink.close()
+    return cycles
+
+
+def summarize(args, cycles):
+    times = sorted(c["seconds"] for c in cycles)
+    total_items = sum(c["stages"].get("items_kept", 0) for c in cycles)
+    return {
+        "config": vars(args),
+        "cycles": cycles,
+        "cycle_seconds": {"min": times[0], "median": times[len(times) // 2], "max": times[-1]},
+        "items_per_s": total_items / sum(times) if sum(times) else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sentinel pipeline against local stand-in servers.")
+    parser.add_argument("--feeds", type=int, default=None, help="number of synthetic feeds (default: largest Data Sources list)")
+    parser.add_argument("--items", type=int, default=30, help="entries per feed (also used as ITEMS_PER_FEED)")
+    parser.add_argument("--new-per-fetch", type=int, default=5, help="new entries per feed on every later fetch")
+    parser.add_argument("--summary-bytes", type=int, default=400, help="characters of summary text per entry")
+    parser.add_argument("--feed-latency", type=float, default=0.05, help="mean seconds per feed response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of feed requests answered with HTTP 500")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="base seconds per LLM response")
+    parser.add_argument("--llm-ms-per-kchar", type=float, default=20.0, help="extra LLM milliseconds per 1000 prompt characters")
+    parser.add_argument("--hit-rate", type=float, default=0.0, help="fraction of entries that are genuine hits")
+    parser.add_argument("--feed-order", action="store_true", help="send chunks in feed order (RELEVANCE_ORDER=0)")
+    parser.add_argument("--slack-429-rate", type=float, default=0.0, help="fraction of Slack posts answered with 429 Retry-After: 1")
+    parser.add_argument("--screen", action="store_true", help="enable the screening cascade with a stand-in screening model")
+    parser.add_argument("--screen-latency", type=float, default=0.05, help="seconds per screening-model response")
+    parser.add_argument("--screen-sample-rate", type=float, default=0.1, help="SCREEN_SAMPLE_RATE")
+    parser.add_argument("--embeddings", action="store_true", help="rank items with a stand-in /v1/embeddings model")
+    parser.add_argument("--min-similarity", type=float, default=0.0, help="EMBEDDING_MIN_SIMILARITY (0 = rank only, never drop)")
+    parser.add_argument("--chunk-size", type=int, default=4000, help="CHUNK_SIZE in characters")
+    parser.add_argument("--max-tokens", type=int, default=3000, help="MAX_TOKENS")
+    parser.add_argument("--concurrency", type=int, default=1, help="parallel fetches for the feed group")
+    parser.add_argument("--cycles", type=int, default=3, help="fetch/analysis cycles to run")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for latency jitter, errors and text")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--trace", help="write a Chrome trace of every cycle into this folder")
+    parser.add_argument("--alloc", action="store_true", help="trace Python allocations per cycle with tracemalloc (slower)")
+    parser.add_argument("--verbose", action="store_true", help="print the engine log")
+    args = parser.parse_args(argv)
+    if args.feeds is None:
+        args.feeds = largest_bundled_list()
+
+    upstream = FakeUpstream(args.items, args.new_per_fetch, args.summary_bytes, args.feed_latency, args.error_rate,
+                            args.llm_latency, args.llm_ms_per_kchar, args.hit_rate, args.slack_429_rate,
+                            args.seed, args.screen_latency).start()
+    print(f"Benchmarking {args.feeds} feeds x {args.items} items, {args.cycles} cycles, concurrency {args.concurrency} "
+          f"({upstream.base_url})")
+    try:
+        with tempfile.TemporaryDirectory(prefix="sentinel-bench-") as folder:
+            cycles = run_benchmark(args, upstream, folder)
+    finally:
+        upstream.stop()
+
+    result = summarize(args, cycles)
+    rss = result["peak_rss_mb"]
+    print(f"cycle time min/median/max: {result['cycle_seconds']['min']:.2f}/{result['cycle_seconds']['median']:.2f}/"
+          f"{result['cycle_seconds']['max']:.2f}s, {result['items_per_s']:.0f} items/s, "
+          f"peak RSS {'n/a' if rss is None else f'{rss:.0f} MB'}")
+    print(f"{upstream.slack_posts} Slack posts delivered")
+    print("stage seconds are summed across fetch threads, so fetch_s can exceed the cycle time")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3209 @@
+"""
+ShunyaNet Sentinel engine: feed fetching, LLM analysis, Slack alerts, state
+and profile handling, with no Qt dependency. The GUI (ShunyaNet_Sentinel.py)
+is a thin client of SentinelEngine; this module can also run on its own:
+
+    python sentinel_engine.py --headless     # daemon, polls every FETCH_INTERVAL
+    python sentinel_engine.py --once         # one cycle then exit (cron)
+    python sentinel_engine.py --worker 0     # shard worker for a SHARD_WORKERS coordinator
+"""
+import sys
+import feedparser
+import requests
+import time
+import json
+import os
+import signal
+import argparse
+import threading
+import logging
+import hashlib
+import math
+import random
+import re
+import bisect
+import socket
+import sqlite3
+import subprocess
+from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from dateutil import parser as dateparser
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import numpy as np
+except ImportError:  # optional: embeddings fall back to array('f') and pure Python
+    np = None
+
+
+# Determine directory where app should read/write user-editable files
+if getattr(sys, 'frozen', False):
+    # When frozen on macOS, sys.executable is:
+    #   <app>/Contents/MacOS/<exe>
+    exe_dir = os.path.dirname(sys.executable)  # .../Contents/MacOS
+    app_bundle_dir = os.path.abspath(os.path.join(exe_dir, "..", ".."))  # .../MyApp.app
+    APP_DIR = os.path.abspath(os.path.join(app_bundle_dir, ".."))  # parent folder containing the .app
+else:
+    APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --------------------------
+# Helper to load bundled files
+# --------------------------
+def resource_path(relative_path):
+    """Get the absolute path to a resource, works for dev and PyInstaller"""
+    base_path = getattr(sys, "_MEIPASS", os.path.dirname(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def local_path(path):
+    """
+    Resolve a relative prompt or data source path against APP_DIR, then the
+    bundled resources, never the working directory (cron, --once elsewhere).
+    """
+    if not path or os.path.isabs(path):
+        return path
+    for candidate in (os.path.join(APP_DIR, path), resource_path(path)):
+        if os.path.exists(candidate):
+            return candidate
+    return os.path.join(APP_DIR, path)
+
+
+# Example Default Feeds - this is replaced with the feeds in your .txt list, when it is loaded. NRC and FEMA lists
+FEEDS = [
+    "http://rss.cnn.com/rss/cnn_topstories.rss",
+    "http://rss.cnn.com/rss/cnn_world.rss",
+    "http://rss.cnn.com/rss/cnn_us.rss",
+    "http://feeds.bbci.co.uk/news/rss.xml",
+    "http://www.euronews.com/rss",
+    "https://feeds.bbci.co.uk/news/world/latin_america/rss.xml",
+    "https://www.spc.noaa.gov/products/spcrss.xml",
+    "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_hour.atom"
+]
+
+#These some of these values are immediately overwritten by the app_state.json file, which offers improved default values
+LMSTUDIO_URL = "YOUR URL HERE/v1/chat/completions" #app_state overwrites 
+MAX_TOKENS = 3000 #app_state overwrites 
+MAX_TOKENS_BULK = 4000 #app_state overwrites 
+FETCH_INTERVAL = 600 #app_state overwrites 
+ITEMS_PER_FEED = 50 #app_state overwrites 
+MAX_TOPICS = 10
+MAX_PROFILES = 20
+ROLLING_FILE = os.path.join(APP_DIR, "rolling_rss.txt")
+PROFILE_FILE = os.path.join(APP_DIR, "topic_profiles.json")
+SLACK_WEBHOOK_URL = "YOUR SLACK WEBHOOK URL HERE" #app_state overwrites 
+STATE_FILE = os.path.join(APP_DIR, "app_state.json")
+PIPELINE_STATE_FILE = os.path.join(APP_DIR, "pipeline_state.json")
+SEEN_GUID_TTL = 48 * 3600  # dedupe memory; twice the 24h age cut-off so late re-posts of an item stay deduped
+RESTART_HISTORY = 20  # restarts remembered for the time-to-first-alert metric
+RECENT_PROMPT_HASHES = 4096  # (chunk, profile) prompts remembered so repeats are not re-sent
+FAST_LANE_LATENCIES = 500  # per-item source-to-alert samples kept for the fast lane
+DEFAULT_TOPICS = ["Venezuela", "regional or national air traffic disruption", "transcontinental internet outage"]
+REPORT_HISTORY_FILE = os.path.join(APP_DIR, "report_history.jsonl")
+HISTORY_PAGE_SIZE = 100  # reports per lazily loaded page
+HISTORY_CACHED_PAGES = 8  # pages kept in memory at once
+LOG_FILE = os.path.join(APP_DIR, "sentinel.log")
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024  # rotate the on-disk log at 5 MB
+LOG_FILE_BACKUPS = 5
+LOG_FLUSH_MS = 100  # how often queued log lines are drained to the panel/stdout
+METRICS_FILE = os.path.join(APP_DIR, "metrics.json")
+TRACE_DIR = os.path.join(APP_DIR, "traces")
+TOKEN_USAGE_FILE = os.path.join(APP_DIR, "token_usage.json")
+TOKEN_USAGE_DAYS = 90  # days of token totals kept in token_usage.json
+DEFAULT_CHARS_PER_TOKEN = 4.0  # starting guess, replaced by measured usage after the first reply
+SLACK_MIN_INTERVAL = 1.0  # seconds between posts to one webhook (Slack allows about one per second)
+SLACK_MAX_CHARS = 35000  # merged messages are split below Slack's 40k text limit
+SLACK_MAX_ATTEMPTS = 5
+SETTINGS_WATCH_SECONDS = 2.0  # how often app_state.json is checked for hand edits
+SCREEN_MAX_TOKENS = 4  # the screening model only answers with one digit
+SCREEN_SUMMARY_EVERY = 20  # log screening precision/recall after this many checked verdicts
+SCREEN_PROMPT = """You screen news items for an alerting system.
+Rate from 0 to 9 how likely it is that ANY item below relates to ANY of these topics:
+{TOPICS}
+
+ITEMS:
+{CHUNK}
+
+Reply with a single digit and nothing else. 0 = clearly unrelated, 9 = clearly related."""
+CYCLE_ARCHIVE_FILE = os.path.join(APP_DIR, "cycle_archive.jsonl")  # ARCHIVE_CYCLES: each cycle's new items, for replay
+CYCLE_ARCHIVE_MAX_BYTES = 50 * 1024 * 1024  # then the archive is moved to .1 and a new one started
+EMBEDDING_CACHE_FILE = os.path.join(APP_DIR, "embedding_cache.json")  # keys; vectors go next to it in .f32
+EMBEDDING_CACHE_ITEMS = 10000  # vectors kept; the least recently used row is reused
+EMBEDDING_BATCH = 64  # texts per /v1/embeddings request
+EMBEDDING_TEXT_CHARS = 1000  # of title + summary sent to be embedded
+OVERFLOW_MAX_ITEMS = 5000  # carried-over items kept per feed group; the oldest go first
+SHARED_DB_FILE = "sentinel_shared.db"  # in SHARED_DIR: dedupe, gathered items and worker heartbeats
+SHARD_VNODES = 64  # points per worker on the hash ring
+SHARD_GATHER_SECONDS = 5.0  # gathered items wait this long for the other shards before a cycle starts
+SHARD_POLL_SECONDS = 1.0  # how often the coordinator checks the shared store
+SHARD_DB_TIMEOUT = 30  # seconds a write waits for another process to release the store
+SHARD_RESPAWN_SECONDS = 30  # minimum gap between restarts of a crashed local worker
+STORY_MATCH = 0.5  # share of an item's title terms a story must already know to claim it
+STORY_TERMS = 60  # terms remembered per story
+STORY_TITLES = 3  # example titles kept per story for the digest
+ESCALATION_TERMS = frozenset((
+    "killed", "dead", "deaths", "casualties", "injured", "wounded", "explosion", "explosions", "blast",
+    "evacuation", "evacuate", "evacuated", "emergency", "curfew", "martial", "invasion", "invaded",
+    "missile", "missiles", "airstrike", "airstrikes", "war", "hostilities", "collapse", "collapsed",
+    "nationwide", "shutdown", "closed", "closure", "tsunami", "escalation", "escalates", "mobilization",
+))
+STOP_WORDS = frozenset((
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "were", "has", "have", "had", "its",
+    "but", "not", "you", "all", "can", "will", "after", "over", "into", "about", "more", "than", "new",
+    "says", "said", "their", "they", "his", "her", "who", "what", "when", "where", "which", "been", "also",
+    "amid", "out", "off", "now", "how", "why", "our", "one", "two", "may", "could", "would", "should",
+    "http", "https", "www", "com", "html", "amp", "nbsp", "quot",
+))
+TRACE_FILES_KEPT = 50  # newest cycle traces kept on disk
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+TOKEN_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 32768)
+CHUNK_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file and rename it over path, so readers never see a torn file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# -------- Typed settings --------
+# settings key -> (Config field, type, minimum). The settings dict keeps the
+# raw values as stored in app_state.json and shown in the settings dialog.
+SETTING_SPECS = {
+    "LMSTUDIO_URL": ("lmstudio_url", str, None),
+    "SLACK_WEBHOOK_URL": ("slack_webhook_url", str, None),
+    "MAX_TOKENS": ("max_tokens", int, 1),
+    "MAX_TOKENS_BULK": ("max_tokens_bulk", int, 1),
+    "FETCH_INTERVAL": ("fetch_interval", int, 1),
+    "ITEMS_PER_FEED": ("items_per_feed", int, 1),
+    "USE_CHUNKED_MODE": ("use_chunked_mode", bool, None),
+    "CHUNK_SIZE": ("chunk_size", int, 100),
+    "WRITE_TO_FILE": ("write_to_file", bool, None),
+    "ANALYSIS_WINDOW": ("analysis_window", int, 1),
+    "BULK_ANALYSIS": ("bulk_analysis", bool, None),
+    "FANOUT_PROFILES": ("fanout_profiles", tuple, None),
+    "URGENT_SOURCES": ("urgent_sources", tuple, None),
+    "URGENT_CHUNK_SIZE": ("urgent_chunk_size", int, 100),
+    "URGENT_LMSTUDIO_URL": ("urgent_lmstudio_url", str, None),
+    "METRICS_PORT": ("metrics_port", int, 0),
+    "TRACE_CYCLES": ("trace_cycles", bool, None),
+    "TOKEN_BUDGET_PER_CYCLE": ("token_budget_per_cycle", int, 0),
+    "TOKEN_BUDGET_PER_DAY": ("token_budget_per_day", int, 0),
+    "SLACK_COALESCE_SECONDS": ("slack_coalesce_seconds", float, 0),
+    "STORY_CLUSTERING": ("story_clustering", bool, None),
+    "STORY_WINDOW_HOURS": ("story_window_hours", int, 1),
+    "STORY_NOVELTY": ("story_novelty", float, 0),
+    "OVERFLOW_MAX_AGE_MINUTES": ("overflow_max_age_minutes", int, 0),
+    "SCREEN_LMSTUDIO_URL": ("screen_lmstudio_url", str, None),
+    "SCREEN_MODEL": ("screen_model", str, None),
+    "SCREEN_THRESHOLD": ("screen_threshold", int, 0),
+    "SCREEN_SAMPLE_RATE": ("screen_sample_rate", float, 0),
+    "RELEVANCE_ORDER": ("relevance_order", bool, None),
+    "EMBEDDING_URL": ("embedding_url", str, None),
+    "EMBEDDING_MODEL": ("embedding_model", str, None),
+    "EMBEDDING_MIN_SIMILARITY": ("embedding_min_similarity", float, None),
+    "SHARD_WORKERS": ("shard_workers", int, 0),
+    "SHARED_DIR": ("shared_dir", str, None),
+    "SHARD_SPAWN_LOCAL": ("shard_spawn_local", bool, None),
+    "ARCHIVE_CYCLES": ("archive_cycles", bool, None),
+}
+
+
+def parse_setting(value, kind, minimum=None):
+    """Convert a raw setting ("1", 4000, "a, b", ...) to kind, raising ValueError if it doesn't fit."""
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in ("1", "true", "yes", "on"):
+            return True
+        if text in ("0", "false", "no", "off", "", "none"):
+            return False
+        raise ValueError("expected 1 or 0")
+    if kind is tuple:
+        items = value if isinstance(value, (list, tuple)) else str(value or "").split(",")
+        return tuple(item.strip() for item in items if str(item).strip())
+    if kind is str:
+        return "" if value is None else str(value).strip()
+    number = kind(str(value).strip())
+    if minimum is not None and number < minimum:
+        raise ValueError(f"must be at least {minimum}")
+    return number
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    Typed, validated, immutable view of the settings. Each cycle takes one
+    snapshot at its start, so a settings change never lands mid-cycle and the
+    hot paths read plain attributes instead of re-parsing strings.
+    """
+    lmstudio_url: str
+    slack_webhook_url: str
+    max_tokens: int
+    max_tokens_bulk: int
+    fetch_interval: int
+    items_per_feed: int
+    use_chunked_mode: bool
+    chunk_size: int
+    write_to_file: bool
+    analysis_window: int
+    bulk_analysis: bool
+    fanout_profiles: tuple
+    urgent_sources: tuple
+    urgent_chunk_size: int
+    urgent_lmstudio_url: str
+    metrics_port: int
+    trace_cycles: bool
+    token_budget_per_cycle: int
+    token_budget_per_day: int
+    slack_coalesce_seconds: float
+    story_clustering: bool
+    story_window_hours: int
+    story_novelty: float
+    overflow_max_age_minutes: int
+    screen_lmstudio_url: str
+    screen_model: str
+    screen_threshold: int
+    screen_sample_rate: float
+    relevance_order: bool
+    embedding_url: str
+    embedding_model: str
+    embedding_min_similarity: float
+    shard_workers: int
+    shared_dir: str
+    shard_spawn_local: bool
+    archive_cycles: bool
+
+    @classmethod
+    def from_settings(cls, settings, previous=None):
+        """
+        Build a Config from a raw settings dict. Values that don't parse keep
+        their previous value and are returned as error strings.
+        """
+        values, errors = {}, []
+        for key, (field, kind, minimum) in SETTING_SPECS.items():
+            if key not in settings:
+                continue
+            try:
+                values[field] = parse_setting(settings[key], kind, minimum)
+            except ValueError as e:
+                errors.append(f"{key}={settings[key]!r}: {e}")
+        if previous is None:
+            return cls(**values), errors
+        return replace(previous, **values), errors
+
+    def changed_fields(self, other):
+        return [f.name for f in fields(self) if getattr(self, f.name) != getattr(other, f.name)]
+
+
+# -------- Single-flight cycle scheduler --------
+class CycleScheduler:
+    """
+    Runs one pipeline cycle at a time on a long-lived worker thread.
+
+    trigger() (button/logo clicks) coalesces into at most one pending run;
+    tick() (the interval timer) is dropped and counted as an overrun when the
+    previous cycle is still going, so slow LLM calls can never stack cycles.
+    """
+
+    def __init__(self, name, run_cycle, log, metrics=None):
+        self.name = name
+        self.run_cycle = run_cycle
+        self.log = log
+        self.metrics = metrics
+        self._cond = threading.Condition()
+        self._pending = False
+        self._running = False
+        self._stopping = False
+        self.overruns = 0
+        self.coalesced = 0
+        self.cycles = 0
+        self.durations = deque(maxlen=50)
+        self._thread = threading.Thread(target=self._loop, name=f"{name}-scheduler", daemon=True)
+        self._thread.start()
+
+    def trigger(self, reason="manual"):
+        with self._cond:
+            if self._stopping:
+                return False
+            if self._pending:
+                self.coalesced += 1
+                self.log(f"[Scheduler] {self.name} run already pending, {reason} trigger coalesced.")
+                return False
+            self._pending = True
+            if self._running:
+                self.log(f"[Scheduler] {self.name} cycle in progress, {reason} trigger queued as next run.")
+            self._cond.notify()
+            return True
+
+    def tick(self):
+        with self._cond:
+            if self._running or self._pending:
+                self.overruns += 1
+                self.log(f"[Scheduler] {self.name} cycle still running, skipping timer tick (overruns: {self.overruns}).")
+                return False
+        return self.trigger("timer")
+
+    def queue_depth(self):
+        with self._cond:
+            return int(self._running) + int(self._pending)
+
+    def is_busy(self):
+        return self.queue_depth() > 0
+
+    def stats(self):
+        with self._cond:
+            durations = list(self.durations)
+            return {
+                "queue_depth": int(self._running) + int(self._pending),
+                "cycles": self.cycles,
+                "overruns": self.overruns,
+                "coalesced": self.coalesced,
+                "last_duration": durations[-1] if durations else None,
+                "avg_duration": sum(durations) / len(durations) if durations else None,
+                "max_duration": max(durations) if durations else None,
+            }
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._stopping = True
+            self._pending = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                self._pending = False
+                self._running = True
+            started = time.monotonic()
+            try:
+                self.run_cycle()
+            except Exception as e:
+                self.log(f"[Scheduler] {self.name} cycle failed: {e}")
+            duration = time.monotonic() - started
+            if self.metrics is not None:
+                self.metrics.observe("sentinel_cycle_seconds", duration, job=self.name)
+            with self._cond:
+                self._running = False
+                self.cycles += 1
+                self.durations.append(duration)
+            s = self.stats()
+            self.log(
+                f"[Scheduler] {self.name} cycle {s['cycles']} took {duration:.1f}s "
+                f"(avg {s['avg_duration']:.1f}s, max {s['max_duration']:.1f}s, "
+                f"overruns {s['overruns']}, coalesced {s['coalesced']}, queue depth {s['queue_depth']})"
+            )
+
+
+# -------- Priority gates for LLM requests and feed fetches --------
+PRIORITY_URGENT = -10  # fast-lane items from URGENT_SOURCES, ahead of everything
+PRIORITY_ALERT = 0  # per-chunk topic alerts (feed groups use 0..99, lower is more urgent)
+PRIORITY_BULK = 100  # hourly bulk trend report, always behind every feed group
+DEFAULT_GROUP_PRIORITY = 50
+MAX_PARALLEL_FETCHES = 8  # HTTP fetches in flight across all feed groups
+
+
+class PriorityGate:
+    """
+    Lets up to `capacity` holders run at once and, when several are waiting,
+    hands the next slot to the lowest priority number first (FIFO within a
+    priority). Keeps a long bulk report from jumping ahead of queued chunk
+    alerts, and urgent feed groups ahead of slow ones.
+    """
+
+    def __init__(self, capacity=1):
+        self._cond = threading.Condition()
+        self._capacity = capacity
+        self._in_use = 0
+        self._waiting = []
+        self._seq = 0
+
+    @contextmanager
+    def slot(self, priority):
+        with self._cond:
+            self._seq += 1
+            ticket = (priority, self._seq)
+            self._waiting.append(ticket)
+            while self._in_use >= self._capacity or min(self._waiting) != ticket:
+                self._cond.wait()
+            self._waiting.remove(ticket)
+            self._in_use += 1
+            # Another slot may still be free for the next waiter in line
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify_all()
+
+
+# -------- Pipeline metrics: counters and histograms --------
+METRIC_HELP = {
+    "sentinel_cycle_seconds": ("histogram", "Duration of one scheduler cycle.", SECONDS_BUCKETS),
+    "sentinel_feed_fetch_seconds": ("histogram", "HTTP time to fetch one feed.", SECONDS_BUCKETS),
+    "sentinel_feed_parse_seconds": ("histogram", "Time to parse one fetched feed.", SECONDS_BUCKETS),
+    "sentinel_feed_bytes_total": ("counter", "Feed response bytes downloaded.", None),
+    "sentinel_feed_responses_total": ("counter", "Feed fetches by HTTP status (error = no response).", None),
+    "sentinel_items_total": ("counter", "Feed entries by filter stage outcome.", None),
+    "sentinel_chunks": ("histogram", "LLM requests planned per cycle.", CHUNK_BUCKETS),
+    "sentinel_llm_request_seconds": ("histogram", "LLM request latency, excluding queueing.", SECONDS_BUCKETS),
+    "sentinel_llm_responses_total": ("counter", "LLM requests by HTTP status.", None),
+    "sentinel_llm_tokens": ("histogram", "Tokens per LLM request as reported by the server.", TOKEN_BUCKETS),
+    "sentinel_llm_tokens_total": ("counter", "Tokens reported by the LLM server.", None),
+    "sentinel_slack_send_seconds": ("histogram", "Time to post one Slack message.", SECONDS_BUCKETS),
+    "sentinel_slack_responses_total": ("counter", "Slack posts by HTTP status (error = no response).", None),
+    "sentinel_budget_dropped_total": ("counter", "LLM requests skipped by the token budget.", None),
+    "sentinel_slack_merged_total": ("counter", "Replies merged into an earlier queued Slack message.", None),
+    "sentinel_slack_retries_total": ("counter", "Slack posts retried, by HTTP status (error = no response).", None),
+    "sentinel_slack_dropped_total": ("counter", "Slack messages given up on after retries or a permanent error.", None),
+    "sentinel_screen_verdicts_total": ("counter", "Screening-model scores, with the main model's verdict where it was asked.", None),
+    "sentinel_fetch_to_hit_seconds": ("histogram", "Time from fetching a chunk's items to delivering its HIT.", SECONDS_BUCKETS),
+    "sentinel_embed_request_seconds": ("histogram", "Time for one batched /v1/embeddings request.", SECONDS_BUCKETS),
+    "sentinel_embeddings_total": ("counter", "Texts needing a vector, by source (cache or computed).", None),
+    "sentinel_overflow_depth": ("gauge", "Items waiting in the carry-over queue for a later cycle.", None),
+    "sentinel_time_to_first_alert_seconds": ("gauge", "Seconds from start to the first HIT alert of this run.", None),
+    "sentinel_shard_workers_alive": ("gauge", "Shard workers with a recent heartbeat in the shared store.", None),
+}
+
+
+class Metrics:
+    """
+    Thread-safe counters, gauges and cumulative histograms keyed by name and labels.
+    render() produces Prometheus text format; snapshot() a JSON-ready dict.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}  # (name, labels) -> last value set
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        buckets = METRIC_HELP[name][2]
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[i] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    @staticmethod
+    def _key(name, labels):
+        # Label values are kept as text, so status=200 and status="error" sort together
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items()) + sorted(self._gauges.items())
+            histograms = sorted((key, list(hist)) for key, hist in self._histograms.items())
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text, _ = METRIC_HELP[name]
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), hist in histograms:
+            describe(name)
+            for bound, count in zip(METRIC_HELP[name][2], hist):
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {hist[-1]}")
+            lines.append(f"{name}_sum{self._labels(labels)} {hist[-2]}")
+            lines.append(f"{name}_count{self._labels(labels)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in self._counters.items()]
+            gauges = [{"name": name, "labels": dict(labels), "value": value}
+                      for (name, labels), value in self._gauges.items()]
+            histograms = [{"name": name, "labels": dict(labels), "buckets": dict(zip(map(str, METRIC_HELP[name][2]), hist)),
+                           "sum": hist[-2], "count": hist[-1]}
+                          for (name, labels), hist in self._histograms.items()]
+        return {"generated_at": time.time(), "counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+def start_metrics_server(metrics, port):
+    """Serve metrics.render() at http://127.0.0.1:<port>/metrics on a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes would otherwise flood stderr
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# -------- Token accounting --------
+class TokenLedger:
+    """
+    Prompt/completion tokens as reported by the LLM server, totalled per day
+    and, within each day, per request kind, profile and feed group. Also keeps
+    running averages of characters per prompt token and completion size, so
+    budgets and truncation work from measured numbers rather than a guess.
+    """
+
+    SMOOTHING = 0.2  # weight of the newest sample in the running averages
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.days = {}
+        self.chars_per_token = DEFAULT_CHARS_PER_TOKEN
+        self.avg_completion = 0.0
+        self.samples = 0
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.days = data.get("days", {})
+            self.chars_per_token = float(data.get("chars_per_token") or DEFAULT_CHARS_PER_TOKEN)
+            self.avg_completion = float(data.get("avg_completion") or 0.0)
+            self.samples = int(data.get("samples") or 0)
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        with self._lock:
+            for day in sorted(self.days)[:-TOKEN_USAGE_DAYS]:
+                del self.days[day]
+            data = {"chars_per_token": self.chars_per_token, "avg_completion": self.avg_completion,
+                    "samples": self.samples, "days": json.loads(json.dumps(self.days))}
+        write_json_atomic(self.path, data)
+
+    def estimate(self, prompt_chars):
+        """Expected prompt + completion tokens for a prompt of prompt_chars characters."""
+        return int(prompt_chars / self.chars_per_token + self.avg_completion)
+
+    def chars_for(self, tokens):
+        return int(tokens * self.chars_per_token)
+
+    def today(self):
+        with self._lock:
+            return dict(self.days.get(datetime.now().strftime("%Y-%m-%d"), {}).get("total", {}))
+
+    def record(self, prompt_chars, usage, kind, group, profiles):
+        """Book one request; returns (prompt, completion, measured) tokens."""
+        prompt = int(usage.get("prompt_tokens") or 0)
+        completion = int(usage.get("completion_tokens") or 0)
+        measured = prompt > 0
+        if not measured:
+            prompt = int(prompt_chars / self.chars_per_token)
+        with self._lock:
+            if measured:
+                a = 1.0 if self.samples == 0 else self.SMOOTHING
+                self.samples += 1
+                self.chars_per_token = (1 - a) * self.chars_per_token + a * (prompt_chars / prompt)
+                self.avg_completion = (1 - a) * self.avg_completion + a * completion
+            day = self.days.setdefault(datetime.now().strftime("%Y-%m-%d"), {})
+            share = 1 / max(1, len(profiles))
+            buckets = [("total", None, 1), ("kind", kind, 1), ("group", group, 1)]
+            buckets += [("profile", name or "(active topics)", share) for name in profiles]
+            for section, name, weight in buckets:
+                slot = day.setdefault(section, {})
+                if name is not None:
+                    slot = slot.setdefault(name, {})
+                slot["prompt_tokens"] = slot.get("prompt_tokens", 0) + prompt * weight
+                slot["completion_tokens"] = slot.get("completion_tokens", 0) + completion * weight
+                slot["requests"] = slot.get("requests", 0) + weight
+                if not measured:
+                    slot["estimated_requests"] = slot.get("estimated_requests", 0) + weight
+        return prompt, completion, measured
+
+
+# -------- Slack delivery queue --------
+class SlackQueue:
+    """
+    Posts Slack messages from its own thread so the pipeline never waits on
+    Slack. Messages for the same webhook that arrive within the coalescing
+    window go out as one post; each webhook gets at most one post per
+    SLACK_MIN_INTERVAL, and 429s are retried after the server's Retry-After.
+    """
+
+    def __init__(self, post, log, metrics, window):
+        self.post = post  # (webhook_url, text) -> requests.Response
+        self.log = log
+        self.metrics = metrics
+        self.window = window  # callable returning the coalescing window in seconds
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # webhook -> {"texts": [...], "due": t, "attempts": n}
+        self._next_allowed = {}  # webhook -> earliest monotonic time for the next post
+        self._flushing = False
+        self._sending = False
+        self._thread = threading.Thread(target=self._loop, name="slack-queue", daemon=True)
+        self._thread.start()
+
+    def put(self, webhook_url, text):
+        with self._cond:
+            batch = self._pending.get(webhook_url)
+            if batch is None:
+                due = max(time.monotonic() + self.window(), self._next_allowed.get(webhook_url, 0.0))
+                self._pending[webhook_url] = {"texts": [text], "due": due, "attempts": 0}
+            else:
+                batch["texts"].append(text)
+                self.metrics.inc("sentinel_slack_merged_total")
+            self._cond.notify_all()
+
+    def depth(self):
+        with self._cond:
+            return sum(len(b["texts"]) for b in self._pending.values()) + int(self._sending)
+
+    def close(self, timeout=5.0):
+        """
+        Send whatever is queued right away (still honouring Retry-After), up
+        to timeout seconds. Returns how many messages are still unsent.
+        """
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return self.depth()
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                if not self._pending and self._flushing:
+                    return None, None
+                now = time.monotonic()
+                ready = [(b["due"] if not self._flushing else self._next_allowed.get(url, 0.0), url)
+                         for url, b in self._pending.items()]
+                if ready:
+                    due, url = min(ready)
+                    if due <= now:
+                        self._sending = True
+                        return url, self._pending.pop(url)
+                    self._cond.wait(due - now)
+                else:
+                    self._cond.wait()
+
+    def _loop(self):
+        while True:
+            url, batch = self._next_batch()
+            if url is None:
+                return
+            try:
+                self._deliver(url, batch)
+            finally:
+                with self._cond:
+                    self._sending = False
+
+    def _deliver(self, url, batch):
+        parts = self._split("\n\n".join(batch["texts"]))
+        for n, text in enumerate(parts):
+            status, retry_after = self._post(url, text)
+            self._next_allowed[url] = time.monotonic() + max(SLACK_MIN_INTERVAL, retry_after or 0.0)
+            if status == 200:
+                continue
+            batch["attempts"] += 1
+            retryable = status == 429 or status == "error" or (isinstance(status, int) and status >= 500)
+            if not retryable or batch["attempts"] >= SLACK_MAX_ATTEMPTS:
+                self.log(f"Slack: giving up on {len(parts) - n} message(s) after HTTP {status}.")
+                self.metrics.inc("sentinel_slack_dropped_total", len(parts) - n)
+                return
+            self.metrics.inc("sentinel_slack_retries_total", status=status)
+            delay = retry_after if retry_after is not None else min(60.0, 2.0 ** batch["attempts"])
+            self.log(f"Slack: HTTP {status}, retrying in {delay:.0f}s ({batch['attempts']}/{SLACK_MAX_ATTEMPTS}).")
+            with self._cond:
+                # Put the unsent remainder back in front of anything queued since
+                later = self._pending.pop(url, None)
+                texts = parts[n:] + (later["texts"] if later else [])
+                self._pending[url] = {"texts": texts, "due": time.monotonic() + delay, "attempts": batch["attempts"]}
+                self._next_allowed[url] = time.monotonic() + delay
+            return
+
+    def _post(self, url, text):
+        try:
+            resp = self.post(url, text)
+        except Exception as e:
+            self.log(f"Slack exception: {e}")
+            return "error", None
+        if resp.status_code == 200:
+            return 200, None
+        retry_after = None
+        try:
+            retry_after = float(resp.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            pass
+        self.log(f"Slack error: {resp.status_code}, {resp.text}")
+        return resp.status_code, retry_after
+
+    @staticmethod
+    def _split(text):
+        if len(text) <= SLACK_MAX_CHARS:
+            return [text]
+        parts = []
+        while text:
+            cut = text.rfind("\n", 0, SLACK_MAX_CHARS) if len(text) > SLACK_MAX_CHARS else len(text)
+            if cut <= 0:
+                cut = SLACK_MAX_CHARS
+            parts.append(text[:cut])
+            text = text[cut:].lstrip("\n")
+        return parts
+
+
+# -------- Embedding vector cache --------
+class EmbeddingStore:
+    """
+    Unit-length embedding vectors keyed by content hash, in one growing
+    float32 matrix (NumPy when installed, a flat array('f') otherwise).
+    Capped at `capacity` rows; the least recently used row is reused.
+    `lock` is reentrant: hold it to keep rows valid across several calls.
+    """
+
+    def __init__(self, capacity=EMBEDDING_CACHE_ITEMS):
+        self.lock = threading.RLock()
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self, model="", dim=0):
+        self.model = model
+        self.dim = dim
+        self.rows = OrderedDict()  # key -> row, least recently used first
+        self.size = 0  # rows allocated
+        self.vectors = np.zeros((0, dim), dtype=np.float32) if np is not None else array("f")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, keys):
+        """Rows for the keys already cached, marking them recently used."""
+        found = {}
+        with self.lock:
+            for key in keys:
+                row = self.rows.get(key)
+                if row is not None:
+                    self.rows.move_to_end(key)
+                    found[key] = row
+        return found
+
+    def add(self, key, vector):
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        with self.lock:
+            if len(vector) != self.dim:
+                self.reset(self.model, len(vector))  # model changed size: start over
+            row = self.rows.pop(key, None)
+            if row is None:
+                if len(self.rows) < self.capacity:
+                    row = len(self.rows)
+                    self._grow(row + 1)
+                else:
+                    _, row = self.rows.popitem(last=False)
+            self.rows[key] = row
+            unit = [x / norm for x in vector]
+            if np is not None:
+                self.vectors[row] = unit
+            else:
+                self.vectors[row * self.dim:(row + 1) * self.dim] = array("f", unit)
+            return row
+
+    def _grow(self, rows):
+        if rows <= self.size:
+            return
+        new_size = min(self.capacity, max(rows, self.size * 2, 256))
+        if np is not None:
+            grown = np.zeros((new_size, self.dim), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        else:
+            self.vectors.extend(array("f", bytes(4 * (new_size - self.size) * self.dim)))
+        self.size = new_size
+
+    def similarities(self, item_rows, topic_rows):
+        """Cosine similarity of every item row to every topic row, one list per item."""
+        with self.lock:
+            if np is not None:
+                return (self.vectors[item_rows] @ self.vectors[topic_rows].T).tolist()
+            dim, vectors = self.dim, self.vectors
+            topics = [vectors[r * dim:(r + 1) * dim] for r in topic_rows]
+            return [[sum(a * b for a, b in zip(vectors[r * dim:(r + 1) * dim], topic)) for topic in topics]
+                    for r in item_rows]
+
+    def save(self, path):
+        with self.lock:
+            order = sorted(self.rows.items(), key=lambda kv: kv[1])
+            if np is not None:
+                raw = self.vectors[:len(order)].tobytes()
+            else:
+                raw = self.vectors[:len(order) * self.dim].tobytes()
+            lru = list(self.rows)
+            meta = {"model": self.model, "dim": self.dim, "keys": [key for key, _ in order], "lru": lru}
+        tmp = f"{path}.f32.tmp"
+        with open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, f"{path}.f32")
+        write_json_atomic(path, meta)
+
+    def load(self, path, model):
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model") != model:
+            return 0
+        with open(f"{path}.f32", "rb") as f:
+            raw = f.read()
+        dim, keys = meta["dim"], meta["keys"][:self.capacity]
+        if not dim or len(raw) < 4 * dim * len(keys):
+            return 0
+        with self.lock:
+            self.reset(model, dim)
+            self._grow(len(keys))
+            if np is not None:
+                self.vectors[:len(keys)] = np.frombuffer(raw, dtype=np.float32, count=len(keys) * dim).reshape(-1, dim)
+            else:
+                self.vectors[:len(keys) * dim] = array("f", raw[:4 * len(keys) * dim])
+            rows = {key: n for n, key in enumerate(keys)}
+            for key in meta.get("lru", keys):
+                if key in rows:
+                    self.rows[key] = rows[key]
+        return len(self.rows)
+
+
+def embedding_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def embedding_text(item):
+    summary = re.sub(r"<[^>]+>", " ", item.summary)
+    return f"{item.title}. {summary}"[:EMBEDDING_TEXT_CHARS]
+
+
+# -------- Two-tier screening cascade --------
+def is_hit(reply):
+    return "*** HIT" in reply.upper()
+
+
+def parse_screen_score(reply):
+    """First digit of the screening reply, or None if there isn't one."""
+    match = re.search(r"\d", reply or "")
+    return int(match.group()) if match else None
+
+
+class ScreenStats:
+    """
+    Screening verdicts checked against the main model. Every positive is
+    checked, so precision is exact; negatives are checked at the sample rate
+    and scaled up, so recall is an estimate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.true_pos = 0
+        self.false_pos = 0
+        self.negatives = 0
+        self.sampled_neg = 0
+        self.missed = 0  # sampled negatives the main model called a HIT
+
+    def record(self, positive, hit=None):
+        """
+        positive: the screen's verdict; hit: the main model's, None if it
+        wasn't asked. Returns True when a summary is due.
+        """
+        with self._lock:
+            if positive:
+                self.true_pos += bool(hit)
+                self.false_pos += not hit
+            else:
+                self.negatives += 1
+                if hit is None:
+                    return False
+                self.sampled_neg += 1
+                self.missed += bool(hit)
+            return (self.true_pos + self.false_pos + self.sampled_neg) % SCREEN_SUMMARY_EVERY == 0
+
+    def summary(self):
+        with self._lock:
+            checked_pos = self.true_pos + self.false_pos
+            precision = self.true_pos / checked_pos if checked_pos else None
+            missed_est = self.missed * self.negatives / self.sampled_neg if self.sampled_neg else 0.0
+            found = self.true_pos + missed_est
+            recall = self.true_pos / found if found else None
+            fmt = lambda v: "n/a" if v is None else f"{v:.2f}"
+            return (f"precision {fmt(precision)} ({self.true_pos}/{checked_pos} positives were hits), "
+                    f"recall ~{fmt(recall)} ({self.missed}/{self.sampled_neg} sampled negatives were hits, "
+                    f"{self.negatives} negatives in total)")
+
+
+# -------- Carry-over queue for items that did not fit a cycle --------
+class OverflowQueue:
+    """
+    Per feed group, the items that were cut by MAX_TOKENS or the token budget,
+    kept oldest first for the group's next cycles. Items older than the
+    configured age, or beyond OVERFLOW_MAX_ITEMS, are dropped and counted.
+    """
+
+    def __init__(self, metrics):
+        self._lock = threading.Lock()
+        self.metrics = metrics
+        self.groups = {}  # group name -> [FeedItem], oldest fetch first
+
+    def depth(self, group=None):
+        with self._lock:
+            if group is not None:
+                return len(self.groups.get(group, ()))
+            return sum(len(items) for items in self.groups.values())
+
+    def put(self, group, items):
+        with self._lock:
+            queue = self.groups.setdefault(group, [])
+            queue.extend(items)
+            queue.sort(key=lambda item: item.fetched_at)
+            full = len(queue) - OVERFLOW_MAX_ITEMS
+            if full > 0:
+                del queue[:full]
+                self.metrics.inc("sentinel_items_total", full, stage="overflow_full")
+            self.metrics.set("sentinel_overflow_depth", len(queue), group=group)
+        return max(full, 0)
+
+    def take(self, group, max_age):
+        """Remove and return the group's items still younger than max_age seconds, oldest first."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            queue = self.groups.pop(group, [])
+            self.metrics.set("sentinel_overflow_depth", 0, group=group)
+        fresh = [item for item in queue if item.fetched_at >= cutoff]
+        expired = len(queue) - len(fresh)
+        if expired:
+            self.metrics.inc("sentinel_items_total", expired, stage="overflow_expired")
+        return fresh, expired
+
+    def to_json(self):
+        with self._lock:
+            return {group: [item.to_json() for item in items] for group, items in self.groups.items() if items}
+
+    def load_json(self, data):
+        with self._lock:
+            self.groups = {group: [FeedItem.from_json(raw) for raw in items] for group, items in data.items()}
+            for group, items in self.groups.items():
+                self.metrics.set("sentinel_overflow_depth", len(items), group=group)
+
+
+# -------- Incremental story clustering --------
+def story_terms(text):
+    """Lower-case word and number terms of text, minus markup and stop words."""
+    text = re.sub(r"<[^>]+>", " ", text.lower())
+    return {t for t in re.findall(r"[a-z0-9]+(?:\.[0-9]+)?", text) if (len(t) > 2 or t.isdigit()) and t not in STOP_WORDS}
+
+
+class StoryCluster:
+    def __init__(self, cluster_id, now):
+        self.id = cluster_id
+        self.terms = {}  # term -> number of items it appeared in
+        self.first_seen = now
+        self.last_seen = now
+        self.items = 0
+        self.forwarded = 0
+        self.titles = deque(maxlen=STORY_TITLES)
+
+    def to_json(self):
+        return {"id": self.id, "terms": self.terms, "first_seen": self.first_seen, "last_seen": self.last_seen,
+                "items": self.items, "forwarded": self.forwarded, "titles": list(self.titles)}
+
+    @classmethod
+    def from_json(cls, data):
+        cluster = cls(data["id"], data["first_seen"])
+        cluster.terms = dict(data.get("terms", {}))
+        cluster.last_seen = data.get("last_seen", cluster.first_seen)
+        cluster.items = data.get("items", 0)
+        cluster.forwarded = data.get("forwarded", 0)
+        cluster.titles.extend(data.get("titles", []))
+        return cluster
+
+
+class StoryClusters:
+    """
+    Groups items into running stories over a sliding window by shared title
+    terms, and decides whether each new item adds anything: items whose terms
+    the story has mostly seen are held back, unless they bring an escalation
+    term the story hasn't had yet. Forwarded follow-ups carry a short digest
+    of the story so far. An inverted term index keeps matching cheap.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clusters = {}
+        self._index = {}  # term -> ids of clusters that know it
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def filter(self, items, window, novelty, now=None):
+        """Return (forwarded items, number held back); forwarded follow-ups get a digest prepended."""
+        now = time.time() if now is None else now
+        forwarded, held = [], 0
+        with self._lock:
+            self._expire(now - window)
+            for item in items:
+                title_terms = story_terms(item.title)
+                terms = title_terms | story_terms(item.summary)
+                cluster = self._match(title_terms)
+                if cluster is None:
+                    cluster = self._new_cluster(now)
+                    send, digest = True, None
+                else:
+                    unseen = terms - cluster.terms.keys()
+                    share_new = len(unseen) / len(terms) if terms else 0.0
+                    send = share_new >= novelty or bool(unseen & ESCALATION_TERMS)
+                    digest = self._digest(cluster) if send else None
+                self._absorb(cluster, terms, now)
+                if not send:
+                    held += 1
+                    continue
+                cluster.forwarded += 1
+                cluster.titles.append(item.title)
+                item.note = digest
+                forwarded.append(item)
+        return forwarded, held
+
+    def _match(self, title_terms):
+        if not title_terms:
+            return None
+        hits = {}
+        for term in title_terms:
+            for cluster_id in self._index.get(term, ()):
+                hits[cluster_id] = hits.get(cluster_id, 0) + 1
+        best = max(hits.items(), key=lambda kv: kv[1], default=None)
+        if best is None or best[1] < 2 or best[1] / len(title_terms) < STORY_MATCH:
+            return None
+        return self.clusters[best[0]]
+
+    def _new_cluster(self, now):
+        cluster = StoryCluster(self._next_id, now)
+        self._next_id += 1
+        self.clusters[cluster.id] = cluster
+        return cluster
+
+    def _absorb(self, cluster, terms, now):
+        for term in terms:
+            cluster.terms[term] = cluster.terms.get(term, 0) + 1
+            self._index.setdefault(term, set()).add(cluster.id)
+        cluster.items += 1
+        cluster.last_seen = now
+        if len(cluster.terms) > STORY_TERMS:
+            keep = sorted(cluster.terms, key=cluster.terms.get, reverse=True)[:STORY_TERMS]
+            for term in cluster.terms.keys() - set(keep):
+                self._unindex(term, cluster.id)
+            cluster.terms = {term: cluster.terms[term] for term in keep}
+
+    def _unindex(self, term, cluster_id):
+        ids = self._index.get(term)
+        if ids is not None:
+            ids.discard(cluster_id)
+            if not ids:
+                del self._index[term]
+
+    def _expire(self, cutoff):
+        for cluster in [c for c in self.clusters.values() if c.last_seen < cutoff]:
+            for term in cluster.terms:
+                self._unindex(term, cluster.id)
+            del self.clusters[cluster.id]
+
+    @staticmethod
+    def _digest(cluster):
+        since = datetime.fromtimestamp(cluster.first_seen).strftime("%Y-%m-%d %H:%M")
+        key_terms = ", ".join(sorted(cluster.terms, key=cluster.terms.get, reverse=True)[:6])
+        earlier = "; ".join(f'"{t}"' for t in cluster.titles)
+        return (f"[Ongoing story since {since}, {cluster.items} earlier item(s), key terms: {key_terms}. "
+                f"Already reported: {earlier or 'none'}. Only report what is new.]")
+
+    def to_json(self):
+        with self._lock:
+            return {"next_id": self._next_id, "clusters": [c.to_json() for c in self.clusters.values()]}
+
+    def load_json(self, data, window):
+        with self._lock:
+            self.clusters, self._index = {}, {}
+            self._next_id = data.get("next_id", 1)
+            cutoff = time.time() - window
+            for raw in data.get("clusters", []):
+                cluster = StoryCluster.from_json(raw)
+                if cluster.last_seen < cutoff:
+                    continue
+                self.clusters[cluster.id] = cluster
+                for term in cluster.terms:
+                    self._index.setdefault(term, set()).add(cluster.id)
+
+
+# -------- Cycle tracing (Chrome trace / Perfetto) --------
+NO_SPAN = nullcontext()  # shared do-nothing span returned while tracing is off
+
+
+class CycleTrace:
+    """
+    Complete ("X") events for one cycle in Chrome trace format, openable in
+    Perfetto or chrome://tracing. list.append is atomic, so worker threads
+    record spans without a lock.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.events = []
+        self._threads = {}
+
+    @contextmanager
+    def span(self, name, cat, args):
+        thread = threading.current_thread()
+        self._threads.setdefault(thread.ident, thread.name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            event = {"name": name, "cat": cat, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6,
+                     "pid": os.getpid(), "tid": thread.ident}
+            if args:
+                event["args"] = args
+            self.events.append(event)
+
+    def to_json(self):
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                for tid, name in list(self._threads.items())]
+        return {"traceEvents": meta + self.events, "displayTimeUnit": "ms",
+                "otherData": {"cycle": self.name, "started_at": self.started_at}}
+
+
+# -------- Log sink: lock-free queue drained in batches --------
+class LogSink:
+    """
+    Collects log lines from any thread. deque.append is atomic, so workers
+    never take a lock or touch Qt; the owner calls drain() on a fixed timer,
+    which writes the batch to a rotating log file and returns it for display.
+    """
+
+    def __init__(self, path=None):
+        path = path or LOG_FILE
+        self.echo = True  # also print drained lines to stdout
+        self._queue = deque()
+        self._logger = logging.getLogger("shunyanet.sentinel")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._handler = None
+        try:
+            self._handler = RotatingFileHandler(
+                path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"
+            )
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(self._handler)
+        except Exception as e:
+            print(f"Log file error: {e}")
+
+    def put(self, msg):
+        self._queue.append((time.time(), msg))
+
+    def drain(self):
+        batch = []
+        pop = self._queue.popleft
+        try:
+            while True:
+                batch.append(pop())
+        except IndexError:
+            pass
+        if not batch:
+            return []
+        lines = [msg for _, msg in batch]
+        if self.echo:
+            print("\n".join(lines))
+        if self._handler is not None:
+            for ts, msg in batch:
+                stamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+                self._logger.info(f"{stamp} {msg}")
+        return lines
+
+    def close(self):
+        self.drain()
+        if self._handler is not None:
+            self._logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+
+# -------- Report history store --------
+class ReportHistoryStore:
+    """
+    Append-only JSON-lines file of reports. Only byte offsets and a rough
+    size estimate are kept per report; report text is read back a page at
+    a time and held in a small LRU, so memory stays flat as history grows.
+    Headless cycles append from several threads, so the file, index and
+    page cache change under one lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.offsets = array("q")
+        self.chars = array("l")
+        self.newlines = array("l")
+        self._pages = OrderedDict()
+        self._build_index()
+
+    def _build_index(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                offset = 0
+                for raw in f:
+                    if raw.strip():
+                        self._index_line(offset, raw)
+                    offset += len(raw)
+        except Exception as e:
+            print(f"History index error: {e}")
+
+    def _index_line(self, offset, raw):
+        # Estimate size straight from the encoded line, no JSON parse needed
+        self.offsets.append(offset)
+        self.chars.append(len(raw))
+        self.newlines.append(raw.count(b"\\n"))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def append(self, timestamp, text):
+        raw = (json.dumps({"ts": timestamp, "text": text}, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(raw)
+            self._index_line(offset, raw)
+            # The last page may have been cached before this row existed
+            self._pages.pop((len(self.offsets) - 1) // HISTORY_PAGE_SIZE, None)
+
+    def get(self, row):
+        page_no = row // HISTORY_PAGE_SIZE
+        with self._lock:
+            page = self._pages.get(page_no)
+            if page is None:
+                page = self._load_page(page_no)
+                self._pages[page_no] = page
+                while len(self._pages) > HISTORY_CACHED_PAGES:
+                    self._pages.popitem(last=False)
+            else:
+                self._pages.move_to_end(page_no)
+        return page[row - page_no * HISTORY_PAGE_SIZE]
+
+    def _load_page(self, page_no):
+        start = page_no * HISTORY_PAGE_SIZE
+        end = min(start + HISTORY_PAGE_SIZE, len(self.offsets))
+        page = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offsets[start])
+                for _ in range(start, end):
+                    try:
+                        record = json.loads(f.readline())
+                        page.append((record.get("ts", ""), record.get("text", "")))
+                    except ValueError:
+                        page.append(("", "(Unreadable report)"))
+        except Exception as e:
+            print(f"History page error: {e}")
+        while len(page) < end - start:
+            page.append(("", "(Unreadable report)"))
+        return page
+
+
+# -------- Feed groups --------
+def read_feed_list(file_path):
+    """Read feed URLs from a .txt (one per line) or .json (list) file; '#' lines are skipped."""
+    if file_path.endswith(".txt"):
+        with open(file_path, "r") as f:
+            return [line.strip() for line in f.readlines() if line.strip() and not line.startswith("#")]
+    if file_path.endswith(".json"):
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError("JSON must contain a list of URLs.")
+        return [url.strip() for url in data if url.strip() and not url.strip().startswith("#")]
+    raise ValueError(f"Unsupported data source file: {file_path}")
+
+
+class FeedGroup:
+    """
+    A named set of feeds polled on its own interval by its own single-flight
+    scheduler, fetched by its own small thread pool (its concurrency budget),
+    with its chunks queued for the LLM at its own priority.
+    """
+
+    def __init__(self, name, run_cycle, log, metrics=None):
+        self.name = name
+        self.source_file = ""
+        self.feeds = []
+        self.interval = None  # seconds; None follows FETCH_INTERVAL
+        self.priority = DEFAULT_GROUP_PRIORITY
+        self.concurrency = 1
+        self.next_due = 0.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"fetch-{name}")
+        self.scheduler = CycleScheduler(f"fetch:{name}", lambda: run_cycle(self), log, metrics)
+
+    def configure(self, interval, priority, concurrency):
+        self.interval = interval
+        self.priority = priority
+        concurrency = max(1, concurrency)
+        if concurrency != self.concurrency:
+            old = self.executor
+            self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"fetch-{self.name}")
+            self.concurrency = concurrency
+            old.shutdown(wait=False)
+
+    def stop(self, timeout):
+        self.scheduler.stop(timeout=timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# -------- Feed items and chunk packing --------
+class FeedItem:
+    """
+    One new feed entry. Keeps references to the parsed strings instead of a
+    rendered copy; text is only built when a chunk is packed or written out.
+    """
+    __slots__ = ("title", "published", "summary", "link", "published_ts", "fetched_at", "note")
+
+    def __init__(self, title, published, summary, link, published_ts, fetched_at):
+        self.title = title
+        self.published = published
+        self.summary = summary
+        self.link = link
+        self.published_ts = published_ts
+        self.fetched_at = fetched_at
+        self.note = None  # optional line prepended when sent, e.g. a story digest
+
+    def parts(self):
+        head = (self.note, "\n") if self.note else ()
+        return (*head, "Title: ", self.title, "\nPublished: ", self.published,
+                "\nSummary: ", self.summary, "\nLink: ", self.link)
+
+    def __len__(self):
+        return sum(map(len, self.parts()))
+
+    def render(self):
+        return "".join(self.parts())
+
+    def to_json(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_json(cls, data):
+        item = cls(*data[:6])
+        item.note = data[6]
+        return item
+
+
+def chunk_items(items, chunk_size):
+    """Greedily group whole items into runs of at most chunk_size rendered characters, from sizes alone."""
+    members, size = [], 0
+    for item in items:
+        length = min(len(item), chunk_size) + 2
+        if members and size + length > chunk_size:
+            yield members
+            members, size = [], 0
+        members.append(item)
+        size += length
+    if members:
+        yield members
+
+
+def render_chunk(members, chunk_size):
+    return "\n\n".join(item.render()[:chunk_size] for item in members)
+
+
+def stem(term):
+    """Crude suffix strip so "bombing", "bombs" and "bomb" meet."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+
+def relevance_terms(text):
+    return {stem(term) for term in story_terms(text)}
+
+
+ESCALATION_STEMS = frozenset(stem(term) for term in ESCALATION_TERMS)
+
+
+# -------- Profile routes for multi-profile fan-out --------
+class ProfileRoute:
+    """
+    One topic profile evaluated against a cycle's items: its topics, prompt,
+    chunking and where its alerts go. Built fresh at the start of each cycle.
+    """
+
+    def __init__(self, name, topics, base_prompt, chunk_size, use_chunked, slack_webhook_url):
+        self.name = name
+        self.topics_str = ", ".join(topics) if topics else "No topics defined"
+        self.base_prompt = base_prompt
+        self.chunk_size = chunk_size
+        self.use_chunked = use_chunked
+        self.slack_webhook_url = slack_webhook_url
+
+    def chunk_chars(self, cap):
+        """Characters per chunk: CHUNK_SIZE, or the whole (capped) cycle when chunking is off."""
+        return min(self.chunk_size, cap) if self.use_chunked else cap
+
+
+# -------- Shard workers --------
+def shard_dir(setting):
+    return setting or os.path.join(APP_DIR, "shared")
+
+
+def use_worker_files(folder):
+    """Point a shard worker's own log, metrics and state files at folder, so processes never share them."""
+    global PIPELINE_STATE_FILE, METRICS_FILE, LOG_FILE, TOKEN_USAGE_FILE, TRACE_DIR, EMBEDDING_CACHE_FILE, CYCLE_ARCHIVE_FILE
+    os.makedirs(folder, exist_ok=True)
+    PIPELINE_STATE_FILE = os.path.join(folder, "pipeline_state.json")
+    METRICS_FILE = os.path.join(folder, "metrics.json")
+    LOG_FILE = os.path.join(folder, "sentinel.log")
+    TOKEN_USAGE_FILE = os.path.join(folder, "token_usage.json")
+    TRACE_DIR = os.path.join(folder, "traces")
+    EMBEDDING_CACHE_FILE = os.path.join(folder, "embedding_cache.json")
+    CYCLE_ARCHIVE_FILE = os.path.join(folder, "cycle_archive.jsonl")
+
+
+def ring_hash(key):
+    return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of feed URLs onto worker names. Each worker holds
+    SHARD_VNODES points on the ring, so feeds spread evenly and changing the
+    worker count only moves about 1/N of them.
+    """
+
+    def __init__(self, nodes, vnodes=SHARD_VNODES):
+        self.nodes = list(nodes)
+        points = sorted((ring_hash(f"{node}#{v}"), node) for node in self.nodes for v in range(vnodes))
+        self._keys = [key for key, _ in points]
+        self._owners = [node for _, node in points]
+        self._cache = {}
+
+    def owner(self, key):
+        node = self._cache.get(key)
+        if node is None:
+            idx = bisect.bisect(self._keys, ring_hash(key)) % len(self._keys)
+            node = self._cache[key] = self._owners[idx]
+        return node
+
+
+class SharedStore:
+    """
+    SQLite file shared by the shard workers and their coordinator, on local
+    disk or a filesystem the hosts share. Workers claim guids there (dedupe
+    across all shards) and queue new items; the coordinator takes them per
+    group. Writes run in BEGIN IMMEDIATE transactions, so SQLite's file lock
+    serialises them across processes; the thread lock does the same for the
+    threads of one process, which share its connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=SHARD_DB_TIMEOUT, isolation_level=None, check_same_thread=False)
+        with self._write() as cur:
+            cur.execute("CREATE TABLE IF NOT EXISTS seen (guid TEXT PRIMARY KEY, ts REAL)")
+            cur.execute("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "grp TEXT, urgent INTEGER, queued_at REAL, data TEXT)")
+            cur.execute("CREATE INDEX IF NOT EXISTS items_grp ON items (grp, urgent)")
+            cur.execute("CREATE TABLE IF NOT EXISTS workers (name TEXT PRIMARY KEY, host TEXT, pid INTEGER, "
+                        "feeds INTEGER, heartbeat REAL)")
+
+    @contextmanager
+    def _write(self):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            cur.execute("COMMIT")
+
+    def claim(self, guids, stamp):
+        """Mark guids seen and return the ones no shard had seen before."""
+        new = set()
+        with self._write() as cur:
+            for guid in dict.fromkeys(guids):
+                cur.execute("INSERT OR IGNORE INTO seen (guid, ts) VALUES (?, ?)", (str(guid), stamp))
+                if cur.rowcount:
+                    new.add(guid)
+        return new
+
+    def expire_seen(self, cutoff):
+        with self._write() as cur:
+            cur.execute("DELETE FROM seen WHERE ts < ?", (cutoff,))
+
+    def push(self, group, items, urgent=False):
+        if not items:
+            return
+        now = time.time()
+        rows = [(group, int(urgent), now, json.dumps(item.to_json())) for item in items]
+        with self._write() as cur:
+            cur.executemany("INSERT INTO items (grp, urgent, queued_at, data) VALUES (?, ?, ?, ?)", rows)
+
+    def take(self, group, urgent=False):
+        """Remove and return the group's queued items, in the order they arrived."""
+        with self._write() as cur:
+            rows = cur.execute("SELECT id, data FROM items WHERE grp = ? AND urgent = ? ORDER BY id",
+                               (group, int(urgent))).fetchall()
+            if rows:
+                cur.execute("DELETE FROM items WHERE grp = ? AND urgent = ? AND id <= ?",
+                            (group, int(urgent), rows[-1][0]))
+        return [FeedItem.from_json(json.loads(data)) for _, data in rows]
+
+    def pending(self):
+        """(group, urgent) -> (items queued, when the oldest was queued)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT grp, urgent, COUNT(*), MIN(queued_at) FROM items GROUP BY grp, urgent").fetchall()
+        return {(grp, bool(urgent)): (count, oldest) for grp, urgent, count, oldest in rows}
+
+    def heartbeat(self, name, feeds):
+        with self._write() as cur:
+            cur.execute("INSERT OR REPLACE INTO workers (name, host, pid, feeds, heartbeat) VALUES (?, ?, ?, ?, ?)",
+                        (name, socket.gethostname(), os.getpid(), feeds, time.time()))
+
+    def workers(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT name, host, pid, feeds, heartbeat FROM workers ORDER BY name").fetchall()
+        return [dict(zip(("name", "host", "pid", "feeds", "heartbeat"), row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# -------- Pipeline engine --------
+class SentinelEngine:
+    """
+    Everything the Sentinel does between "fetch feeds" and "alert": settings,
+    topics, profiles, feeds, dedupe, chunked LLM analysis, bulk reports and
+    Slack. Frontends hook on_reply/on_report to display results; by default
+    replies are logged and reports go straight to the report history file.
+    """
+
+    def __init__(self):
+        self.seen_guids = {}  # guid -> first seen (epoch seconds)
+        self.feed_cursors = {}  # url -> {"etag": ..., "modified": ...} for conditional GETs
+        self.started_at = time.time()
+        self.time_to_first_alert = None
+        self.restart_history = []
+        self.profile_routes = {}  # profile name -> overrides: prompt_file, chunk_size, use_chunked_mode, slack_webhook_url
+        self._route_prompts = {}  # prompt file -> (mtime, text)
+        self.sent_prompt_hashes = OrderedDict()
+        self.urgent_gate = PriorityGate()  # only used when URGENT_LMSTUDIO_URL points at a separate server
+        self.screen_gate = PriorityGate()  # the screening model's server
+        self.screen_stats = ScreenStats()
+        self._screen_random = random.Random()
+        self.fast_lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fast-lane")
+        self.fast_lane_latencies = deque(maxlen=FAST_LANE_LATENCIES)
+        self._fast_lane_pending = 0
+        self.profiles = {}
+        self.feeds = FEEDS.copy()
+        self.topics = list(DEFAULT_TOPICS)
+        self.active_profile = ""
+        self.current_data_source_file = ""
+        self._shutting_down = False
+        self.log_sink = LogSink()
+        self.metrics = Metrics()
+        self.metrics_server = None
+        self._cycle_local = threading.local()  # per-thread: running cycle's config snapshot and trace
+        self.tokens = TokenLedger(TOKEN_USAGE_FILE)
+        self.stories = StoryClusters()
+        self.overflow = OverflowQueue(self.metrics)
+        self.embeddings = EmbeddingStore()
+        self._embeddings_loaded = False
+        self.shared = None  # SharedStore when SHARD_WORKERS is set
+        self.shard_name = ""  # "worker-N" in a shard worker process
+        self.shard_ring = None
+        self.shard_procs = {}  # index -> (Popen, started) for the workers this coordinator spawned
+        self._next_shard_poll = 0.0
+        self.slack = SlackQueue(self.post_to_slack, self.log, self.metrics,
+                                lambda: self.config.slack_coalesce_seconds)
+        try:
+            self.tokens.load()
+        except Exception as e:
+            self.log(f"Failed to load token usage: {e}")
+        self.llm_gate = PriorityGate()
+        self.fetch_gate = PriorityGate(capacity=MAX_PARALLEL_FETCHES)
+        self.prompt_lock = threading.Lock()
+        self.state_lock = threading.Lock()
+        self.feed_groups = []  # extra groups from app_state.json: name, source_file, interval, priority, concurrency
+        self.groups = OrderedDict()
+        self.rolling_lock = threading.Lock()
+        self.history = ReportHistoryStore(REPORT_HISTORY_FILE)
+        self.on_reply = self.log
+        self.on_report = self.store_report
+        self.on_verdict = lambda job, hit: None  # called per analysed chunk; the replay tool compares them
+
+        # ================================================================
+        # SETTINGS DICTIONARY WITH DEFAULTS
+        # ================================================================
+        self.settings = {
+            "LMSTUDIO_URL": LMSTUDIO_URL,
+            "SLACK_WEBHOOK_URL": SLACK_WEBHOOK_URL,
+            "MAX_TOKENS": MAX_TOKENS,
+            "MAX_TOKENS_BULK": MAX_TOKENS_BULK,
+            "FETCH_INTERVAL": FETCH_INTERVAL,
+            "ITEMS_PER_FEED": ITEMS_PER_FEED,
+            "USE_CHUNKED_MODE": "1",
+            "CHUNK_SIZE": 4000,
+            "WRITE_TO_FILE": "1",
+            "ANALYSIS_WINDOW": 3600,
+            "BULK_ANALYSIS": "0",
+            "FANOUT_PROFILES": "",
+            "URGENT_SOURCES": "earthquake.usgs.gov/earthquakes/feed, spc.noaa.gov",
+            "URGENT_CHUNK_SIZE": 1500,
+            "URGENT_LMSTUDIO_URL": "",
+            "METRICS_PORT": 0,
+            "TRACE_CYCLES": "0",
+            "TOKEN_BUDGET_PER_CYCLE": 0,
+            "TOKEN_BUDGET_PER_DAY": 0,
+            "SLACK_COALESCE_SECONDS": 5,
+            "STORY_CLUSTERING": "0",
+            "STORY_WINDOW_HOURS": 24,
+            "STORY_NOVELTY": 0.35,
+            "OVERFLOW_MAX_AGE_MINUTES": 180,
+            "SCREEN_LMSTUDIO_URL": "",
+            "SCREEN_MODEL": "",
+            "SCREEN_THRESHOLD": 3,
+            "SCREEN_SAMPLE_RATE": 0.1,
+            "RELEVANCE_ORDER": "1",
+            "EMBEDDING_URL": "",
+            "EMBEDDING_MODEL": "",
+            "EMBEDDING_MIN_SIMILARITY": 0,
+            "SHARD_WORKERS": 0,
+            "SHARED_DIR": "",
+            "SHARD_SPAWN_LOCAL": "1",
+            "ARCHIVE_CYCLES": "0"
+        }
+        self.config, _ = Config.from_settings(self.settings)
+        self._state_mtime = None
+        self._next_settings_check = 0.0
+        self.rolling_file_start_time = time.time()
+
+        # ================================================================
+        # PROMPT HANDLING
+        # ================================================================
+        self.prompt_file = "default_prompt.txt"
+        self.base_prompt = ""
+
+        # Load default prompt if available
+        if os.path.exists(local_path(self.prompt_file)):
+            with open(local_path(self.prompt_file), "r", encoding="utf-8") as f:
+                self.base_prompt = f.read()
+        else:
+            self.base_prompt = "No prompt loaded."
+
+        self.rebuild_feed_groups()
+        self.bulk_scheduler = CycleScheduler("bulk", self.run_bulk_cycle, self.log, self.metrics)
+
+    # ---------- Output ----------
+    def log(self, msg: str):
+        if self._shutting_down:
+            return
+        self.log_sink.put(msg)
+
+    def reply(self, msg: str):
+        if self._shutting_down:
+            return
+        self.on_reply(msg)
+
+    def report(self, text: str):
+        if self._shutting_down:
+            return
+        # Only a HIT is an alert; NO HIT replies don't end the blind spot after a restart
+        if self.time_to_first_alert is None and is_hit(text):
+            self.time_to_first_alert = time.time() - self.started_at
+            self.metrics.set("sentinel_time_to_first_alert_seconds", self.time_to_first_alert)
+            self.restart_history.append({"started_at": self.started_at, "time_to_first_alert": self.time_to_first_alert})
+            del self.restart_history[:-RESTART_HISTORY]
+            self.log(f"[Metrics] First alert {self.time_to_first_alert:.1f}s after start.")
+        self.on_report(text)
+
+    def store_report(self, text: str):
+        try:
+            self.history.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), text)
+        except Exception as e:
+            self.log(f"Failed to store report: {e}")
+
+    # ---------- Settings ----------
+    @property
+    def cfg(self):
+        """Settings snapshot of the cycle running on this thread, else the current one."""
+        return getattr(self._cycle_local, "config", None) or self.config
+
+    def apply_settings(self):
+        """
+        Validate self.settings into a new Config. Running cycles keep their
+        snapshot; the next cycle to start sees the change.
+        """
+        config, errors = Config.from_settings(self.settings, self.config)
+        for error in errors:
+            self.log(f"[Settings] Ignoring invalid value {error}")
+        changed = config.changed_fields(self.config)
+        self.config = config
+        return changed
+
+    def check_settings_file(self):
+        """Hot reload: pick up hand edits to the settings in app_state.json (throttled)."""
+        now = time.monotonic()
+        if now < self._next_settings_check:
+            return
+        self._next_settings_check = now + SETTINGS_WATCH_SECONDS
+        try:
+            mtime = os.stat(STATE_FILE).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._state_mtime:
+            return
+        first_check = self._state_mtime is None
+        self._state_mtime = mtime
+        if first_check:
+            return
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                settings = json.load(f).get("settings", {})
+        except Exception as e:
+            self.log(f"[Settings] Not reloading {STATE_FILE}: {e}")
+            return
+        self.settings.update(settings)
+        changed = self.apply_settings()
+        if changed:
+            self.log(f"[Settings] Reloaded from app_state.json, applied from the next cycle: {', '.join(changed)}")
+
+    # ---------- Topics ----------
+    def get_topics_string(self):
+        return ", ".join(self.topics) if self.topics else "No topics defined"
+
+    # ---------- Scheduling ----------
+    def bulk_analysis_due(self):
+        cfg = self.cfg
+        if not cfg.bulk_analysis or self.shard_name:
+            return False
+        return time.time() - self.rolling_file_start_time >= cfg.analysis_window
+
+    def request_bulk_analysis(self):
+        if self._shutting_down or not self.bulk_analysis_due():
+            return
+        self.bulk_scheduler.tick()
+
+    def group_interval(self, group):
+        return group.interval or self.config.fetch_interval
+
+    def trigger_all(self, reason="manual"):
+        """Start a cycle in every feed group now (coalesced if one is running)."""
+        now = time.monotonic()
+        for group in self.groups_by_priority():
+            group.next_due = now + self.group_interval(group)
+            group.scheduler.trigger(reason)
+
+    def tick_due_groups(self):
+        """Call often (about once a second); ticks each group whose interval has elapsed."""
+        if self._shutting_down:
+            return
+        self.check_settings_file()
+        if self.shared is not None and not self.shard_name:
+            self.poll_shards()
+        now = time.monotonic()
+        for group in self.groups_by_priority():
+            if now >= group.next_due:
+                group.next_due = now + self.group_interval(group)
+                group.scheduler.tick()
+
+    def fetch_busy(self):
+        return self._fast_lane_pending > 0 or any(group.scheduler.is_busy() for group in self.groups.values())
+
+    def groups_by_priority(self):
+        return sorted(self.groups.values(), key=lambda g: g.priority)
+
+    def rebuild_feed_groups(self):
+        """
+        Sync self.groups with the loaded data source (group "default") and the
+        feed_groups config. Existing groups keep their scheduler and timing.
+        """
+        wanted = OrderedDict()
+        wanted["default"] = {"name": "default"}
+        for cfg in self.feed_groups:
+            if cfg.get("name"):
+                wanted[cfg["name"]] = cfg
+        for name in list(self.groups):
+            if name not in wanted:
+                self.groups.pop(name).stop(timeout=0)
+        for name, cfg in wanted.items():
+            group = self.groups.get(name)
+            if group is None:
+                group = self.groups[name] = FeedGroup(name, self.run_fetch_cycle, self.log, self.metrics)
+            group.configure(
+                int(cfg["interval"]) if cfg.get("interval") else None,
+                int(cfg.get("priority", DEFAULT_GROUP_PRIORITY)),
+                int(cfg.get("concurrency", 1)),
+            )
+            source_file = cfg.get("source_file", "")
+            if source_file and source_file != group.source_file:
+                try:
+                    group.feeds = read_feed_list(local_path(source_file))
+                    group.source_file = source_file
+                    self.log(f"Feed group '{name}': {len(group.feeds)} data sources loaded.")
+                except Exception as e:
+                    self.log(f"Feed group '{name}': failed to load {source_file}: {e}")
+            elif name == "default" and not source_file:
+                group.feeds = self.feeds
+
+    def shutdown(self, timeout=5.0):
+        self._shutting_down = True
+        for proc, _ in self.shard_procs.values():
+            if proc.poll() is None:
+                proc.terminate()
+        for group in self.groups.values():
+            group.stop(timeout=timeout)
+        self.bulk_scheduler.stop(timeout=timeout)
+        self.fast_lane.shutdown(wait=False, cancel_futures=True)
+        unsent = self.slack.close(timeout=timeout)
+        if unsent:
+            # log() is already muted for shutdown; lost alerts must still reach the log file
+            self.log_sink.put(f"Slack queue closed with {unsent} message(s) unsent.")
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+        self.save_pipeline_state()
+        self.save_metrics()
+        self.save_token_usage()
+        self.save_embeddings()
+        for proc, _ in self.shard_procs.values():
+            try:
+                proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if self.shared is not None:
+            self.shared.close()
+
+    # ---------- Metrics ----------
+    def start_metrics_server(self):
+        """Expose /metrics on localhost when METRICS_PORT is set (0 = off)."""
+        port = self.config.metrics_port
+        if port <= 0 or self.metrics_server is not None:
+            return
+        try:
+            self.metrics_server = start_metrics_server(self.metrics, port)
+            self.log(f"[Metrics] Serving http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            self.log(f"[Metrics] Could not listen on port {port}: {e}")
+
+    def save_metrics(self):
+        try:
+            write_json_atomic(METRICS_FILE, self.metrics.snapshot())
+        except Exception as e:
+            self.log(f"Failed to save metrics: {e}")
+
+    # ---------- Token budget ----------
+    def save_token_usage(self):
+        try:
+            self.tokens.save()
+        except Exception as e:
+            self.log(f"Failed to save token usage: {e}")
+
+    def over_budget(self, prompt_text, cycle_spent):
+        """Reason string if the next request would exceed the per-cycle or per-day budget, else None."""
+        needed = self.tokens.estimate(len(prompt_text))
+        cfg = self.cfg
+        per_cycle = cfg.token_budget_per_cycle
+        if per_cycle > 0 and cycle_spent + needed > per_cycle:
+            return f"cycle budget {per_cycle}, spent {cycle_spent}, next needs ~{needed}"
+        per_day = cfg.token_budget_per_day
+        if per_day > 0:
+            today = self.tokens.today()
+            spent = int(today.get("prompt_tokens", 0) + today.get("completion_tokens", 0))
+            if spent + needed > per_day:
+                return f"daily budget {per_day}, spent {spent}, next needs ~{needed}"
+        return None
+
+    # ---------- Cycle scope: settings snapshot and tracing ----------
+    def span(self, name, cat="pipeline", **args):
+        """Time a block into the current thread's cycle trace; a no-op unless TRACE_CYCLES is on."""
+        trace = getattr(self._cycle_local, "trace", None)
+        if trace is None:
+            return NO_SPAN
+        return trace.span(name, cat, args)
+
+    def carry_cycle(self, fn):
+        """Wrap fn so it sees the caller's settings snapshot and trace when run on a pool thread."""
+        config = getattr(self._cycle_local, "config", None)
+        trace = getattr(self._cycle_local, "trace", None)
+        if config is None and trace is None:
+            return fn
+
+        def run(*args, **kwargs):
+            self._cycle_local.config = config
+            self._cycle_local.trace = trace
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._cycle_local.config = None
+                self._cycle_local.trace = None
+        return run
+
+    @contextmanager
+    def cycle_scope(self, name):
+        """Freeze the settings for one cycle and, with TRACE_CYCLES on, trace it."""
+        config = self._cycle_local.config = self.config
+        trace = self._cycle_local.trace = CycleTrace(name) if config.trace_cycles else None
+        try:
+            if trace is None:
+                yield
+            else:
+                with trace.span(name, "cycle", {}):
+                    yield
+        finally:
+            self._cycle_local.config = None
+            self._cycle_local.trace = None
+            if trace is not None:
+                self.save_trace(trace)
+
+    def save_trace(self, trace):
+        try:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            stamp = datetime.fromtimestamp(trace.started_at).strftime("%Y%m%d-%H%M%S-%f")[:-3]
+            safe_name = "".join(c if c.isalnum() or c in "-_" else "-" for c in trace.name)
+            path = os.path.join(TRACE_DIR, f"{stamp}-{safe_name}.json")
+            write_json_atomic(path, trace.to_json())
+            old = sorted(f for f in os.listdir(TRACE_DIR) if f.endswith(".json"))[:-TRACE_FILES_KEPT]
+            for f in old:
+                os.remove(os.path.join(TRACE_DIR, f))
+            self.log(f"[Trace] {len(trace.events)} spans written to {path}")
+        except Exception as e:
+            self.log(f"Failed to write trace: {e}")
+
+    def run_fetch_cycle(self, group, replay=None):
+        with self.cycle_scope(f"fetch:{group.name}"):
+            if self.shard_name:
+                self.fetch_for_coordinator(group)
+            else:
+                self.fetch_and_send(group, replay)
+
+    def run_bulk_cycle(self):
+        with self.cycle_scope("bulk"):
+            self.perform_bulk_analysis_if_ready()
+
+    # ---------- Warm restart snapshot ----------
+    def save_pipeline_state(self):
+        """Snapshot dedupe, feed cursors and the bulk window; called at cycle boundaries and on exit."""
+        with self.span("save pipeline state"), self.state_lock:
+            self._save_pipeline_state()
+
+    def _save_pipeline_state(self):
+        try:
+            cutoff = time.time() - SEEN_GUID_TTL
+            # dict.copy() is atomic under the GIL, so this is safe against a running cycle;
+            # expired guids are popped in place so the live dict stops growing between restarts
+            seen = {}
+            for guid, ts in self.seen_guids.copy().items():
+                if ts >= cutoff:
+                    seen[guid] = ts
+                else:
+                    self.seen_guids.pop(guid, None)
+            write_json_atomic(PIPELINE_STATE_FILE, {
+                "saved_at": time.time(),
+                "seen_guids": seen,
+                "feed_cursors": self.feed_cursors.copy(),
+                "rolling_file_start_time": self.rolling_file_start_time,
+                "restart_history": list(self.restart_history),
+                "stories": self.stories.to_json(),
+                "overflow": self.overflow.to_json(),
+            })
+        except Exception as e:
+            self.log(f"Failed to save pipeline state: {e}")
+
+    def load_pipeline_state(self):
+        try:
+            if not os.path.exists(PIPELINE_STATE_FILE):
+                return
+            with open(PIPELINE_STATE_FILE, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            cutoff = time.time() - SEEN_GUID_TTL
+            self.seen_guids = {guid: ts for guid, ts in state.get("seen_guids", {}).items() if ts >= cutoff}
+            self.feed_cursors = state.get("feed_cursors", {})
+            self.rolling_file_start_time = state.get("rolling_file_start_time", self.rolling_file_start_time)
+            self.restart_history = state.get("restart_history", [])
+            self.stories.load_json(state.get("stories", {}), self.cfg.story_window_hours * 3600)
+            self.overflow.load_json(state.get("overflow", {}))
+            self.log(f"Pipeline state restored: {len(self.seen_guids)} seen items, {len(self.feed_cursors)} feed cursors.")
+            timings = [r["time_to_first_alert"] for r in self.restart_history if r.get("time_to_first_alert") is not None]
+            if timings:
+                self.log(f"[Metrics] Time to first alert over last {len(timings)} restarts: "
+                         f"avg {sum(timings) / len(timings):.1f}s, max {max(timings):.1f}s")
+        except Exception as e:
+            self.log(f"Failed to load pipeline state: {e}")
+
+    # ---------- Data sources ----------
+    def load_data_source_file(self, file_path):
+        """Replace the default group's feed list from a .txt (one URL per line) or .json (list of URLs) file."""
+        try:
+            self.feeds = read_feed_list(local_path(file_path))
+            self.current_data_source_file = file_path
+            self.rebuild_feed_groups()
+            self.log(f"{len(self.feeds)} data sources loaded.")
+            return True
+        except Exception as e:
+            self.log(f"Failed to load data sources: {e}")
+            return False
+
+    def load_prompt_file(self, file_path):
+        try:
+            with open(local_path(file_path), "r", encoding="utf-8") as f:
+                self.base_prompt = f.read()
+            self.prompt_file = file_path
+            self.log(f"Loaded prompt file: {file_path}")
+            return True
+        except Exception as e:
+            self.log(f"Failed to load prompt: {e}")
+            return False
+
+    #--------- Append RSS Results to File ----------
+    def append_to_rolling_file(self, items):
+        with self.span("append rolling file", items=len(items)):
+            self._append_to_rolling_file(items)
+
+    def _append_to_rolling_file(self, items):
+        try:
+            with self.rolling_lock, open(ROLLING_FILE, "a", encoding="utf-8") as f:
+                for item in items:
+                    f.writelines(item.parts())
+                    f.write("\n\n")
+            self.log(f"Appended {len(items)} items to {ROLLING_FILE}")
+        except Exception as e:
+            self.log(f"Failed to write to rolling file: {e}")
+
+    def archive_cycle(self, group, urgent_items, items):
+        """Append one cycle's new items to the cycle archive (ARCHIVE_CYCLES), for sentinel_replay.py."""
+        try:
+            record = json.dumps({
+                "at": time.time(),
+                "group": group.name,
+                "urgent": [item.to_json() for item in urgent_items],
+                "items": [item.to_json() for item in items],
+            })
+            with self.rolling_lock:
+                if os.path.exists(CYCLE_ARCHIVE_FILE) and os.path.getsize(CYCLE_ARCHIVE_FILE) > CYCLE_ARCHIVE_MAX_BYTES:
+                    os.replace(CYCLE_ARCHIVE_FILE, f"{CYCLE_ARCHIVE_FILE}.1")
+                with open(CYCLE_ARCHIVE_FILE, "a", encoding="utf-8") as f:
+                    f.write(record + "\n")
+        except Exception as e:
+            self.log(f"Failed to archive cycle: {e}")
+
+    # ---------- Profiles ----------
+    def load_profiles(self):
+        """Load profiles from the JSON file."""
+        try:
+            if os.path.exists(PROFILE_FILE):
+                with open(PROFILE_FILE, "r", encoding="utf-8") as f:
+                    self.profiles = json.load(f)
+                self.log(f"Loaded {len(self.profiles)} saved profiles.")
+            else:
+                self.profiles = {}
+        except Exception as e:
+            self.log(f"Failed to load profiles, starting fresh. Error: {e}")
+            self.profiles = {}
+
+    def save_profiles(self):
+        """Save profiles to the JSON file."""
+        try:
+            with open(PROFILE_FILE, "w", encoding="utf-8") as f:
+                json.dump(self.profiles, f, indent=2)
+            self.log(f"Profiles saved to {PROFILE_FILE}.")
+        except Exception as e:
+            self.log(f"Failed to save profiles. Error: {e}")
+
+    def use_profile(self, name):
+        """Make a saved profile's topics the active topic list."""
+        if name not in self.profiles:
+            self.log(f"Unknown profile '{name}'.")
+            return False
+        self.topics = list(self.profiles[name])
+        self.active_profile = name
+        return True
+
+    def fanout_profile_names(self):
+        return list(self.cfg.fanout_profiles)
+
+    def _route_prompt(self, prompt_file):
+        if not prompt_file:
+            return self.base_prompt
+        try:
+            path = local_path(prompt_file)
+            mtime = os.path.getmtime(path)
+            cached = self._route_prompts.get(prompt_file)
+            if cached is None or cached[0] != mtime:
+                with open(path, "r", encoding="utf-8") as f:
+                    cached = (mtime, f.read())
+                self._route_prompts[prompt_file] = cached
+            return cached[1]
+        except Exception as e:
+            self.log(f"Failed to load profile prompt {prompt_file}, using the main prompt: {e}")
+            return self.base_prompt
+
+    def build_profile_routes(self):
+        """
+        The active topic list, plus every profile named in FANOUT_PROFILES.
+        Per-profile overrides come from profile_routes in app_state.json.
+        """
+        cfg = self.cfg
+        use_chunked = cfg.use_chunked_mode
+        chunk_size = cfg.chunk_size
+        webhook = cfg.slack_webhook_url
+        fanout = self.fanout_profile_names()
+        routes = [ProfileRoute(self.active_profile if fanout else "", self.topics, self.base_prompt,
+                               chunk_size, use_chunked, webhook)]
+        for name in fanout:
+            if name == self.active_profile:
+                continue
+            if name not in self.profiles:
+                self.log(f"Fan-out profile '{name}' not found, skipping.")
+                continue
+            overrides = self.profile_routes.get(name, {})
+            routes.append(ProfileRoute(
+                name,
+                self.profiles[name],
+                self._route_prompt(overrides.get("prompt_file")),
+                int(overrides.get("chunk_size") or chunk_size),
+                int(overrides.get("use_chunked_mode", 1 if use_chunked else 0)) == 1,
+                overrides.get("slack_webhook_url") or webhook,
+            ))
+        return routes
+
+    def plan_llm_jobs(self, routes, cap, chunk_size=None):
+        """
+        Merge routes that would build identical prompts (same prompt, topics
+        and chunking) into (chunk_chars, routes) plans, in route order.
+        chunk_size overrides every route's own chunking (the fast lane).
+        """
+        plans = OrderedDict()
+        for route in routes:
+            chars = chunk_size or route.chunk_chars(cap)
+            plans.setdefault((route.base_prompt, route.topics_str, chars), (chars, []))[1].append(route)
+        return list(plans.values())
+
+    def score_items(self, items, plans):
+        """
+        Per plan, a cheap local relevance score for every item (keyed by id):
+        topic words in the title count double, summary words once, plus one
+        for an escalation word in the title.
+        """
+        terms = [(relevance_terms(item.title), relevance_terms(item.summary)) for item in items]
+        scores = []
+        for _, routes in plans:
+            topic = relevance_terms(routes[0].topics_str)
+            scores.append({id(item): 2 * len(title & topic) + len(body & topic) + bool(title & ESCALATION_STEMS)
+                           for item, (title, body) in zip(items, terms)})
+        return scores
+
+    def schedule_chunks(self, items, plans, scores=None):
+        """
+        Pack each plan's items into (chars, routes, members) chunks without
+        rendering them. Without scores: plan order, then feed order. With
+        scores: each plan packs its most relevant items first, and chunks from
+        all plans go out by their best item's score, ties in plan order.
+        """
+        if scores is None:
+            return [(chars, routes, members) for chars, routes in plans for members in chunk_items(items, chars)]
+        ranked = []
+        for n, ((chars, routes), plan_scores) in enumerate(zip(plans, scores)):
+            ordered = sorted(items, key=lambda item: -plan_scores[id(item)])
+            for members in chunk_items(ordered, chars):
+                best = max(plan_scores[id(item)] for item in members)
+                ranked.append(((-best, n, len(ranked)), (chars, routes, members)))
+        ranked.sort(key=lambda entry: entry[0])
+        return [chunk for _, chunk in ranked]
+
+    def iter_llm_jobs(self, schedule):
+        """
+        Yield (key, job) per scheduled chunk, in order. Each prompt is
+        rendered just before it is yielded, so only one chunk's text is alive
+        at a time. Prompts already sent in a recent cycle are skipped.
+        """
+        repeats = 0
+        emitted = set()
+        for chars, routes, members in schedule:
+            route = routes[0]
+            chunk = render_chunk(members, chars)
+            prompt_text = route.base_prompt.format(CHUNK=chunk, TOPICS=route.topics_str)
+            key = hashlib.sha1(prompt_text.encode("utf-8")).hexdigest()
+            with self.prompt_lock:
+                repeat = key in self.sent_prompt_hashes
+            if repeat or key in emitted:
+                repeats += 1
+                continue
+            emitted.add(key)
+            yield key, {"prompt": prompt_text, "chunk": chunk, "chars": len(chunk), "routes": routes, "items": members}
+        if repeats:
+            self.log(f"{repeats} chunk/profile pair(s) already analysed in a recent cycle, skipped.")
+
+    def remember_prompt(self, key):
+        with self.prompt_lock:
+            self.sent_prompt_hashes[key] = True
+            while len(self.sent_prompt_hashes) > RECENT_PROMPT_HASHES:
+                self.sent_prompt_hashes.popitem(last=False)
+
+    def deliver(self, reply, routes):
+        """Show/store the reply once, and post it once to each distinct Slack webhook."""
+        names = [r.name for r in routes if r.name]
+        text = f"[{', '.join(names)}]\n{reply}" if names else reply
+        self.reply(text)
+        for webhook in OrderedDict.fromkeys(r.slack_webhook_url for r in routes):
+            self.send_slack_notification(text, webhook)
+        self.report(text)
+
+    # ---------- RSS ----------
+    def fetch_feed(self, url, priority=DEFAULT_GROUP_PRIORITY):
+        queued = time.perf_counter()
+        with self.fetch_gate.slot(priority):
+            with self.span("fetch feed", feed=url, queued_s=round(time.perf_counter() - queued, 4)):
+                return self._fetch_feed(url)
+
+    def _fetch_feed(self, url):
+        try:
+            headers = {"User-Agent": "Python RSS Client"}
+            if "reddit.com" in url:
+                headers["User-Agent"] = (
+                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/119.0.0.0 Safari/537.36"
+                )
+            cursor = self.feed_cursors.get(url, {})
+            if cursor.get("etag"):
+                headers["If-None-Match"] = cursor["etag"]
+            if cursor.get("modified"):
+                headers["If-Modified-Since"] = cursor["modified"]
+            timeout = 20 if "fema.gov" in url else 10
+            started = time.perf_counter()
+            try:
+                with self.span("http get", feed=url):
+                    r = requests.get(url, headers=headers, timeout=timeout)
+            except Exception:
+                self.metrics.inc("sentinel_feed_responses_total", feed=url, status="error")
+                raise
+            self.metrics.observe("sentinel_feed_fetch_seconds", time.perf_counter() - started, feed=url)
+            self.metrics.inc("sentinel_feed_responses_total", feed=url, status=r.status_code)
+            self.metrics.inc("sentinel_feed_bytes_total", len(r.content), feed=url)
+            if r.status_code == 304:
+                self.log(f"Checking {url}, not modified")
+                return None
+            r.raise_for_status()
+            validators = {k: v for k, v in (("etag", r.headers.get("ETag")), ("modified", r.headers.get("Last-Modified"))) if v}
+            if validators:
+                self.feed_cursors[url] = validators
+            else:
+                self.feed_cursors.pop(url, None)
+            started = time.perf_counter()
+            with self.span("parse", feed=url, bytes=len(r.content)):
+                feed = feedparser.parse(r.content)
+            self.metrics.observe("sentinel_feed_parse_seconds", time.perf_counter() - started, feed=url)
+            return feed
+        except Exception as e:
+            self.log(f"Error fetching {url}: {e}")
+            return None
+
+    def collect_items(self, group, urls, priority=None):
+        """
+        Fetch urls with the group's pool and return new, recent items as
+        FeedItem records, in feed order.
+        """
+        items = []
+        cfg = self.cfg
+        priority = group.priority if priority is None else priority
+        fetch = self.carry_cycle(lambda url: self.fetch_feed(url, priority))
+        # Fetch up to group.concurrency feeds at once; results come back in feed order
+        for url, feed in zip(urls, group.executor.map(fetch, list(urls))):
+            if not feed:
+                continue
+            self.log(f"Checking {url}, {len(feed.entries)} entries found")
+            limit = cfg.items_per_feed
+            if len(feed.entries) > limit:
+                self.metrics.inc("sentinel_items_total", len(feed.entries) - limit, stage="over_limit")
+            with self.span("filter entries", feed=url, entries=min(len(feed.entries), limit)):
+                entries = feed.entries[:limit]
+                stamp = time.time()
+                new = self.claim_new([getattr(entry, "id", None) or getattr(entry, "link", None)
+                                      for entry in entries], stamp)
+                for entry in entries:
+                    guid = getattr(entry, "id", None) or getattr(entry, "link", None)
+                    if guid not in new:
+                        self.metrics.inc("sentinel_items_total", stage="duplicate")
+                        continue
+                    new.discard(guid)  # a repeat within the same feed is a duplicate too
+                    pub_date = getattr(entry, "published", None) or getattr(entry, "updated", None)
+                    published_ts = None
+                    if pub_date:
+                        try:
+                            pub_dt = dateparser.parse(pub_date)
+                            if pub_dt.tzinfo is None:
+                                pub_dt = pub_dt.replace(tzinfo=timezone.utc)
+                            now = datetime.now(timezone.utc)
+                            if (now - pub_dt).total_seconds() > 86400:  # older than 24h
+                                self.metrics.inc("sentinel_items_total", stage="too_old")
+                                continue
+                            published_ts = pub_dt.timestamp()
+                        except Exception:
+                            pub_date = "(Invalid date)"
+                    else:
+                        pub_date = "(No date)"
+                    title = getattr(entry, "title", "(No title)")
+                    link = getattr(entry, "link", "")
+                    summary = getattr(entry, "summary", "(No summary)")
+                    items.append(FeedItem(title, pub_date, summary, link, published_ts, stamp))
+        self.metrics.inc("sentinel_items_total", len(items), stage="kept")
+        self.log(f"Collected {len(items)} items")
+        return items
+
+    def claim_new(self, guids, stamp):
+        """Mark guids seen and return those nobody had seen: in the shared store when sharded, else in memory."""
+        if self.shared is not None:
+            return self.shared.claim(guids, stamp)
+        # setdefault is atomic, so two groups sharing a feed can't both claim an item
+        return {guid for guid in guids if self.seen_guids.setdefault(guid, stamp) is stamp}
+
+    # ---------- Shard workers ----------
+    def start_shards(self, worker=None, folder=None):
+        """
+        With SHARD_WORKERS set, open the shared store and hash the feeds onto
+        that many workers. The coordinator (worker=None) also starts the local
+        workers unless SHARD_SPAWN_LOCAL is off. Read at startup. Returns False
+        if this process can't take part.
+        """
+        count = self.config.shard_workers
+        if count <= 0:
+            if worker is not None:
+                self.log("[Shards] SHARD_WORKERS is 0, nothing for a worker to do.")
+                return False
+            return True
+        if worker is not None and not 0 <= worker < count:
+            self.log(f"[Shards] Worker index {worker} is outside SHARD_WORKERS ({count}).")
+            return False
+        folder = folder or shard_dir(self.config.shared_dir)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            self.shared = SharedStore(os.path.join(folder, SHARED_DB_FILE))
+        except Exception as e:
+            self.log(f"[Shards] Could not open the shared store in {folder}: {e}")
+            if worker is None:
+                self.log("[Shards] Fetching in this process instead.")
+            return False
+        self.shard_ring = HashRing([f"worker-{index}" for index in range(count)])
+        if worker is not None:
+            self.shard_name = f"worker-{worker}"
+            self.log(f"[Shards] {self.shard_name} of {count} started, store {folder}")
+            return True
+        self.log(f"[Shards] Coordinating {count} worker(s) through {folder}")
+        if self.config.shard_spawn_local:
+            for index in range(count):
+                self.spawn_shard_worker(index, folder)
+        return True
+
+    def spawn_shard_worker(self, index, folder=None):
+        folder = folder or shard_dir(self.config.shared_dir)
+        if getattr(sys, "frozen", False):
+            cmd = [sys.executable, "--worker", str(index), "--shared-dir", folder]
+        else:
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", str(index), "--shared-dir", folder]
+        try:
+            # Workers log to their own folder; their stderr still reaches this console
+            proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        except OSError as e:
+            self.log(f"[Shards] Could not start worker-{index}: {e}")
+            return
+        self.shard_procs[index] = (proc, time.monotonic())
+        self.log(f"[Shards] Started worker-{index} (pid {proc.pid})")
+
+    def poll_shards(self):
+        """Coordinator tick: restart crashed local workers and start cycles for groups with items waiting."""
+        now = time.monotonic()
+        if now < self._next_shard_poll:
+            return
+        self._next_shard_poll = now + SHARD_POLL_SECONDS
+        for index, (proc, started) in list(self.shard_procs.items()):
+            if proc.poll() is not None and now - started >= SHARD_RESPAWN_SECONDS:
+                self.log(f"[Shards] worker-{index} exited with code {proc.returncode}, restarting it.")
+                self.spawn_shard_worker(index)
+        try:
+            pending = self.shared.pending()
+        except Exception as e:
+            self.log(f"[Shards] Shared store error: {e}")
+            return
+        wall = time.time()
+        for group in self.groups_by_priority():
+            urgent = pending.get((group.name, True))
+            waiting = pending.get((group.name, False))
+            # Urgent items go at once; the rest wait a moment for the other shards' share
+            if urgent or (waiting and wall - waiting[1] >= SHARD_GATHER_SECONDS):
+                if not group.scheduler.is_busy():
+                    group.scheduler.trigger("shards")
+
+    def gather_shards(self, group):
+        """Coordinator: take the urgent and other items the workers queued for group."""
+        with self.span("gather shards"):
+            urgent_items = self.shared.take(group.name, urgent=True)
+            items = self.shared.take(group.name)
+            workers = self.shared.workers()
+        cutoff = time.time() - 3 * self.group_interval(group)
+        alive = sum(1 for worker in workers if worker["heartbeat"] >= cutoff)
+        self.metrics.set("sentinel_shard_workers_alive", alive)
+        self.log(f"[Shards] Gathered {len(items) + len(urgent_items)} item(s) ({len(urgent_items)} urgent) "
+                 f"for {group.name}, {alive} of {self.config.shard_workers} worker(s) reporting.")
+        return urgent_items, items
+
+    def fetch_for_coordinator(self, group):
+        """Shard worker cycle: fetch this worker's share of the group's feeds and queue the new items."""
+        try:
+            if self._shutting_down:
+                return
+            feeds = [url for url in group.feeds if self.shard_ring.owner(url) == self.shard_name]
+            self.shared.heartbeat(self.shard_name, len(feeds))
+            if not feeds:
+                return
+            self.log(f"[Shards] {self.shard_name} fetching {len(feeds)} of {len(group.feeds)} feeds ({group.name})...")
+            urgent_urls = [url for url in feeds if self.is_urgent_source(url)]
+            if urgent_urls:
+                with self.span("collect urgent", feeds=len(urgent_urls)):
+                    urgent_items = self.collect_items(group, urgent_urls, PRIORITY_URGENT)
+                self.shared.push(group.name, urgent_items, urgent=True)
+            with self.span("collect", feeds=len(feeds) - len(urgent_urls)):
+                items = self.collect_items(group, [url for url in feeds if not self.is_urgent_source(url)])
+            self.shared.push(group.name, items)
+            self.shared.expire_seen(time.time() - SEEN_GUID_TTL)
+        except Exception as e:
+            self.log(f"[Shards] {self.shard_name} error: {e}")
+        finally:
+            self.save_pipeline_state()
+            self.save_metrics()
+
+    # ---------- Fast lane ----------
+    def dispatch_urgent(self, items, write_to_file):
+        """Hand urgent items to the fast lane, ahead of the batch."""
+        if not items:
+            return
+        with self.state_lock:
+            self._fast_lane_pending += 1
+        self.fast_lane.submit(self.run_fast_lane, items)
+        if write_to_file:
+            self.append_to_rolling_file(items)
+
+    def is_urgent_source(self, url):
+        return any(p in url for p in self.cfg.urgent_sources)
+
+    def run_fast_lane(self, items):
+        with self.cycle_scope("fast-lane"):
+            self.send_fast_lane(items)
+
+    def send_fast_lane(self, items):
+        """Runs on the fast-lane worker: small chunks, urgent priority, optional dedicated server."""
+        try:
+            if self._shutting_down:
+                return
+            cfg = self.cfg
+            chunk_size = cfg.urgent_chunk_size
+            url = cfg.urgent_lmstudio_url
+            gate = self.urgent_gate if url else self.llm_gate
+            plans = self.plan_llm_jobs(self.build_profile_routes(), chunk_size, chunk_size=chunk_size)
+            schedule = self.schedule_chunks(items, plans)
+            self.metrics.observe("sentinel_chunks", len(schedule), lane="urgent")
+            for key, job in self.iter_llm_jobs(schedule):
+                self.log(f"[Fast lane] Sending {len(job['items'])} urgent item(s) ({job['chars']} chars)...")
+                resp = self.post_to_llm(job["prompt"], cfg.max_tokens, PRIORITY_URGENT,
+                                        url=url or None, gate=gate, kind="urgent", group="fast-lane",
+                                        profiles=[r.name for r in job["routes"]])
+                if resp.status_code != 200:
+                    self.log(f"[Fast lane] LMStudio returned HTTP {resp.status_code}")
+                    continue
+                self.remember_prompt(key)
+                reply = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+                if reply:
+                    self.deliver(reply, job["routes"])
+                hit = is_hit(reply)
+                self.on_verdict(job, hit)
+                if hit:  # NO HIT replies raise no alert, so they have no alert latency
+                    self.record_alert_latency(job["items"])
+        except Exception as e:
+            self.log(f"[Fast lane] Error sending: {e}")
+        finally:
+            with self.state_lock:
+                self._fast_lane_pending -= 1
+
+    def record_hit_latency(self, items):
+        """Seconds from fetching the chunk's newest item to its HIT being delivered."""
+        fetch_to_hit = time.time() - max(item.fetched_at for item in items)
+        self.metrics.observe("sentinel_fetch_to_hit_seconds", fetch_to_hit, lane="batch")
+        return fetch_to_hit
+
+    def record_alert_latency(self, items):
+        now = time.time()
+        for item in items:
+            source = now - item.published_ts if item.published_ts else None
+            fetch = now - item.fetched_at
+            self.fast_lane_latencies.append((item.title, source, fetch))
+            source_txt = f"{source:.0f}s" if source is not None else "n/a"
+            self.log(f"[Fast lane] {item.title[:80]}: source-to-alert {source_txt}, fetch-to-alert {fetch:.1f}s")
+
+    # ---------- Embedding similarity ----------
+    def embed_missing(self, texts):
+        """
+        Embed the texts (key -> text) not in the cache, EMBEDDING_BATCH per
+        request, and return key -> row for all of them.
+        """
+        with self.embeddings.lock:
+            return self._embed_missing(texts)
+
+    def _embed_missing(self, texts):
+        cfg = self.cfg
+        if self.embeddings.model != cfg.embedding_model:
+            self.embeddings.reset(cfg.embedding_model)
+            self._embeddings_loaded = False
+        if not self._embeddings_loaded:
+            try:
+                if os.path.exists(EMBEDDING_CACHE_FILE):
+                    restored = self.embeddings.load(EMBEDDING_CACHE_FILE, cfg.embedding_model)
+                    self.log(f"[Embeddings] {restored} cached vectors restored.")
+                self._embeddings_loaded = True
+            except OSError as e:
+                self.log(f"[Embeddings] Could not read the vector cache, retrying next cycle: {e}")
+            except Exception as e:
+                self._embeddings_loaded = True  # unreadable cache: start empty, the next save replaces it
+                self.log(f"[Embeddings] Could not read the vector cache, starting empty: {e}")
+        if len(texts) > self.embeddings.capacity:
+            raise ValueError(f"{len(texts)} texts are more than the {self.embeddings.capacity}-vector cache holds")
+        rows = self.embeddings.lookup(texts)
+        missing = [key for key in texts if key not in rows]
+        self.metrics.inc("sentinel_embeddings_total", len(rows), source="cache")
+        self.metrics.inc("sentinel_embeddings_total", len(missing), source="computed")
+        for start in range(0, len(missing), EMBEDDING_BATCH):
+            batch = missing[start:start + EMBEDDING_BATCH]
+            started = time.perf_counter()
+            with self.span("embed batch", texts=len(batch)):
+                resp = requests.post(cfg.embedding_url, json={
+                    "model": cfg.embedding_model or "your_embedding_model",
+                    "input": [texts[key] for key in batch],
+                }, timeout=120)
+            self.metrics.observe("sentinel_embed_request_seconds", time.perf_counter() - started)
+            resp.raise_for_status()
+            data = resp.json().get("data")
+            if not isinstance(data, list):
+                raise ValueError("reply has no 'data' list")
+            data = sorted(data, key=lambda d: d.get("index", 0))
+            if len(data) != len(batch):
+                raise ValueError(f"asked for {len(batch)} vectors, got {len(data)}")
+            for key, entry in zip(batch, data):
+                rows[key] = self.embeddings.add(key, entry["embedding"])
+        return rows
+
+    def embedding_scores(self, items, plans):
+        """
+        Per plan, each item's best cosine similarity to one of the plan's
+        topics (keyed by id), like score_items. None if embedding fails.
+        """
+        try:
+            item_keys = []
+            texts = {}
+            for item in items:
+                text = embedding_text(item)
+                key = embedding_key(text)
+                item_keys.append(key)
+                texts[key] = text
+            plan_topics = []
+            for _, routes in plans:
+                topics = [t.strip() for t in routes[0].topics_str.split(",") if t.strip()]
+                keys = [embedding_key(f"topic: {t}") for t in topics]
+                texts.update((key, t) for key, t in zip(keys, topics))
+                plan_topics.append(keys)
+            with self.embeddings.lock:  # no other thread may evict or reset the rows before they are read
+                rows = self.embed_missing(texts)
+                item_rows = [rows[key] for key in item_keys]
+                scores = []
+                for keys in plan_topics:
+                    sims = self.embeddings.similarities(item_rows, [rows[key] for key in keys]) if keys else []
+                    scores.append({id(item): max(sim) if sim else 0.0
+                                   for item, sim in zip(items, sims or [[]] * len(items))})
+            return scores
+        except Exception as e:
+            self.log(f"[Embeddings] Failed, using word matching this cycle: {e}")
+            return None
+
+    def save_embeddings(self):
+        if not self._embeddings_loaded or not len(self.embeddings):
+            return
+        try:
+            self.embeddings.save(EMBEDDING_CACHE_FILE)
+        except Exception as e:
+            self.log(f"Failed to save the embedding cache: {e}")
+
+    # ---------- Screening cascade ----------
+    def screen_job(self, job, group, chunk_no):
+        """
+        Score a chunk with the screening model. Returns (positive, tokens
+        used); errors count as positive so nothing is lost when it's down.
+        """
+        cfg = self.cfg
+        routes = job["routes"]
+        prompt_text = SCREEN_PROMPT.format(CHUNK=job["chunk"], TOPICS=routes[0].topics_str)
+        try:
+            with self.span(f"screen {chunk_no}", chars=job["chars"]):
+                resp = self.post_to_llm(prompt_text, SCREEN_MAX_TOKENS, group.priority, url=cfg.screen_lmstudio_url,
+                                        gate=self.screen_gate, kind="screen", group=group.name,
+                                        profiles=[r.name for r in routes], model=cfg.screen_model or None)
+        except Exception as e:
+            self.log(f"[Screen] Chunk {chunk_no}: screening request failed, sending to the main model: {e}")
+            return True, 0
+        if resp.status_code != 200:
+            self.log(f"[Screen] Chunk {chunk_no}: screening model returned HTTP {resp.status_code}, sending to the main model")
+            return True, resp.tokens_used
+        reply = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+        score = parse_screen_score(reply)
+        positive = score is None or score >= cfg.screen_threshold
+        self.log(f"[Screen] Chunk {chunk_no}: score {score if score is not None else '?'} -> "
+                 f"{'main model' if positive else 'no hit'}")
+        job["score"] = score
+        return positive, resp.tokens_used
+
+    def record_screen(self, job, positive, hit):
+        score = job.get("score")
+        self.metrics.inc("sentinel_screen_verdicts_total", score="none" if score is None else str(score),
+                         main="skipped" if hit is None else ("hit" if hit else "no_hit"))
+        if self.screen_stats.record(positive, hit):
+            self.log(f"[Screen] {self.screen_stats.summary()}")
+
+    # ---------- LMStudio ----------
+    def cap_items(self, items, cap):
+        """
+        Split items into the leading ones whose rendered text fits in cap
+        characters, so we never send millions of characters, and the rest.
+        """
+        total = 0
+        for n, item in enumerate(items):
+            total += len(item) + 2
+            if total > cap and n:
+                return items[:n], items[n:]
+        return items, []
+
+    def carry_over(self, group, items, reason):
+        """Queue items that missed this cycle for the group's next one, or drop them if the queue is off."""
+        if not items:
+            return
+        if self.cfg.overflow_max_age_minutes <= 0:
+            self.metrics.inc("sentinel_items_total", len(items), stage="over_cap")
+            self.log(f"{len(items)} item(s) over the {reason}, not analysed.")
+            return
+        self.metrics.inc("sentinel_items_total", len(items), stage="carried_over")
+        full = self.overflow.put(group.name, items)
+        self.log(f"[Overflow] {len(items)} item(s) over the {reason} carried to the next cycle "
+                 f"({self.overflow.depth(group.name)} waiting"
+                 f"{f', {full} oldest dropped, queue full' if full else ''}).")
+
+    def post_to_llm(self, prompt_text, max_tokens, priority, url=None, gate=None, kind="alert", group="", profiles=("",),
+                    model=None):
+        """
+        Blocking chat-completions call, serialised through the priority gate.
+        Token usage is booked against kind, group and profiles; the booked
+        total is left on resp.tokens_used.
+        """
+        queued = time.perf_counter()
+        with (gate or self.llm_gate).slot(priority):
+            started = time.perf_counter()
+            with self.span("llm request", kind=kind, chars=len(prompt_text), queued_s=round(started - queued, 4)):
+                resp = requests.post(
+                    url or self.cfg.lmstudio_url,
+                    json={"model": model or "your_model_name",
+                        "messages": [{"role": "user", "content": prompt_text}],
+                        "max_tokens": max_tokens},
+                    timeout=900
+                )
+        self.metrics.observe("sentinel_llm_request_seconds", time.perf_counter() - started, kind=kind)
+        self.metrics.inc("sentinel_llm_responses_total", kind=kind, status=resp.status_code)
+        resp.tokens_used = 0
+        if resp.status_code == 200:
+            try:
+                usage = resp.json().get("usage") or {}
+            except ValueError:
+                usage = {}
+            prompt, completion, measured = self.tokens.record(len(prompt_text), usage, kind, group, list(profiles))
+            resp.tokens_used = prompt + completion
+            if measured:
+                self.metrics.inc("sentinel_llm_tokens_total", prompt, kind=kind, type="prompt_tokens")
+                self.metrics.inc("sentinel_llm_tokens_total", completion, kind=kind, type="completion_tokens")
+                self.metrics.observe("sentinel_llm_tokens", prompt + completion, kind=kind)
+            self.log(f"Tokens: {prompt} prompt + {completion} completion{'' if measured else ' (estimated, no usage in reply)'}")
+        return resp
+
+    # ---------- Slack ----------
+    def send_slack_notification(self, message, webhook_url=None):
+        """Queue a message for the Slack worker; never blocks on the network."""
+        if webhook_url is None:
+            webhook_url = self.cfg.slack_webhook_url
+        if not webhook_url:
+            self.log("Slack Webhook URL is empty, skipping notification.")
+            return
+        self.slack.put(webhook_url, message)
+
+    def post_to_slack(self, webhook_url, message):
+        """One webhook POST; runs on the Slack queue's thread."""
+        started = time.perf_counter()
+        try:
+            resp = requests.post(webhook_url, json={"text": message}, timeout=10)
+        except Exception:
+            self.metrics.inc("sentinel_slack_responses_total", status="error")
+            raise
+        self.metrics.observe("sentinel_slack_send_seconds", time.perf_counter() - started)
+        self.metrics.inc("sentinel_slack_responses_total", status=resp.status_code)
+        return resp
+
+    # ---------- LMStudio ----------
+    def fetch_and_send(self, group, replay=None):
+        """One batch cycle for group. replay: (urgent_items, items) to analyse instead of fetching."""
+        try:
+            if self._shutting_down:
+                return
+            if not group.feeds and replay is None:
+                return
+            cfg = self.cfg
+            write_to_file = cfg.write_to_file
+            urgent_items = []
+
+            if replay is not None:
+                urgent_items, items = replay
+                self.dispatch_urgent(urgent_items, write_to_file)
+            elif self.shared is not None:
+                # Shard workers did the fetching and dedupe; this process chunks and alerts
+                urgent_items, items = self.gather_shards(group)
+                self.dispatch_urgent(urgent_items, write_to_file)
+            else:
+                self.log(f"[ShunyaNet Sentinel] Fetching RSS ({group.name}, {len(group.feeds)} feeds)...")
+                # Urgent sources first, straight to the fast lane, while the rest are fetched
+                urgent_urls = [url for url in group.feeds if self.is_urgent_source(url)]
+                if urgent_urls:
+                    with self.span("collect urgent", feeds=len(urgent_urls)):
+                        urgent_items = self.collect_items(group, urgent_urls, PRIORITY_URGENT)
+                    self.dispatch_urgent(urgent_items, write_to_file)
+
+                with self.span("collect", feeds=len(group.feeds) - len(urgent_urls)):
+                    items = self.collect_items(group, [url for url in group.feeds if not self.is_urgent_source(url)])
+            if cfg.archive_cycles and (urgent_items or items):
+                self.archive_cycle(group, urgent_items, items)
+            if not items and not self.overflow.depth(group.name):
+                self.log(f"No new items ({group.name}).")
+                return
+
+            # Optional: write the raw pull to a rolling file (everything, so bulk reports see whole stories)
+            if items and write_to_file:
+                self.append_to_rolling_file(items)
+                if not hasattr(self, "rolling_file_start_time"):
+                    self.rolling_file_start_time = time.time()
+
+            # Hold back items that only repeat a story already sent
+            if cfg.story_clustering:
+                with self.span("story clustering", items=len(items)):
+                    items, held = self.stories.filter(items, cfg.story_window_hours * 3600, cfg.story_novelty)
+                self.metrics.inc("sentinel_items_total", held, stage="story_repeat")
+                self.log(f"Stories: {held} repeat item(s) held back, {len(items)} sent, {len(self.stories)} active stories.")
+
+            # Items earlier cycles had no room for go first, oldest first
+            carried, expired = self.overflow.take(group.name, cfg.overflow_max_age_minutes * 60)
+            if carried or expired:
+                self.log(f"[Overflow] {len(carried)} carried-over item(s) queued ahead of this cycle's {len(items)}"
+                         f"{f', {expired} expired unanalysed - inference capacity is too small for this load' if expired else ''}.")
+                items = carried + items
+            if not items:
+                return
+
+            # One fetch feeds every enabled profile
+            routes = self.build_profile_routes()
+            for route in routes:
+                label = f" [{route.name}]" if route.name else ""
+                self.log(f"Topics sent to LLM{label}: {route.topics_str}")
+            cap = self.tokens.chars_for(cfg.max_tokens)
+            plans = self.plan_llm_jobs(routes, cap)
+
+            # Most likely hits first, so they reach the model first and the MAX_TOKENS
+            # cap carries over the least likely ones. With EMBEDDING_URL set, embedding
+            # similarity replaces word matching and can drop items that fit no topic.
+            scores = None
+            if cfg.embedding_url:
+                with self.span("embedding similarity", items=len(items)):
+                    scores = self.embedding_scores(items, plans)
+                if scores is not None and cfg.embedding_min_similarity > 0:
+                    keep = [item for item in items
+                            if max(plan[id(item)] for plan in scores) >= cfg.embedding_min_similarity]
+                    if len(keep) < len(items):
+                        self.metrics.inc("sentinel_items_total", len(items) - len(keep), stage="low_similarity")
+                        self.log(f"[Embeddings] {len(items) - len(keep)} item(s) below similarity "
+                                 f"{cfg.embedding_min_similarity} to every topic, dropped.")
+                    items = keep
+                    if not items:
+                        return
+            if scores is None and cfg.relevance_order:
+                with self.span("score relevance", items=len(items)):
+                    scores = self.score_items(items, plans)
+            if scores is not None:
+                items = sorted(items, key=lambda item: -max(plan[id(item)] for plan in scores))
+
+            items, over = self.cap_items(items, cap)
+            self.carry_over(group, over, f"{cap}-character cap (MAX_TOKENS)")
+            with self.span("plan chunks", items=len(items)):
+                schedule = self.schedule_chunks(items, plans, scores)
+            planned = len(schedule)
+            self.log(f"{planned} chunk(s) planned for LMStudio across {len(routes)} profile(s)"
+                     f"{', most relevant first' if scores else ''}.")
+            self.metrics.observe("sentinel_chunks", planned, lane="batch")
+
+            # Chunks are rendered one at a time, in schedule order (by relevance, or active
+            # topics then FANOUT_PROFILES as listed in feed order), so a budget cut drops
+            # the least important tail
+            cycle_tokens = 0
+            sent = set()
+            hit_latencies = []
+            jobs = self.iter_llm_jobs(schedule)
+            for idx, (key, job) in enumerate(jobs):
+                reason = self.over_budget(job["prompt"], cycle_tokens)
+                if reason:
+                    # Only this chunk and the ones still to go; repeats were never going to be sent
+                    dropped = [job] + [rest for _, rest in jobs]
+                    self.log(f"[Budget] Dropping chunk {idx + 1} of up to {planned} and {len(dropped) - 1} after it: {reason}")
+                    self.metrics.inc("sentinel_budget_dropped_total", len(dropped), kind="alert")
+                    unsent = {id(item): item for chunk in dropped for item in chunk["items"] if id(item) not in sent}
+                    self.carry_over(group, list(unsent.values()), "token budget")
+                    break
+                sent.update(map(id, job["items"]))
+
+                # Cascade: a small model screens the chunk first, and only likely hits
+                # (plus a sample of the rest, to measure recall) reach the main model
+                screening = bool(cfg.screen_lmstudio_url)
+                if screening:
+                    positive, used = self.screen_job(job, group, idx + 1)
+                    cycle_tokens += used
+                    if not positive and self._screen_random.random() >= cfg.screen_sample_rate:
+                        self.record_screen(job, False, None)
+                        self.remember_prompt(key)
+                        self.on_verdict(job, False)
+                        continue
+                    if not positive:
+                        self.log(f"[Screen] Chunk {idx + 1}: sampled, checking the negative with the main model")
+                self.log(f"Sending chunk {idx + 1}/{planned} ({job['chars']} chars)...")
+
+                with self.span(f"chunk {idx + 1}/{planned}", chars=job["chars"], profiles=len(job["routes"])):
+                    resp = self.post_to_llm(job["prompt"], cfg.max_tokens, group.priority,
+                                            group=group.name, profiles=[r.name for r in job["routes"]])
+                cycle_tokens += resp.tokens_used
+
+                if resp.status_code != 200:
+                    self.log(f"LMStudio returned HTTP {resp.status_code} for chunk {idx + 1}")
+                    continue
+                self.remember_prompt(key)
+
+                chunk_reply = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+                hit = is_hit(chunk_reply)
+                if screening:
+                    self.record_screen(job, positive, hit)
+                self.on_verdict(job, hit)
+                if chunk_reply:
+                    with self.span("deliver", chunk=idx + 1):
+                        self.deliver(chunk_reply, job["routes"])
+                if hit:
+                    hit_latencies.append(self.record_hit_latency(job["items"]))
+
+            if hit_latencies:
+                self.log(f"[Metrics] {len(hit_latencies)} HIT(s) this cycle, fetch-to-HIT first {hit_latencies[0]:.1f}s, "
+                         f"mean {sum(hit_latencies) / len(hit_latencies):.1f}s")
+
+            # Bulk trend analysis runs as its own job, after this cycle's alerts
+            if self.bulk_analysis_due():
+                self.bulk_scheduler.trigger("fetch")
+        except Exception as e:
+            self.log(f"Error sending: {e}")
+        finally:
+            self.save_pipeline_state()
+            self.save_metrics()
+            self.save_token_usage()
+
+    def perform_bulk_analysis_if_ready(self):
+        try:
+            if self._shutting_down:
+                return None  # disabled
+
+            # MUST DEFINE THESE FIRST
+            now = time.time()
+            cfg = self.cfg
+            window = cfg.analysis_window
+
+            self.log(
+                f"[Analysis Check] window={window}s elapsed={int(now - self.rolling_file_start_time)}s"
+            )
+
+            # Not enough time has passed
+            if now - self.rolling_file_start_time < window:
+                return None
+
+            # Proceed with analysis
+            file_path = ROLLING_FILE
+            if not os.path.exists(file_path):
+                self.rolling_file_start_time = now
+                return None
+
+            try:
+                with self.span("read rolling file"), self.rolling_lock:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        full_text = f.read().strip()
+                    # Take ownership of what was read; new pulls start a fresh window
+                    open(file_path, "w").close()
+            except Exception as e:
+                self.log(f"Failed reading rolling file: {e}")
+                self.rolling_file_start_time = now
+                return None
+
+            if not full_text:
+                self.log("Rolling file empty, skipping analysis.")
+                self.rolling_file_start_time = now
+                return None
+
+            # Truncate to avoid token explosion
+            max_chars = self.tokens.chars_for(cfg.max_tokens_bulk)
+            full_text = full_text[:max_chars]
+
+            self.log("Performing bulk analysis over rolling file...")
+
+            prompt = (
+                "You are analyzing an accumulation of RSS and social media text. "
+                "Produce a structured trend report summarizing major themes, "
+                "emerging risks, and patterns based solely on matching or linked (yet disparate) information in the data feed. "
+                "If there are no patterns that can be pieced together, don't create fake connections just to provide an answer. Do not quote the input.\n\n"
+                "INPUT DATA:\n" + full_text
+            )
+
+            reason = self.over_budget(prompt, 0)
+            if reason:
+                self.log(f"[Budget] Skipping bulk analysis: {reason}")
+                self.metrics.inc("sentinel_budget_dropped_total", kind="bulk")
+                self.rolling_file_start_time = now
+                return None
+
+            try:
+                resp = self.post_to_llm(prompt, cfg.max_tokens_bulk, PRIORITY_BULK, kind="bulk",
+                                        group="bulk")
+                if resp.status_code == 200:
+                    reply = resp.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+                    if reply:
+                        with self.span("deliver"):
+                            self.reply(reply)
+                            self.send_slack_notification(reply)
+                            self.report(reply)
+            except Exception as e:
+                self.log(f"Error during bulk analysis: {e}")
+
+            self.log("Rolling file cleared after bulk analysis.")
+            self.rolling_file_start_time = now
+            self.save_pipeline_state()
+            self.save_metrics()
+            self.save_token_usage()
+        except Exception as e:
+            self.log(f"Error in bulk analysis: {e}")
+
+    # ==================
+    # SAVE APP STATE AND RESUME STATE
+    #====================
+
+    def save_app_state(self):
+        try:
+            state = {
+                "active_profile": self.active_profile,
+                "topics": list(self.topics),
+                "settings": self.settings,
+                "data_source_file": self.current_data_source_file,
+                "prompt_file": self.prompt_file,
+                "profile_routes": self.profile_routes,
+                "feed_groups": self.feed_groups
+            }
+            with open(STATE_FILE, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            self._state_mtime = os.stat(STATE_FILE).st_mtime_ns  # not a hand edit; don't hot-reload it
+            self.log("App state saved.")
+        except Exception as e:
+            self.log(f"Failed to save app state: {e}")
+
+    def load_app_state(self):
+        try:
+            if not os.path.exists(STATE_FILE):
+                return
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            # Restore settings
+            self.settings.update(state.get("settings", {}))
+            self.apply_settings()
+            self._state_mtime = os.stat(STATE_FILE).st_mtime_ns
+            # Restore prompt file
+            prompt_file = state.get("prompt_file", "")
+            if prompt_file and os.path.exists(local_path(prompt_file)):
+                self.prompt_file = prompt_file
+                with open(local_path(prompt_file), "r", encoding="utf-8") as pf:
+                    self.base_prompt = pf.read()
+            # Restore topics
+            self.topics = list(state.get("topics", []))
+            self.active_profile = state.get("active_profile", "")
+            self.profile_routes = state.get("profile_routes", {})
+            self.feed_groups = state.get("feed_groups", [])
+            # Restore data source file
+            data_source_file = state.get("data_source_file", "")
+            if data_source_file and os.path.exists(local_path(data_source_file)):
+                self.load_data_source_file(data_source_file)
+            else:
+                self.current_data_source_file = data_source_file
+                self.rebuild_feed_groups()
+            self.log("App state loaded.")
+        except Exception as e:
+            self.log(f"Failed to load app state: {e}")
+
+
+# ---------- Headless / one-shot CLI ----------
+def run_headless(engine, once=False):
+    """
+    Drive the engine without Qt. The main thread only drains the log and
+    fires scheduler ticks; cycles run on the scheduler's worker thread.
+    """
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    engine.trigger_all("startup")
+    next_bulk = time.monotonic() + engine.config.analysis_window
+    while not stop.is_set():
+        engine.log_sink.drain()
+        if once:
+            # fetch_and_send queues the bulk job itself when its window is due
+            if not engine.fetch_busy() and not engine.bulk_scheduler.is_busy():
+                break
+        else:
+            now = time.monotonic()
+            engine.tick_due_groups()
+            if now >= next_bulk:
+                engine.request_bulk_analysis()
+                next_bulk = now + engine.config.analysis_window
+        stop.wait(LOG_FLUSH_MS / 1000)
+
+    engine.log("[ShunyaNet Sentinel] Shutting down.")
+    engine.log_sink.drain()
+    engine.shutdown()
+    engine.log_sink.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ShunyaNet Sentinel without the GUI.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--headless", action="store_true", help="run as a daemon, fetching every FETCH_INTERVAL seconds")
+    mode.add_argument("--once", action="store_true", help="run a single fetch/analysis cycle and exit")
+    mode.add_argument("--worker", type=int, metavar="INDEX",
+                      help="run as shard worker INDEX (0 to SHARD_WORKERS-1): fetch and dedupe for a coordinator")
+    parser.add_argument("--feeds", help="data source file (.txt or .json); defaults to data_source_file in app_state.json")
+    parser.add_argument("--prompt", help="prompt file; defaults to prompt_file in app_state.json")
+    parser.add_argument("--profile", help="use the topics of this saved profile instead of the saved topic list")
+    parser.add_argument("--shared-dir", help="shard worker: folder of the shared store; defaults to SHARED_DIR")
+    args = parser.parse_args(argv)
+
+    folder = None
+    if args.worker is not None:
+        folder = args.shared_dir
+        if not folder:
+            try:
+                with open(STATE_FILE, "r", encoding="utf-8") as f:
+                    folder = json.load(f).get("settings", {}).get("SHARED_DIR", "")
+            except Exception:
+                folder = ""
+        folder = shard_dir(folder)
+        use_worker_files(os.path.join(folder, f"worker-{args.worker}"))
+
+    engine = SentinelEngine()
+    engine.load_profiles()
+    engine.load_app_state()
+    engine.load_pipeline_state()
+    if args.worker is None:
+        engine.start_metrics_server()
+    # Paths given on the command line are relative to where it was typed
+    if args.feeds and not engine.load_data_source_file(os.path.abspath(args.feeds)):
+        engine.log_sink.close()
+        return 2
+    if args.prompt and not engine.load_prompt_file(os.path.abspath(args.prompt)):
+        engine.log_sink.close()
+        return 2
+    if args.profile and not engine.use_profile(args.profile):
+        engine.log_sink.close()
+        return 2
+    if args.worker is not None:
+        if not engine.start_shards(args.worker, folder):
+            engine.log_sink.close()
+            return 2
+    elif args.headless:
+        engine.start_shards()  # --once always fetches in this process
+    engine.log(f"[ShunyaNet Sentinel] {len(engine.feeds)} feeds, topics: {engine.get_topics_string()}")
+    run_headless(engine, once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
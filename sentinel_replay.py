@@ -0,0 +1,307 @@
+"""
+Offline replay for the Sentinel pipeline. Reads archived cycles from
+cycle_archive.jsonl (ARCHIVE_CYCLES=1) or the rolling file, and pushes
+them through the real SentinelEngine chunk -> filter -> LLM cycle under one
+or two configurations. Reports throughput, latency and which items each
+configuration flagged as HIT.
+
+    python sentinel_replay.py                                   # the archive, with the saved settings
+    python sentinel_replay.py --prompt-b default_prompt_v2-experimental.txt
+    python sentinel_replay.py rolling_rss.txt --config-b b.json --cycles 10
+    python sentinel_replay.py --speed 60                        # one archived hour per minute
+
+A config file holds overrides on top of app_state.json:
+
+    {"settings": {"CHUNK_SIZE": 6000, "STORY_CLUSTERING": "1"}, "topics": ["..."], "prompt_file": "..."}
+
+Replies go to the configured LLM, but nothing is sent to Slack and the app's
+own state files are not touched.
+"""
+import sys
+import os
+import json
+import time
+import re
+import argparse
+import tempfile
+from dateutil import parser as dateparser
+
+import sentinel_engine
+from sentinel_engine import FeedItem, SentinelEngine
+from sentinel_benchmark import diff_stages, isolate_engine_files, stage_totals
+
+
+ROLLING_CYCLE_ITEMS = 100  # items per replayed cycle from the rolling file, which has no cycle boundaries
+ROLLING_ENTRY = re.compile(
+    r"^Title: (?P<title>.*?)\nPublished: (?P<published>.*?)\nSummary: (?P<summary>.*?)\nLink: (?P<link>[^\n]*)",
+    re.M | re.S,
+)
+SAMPLE_TITLES = 10  # titles listed for each side of a HIT difference
+
+
+# -------- Archive readers --------
+def read_cycle_archive(path):
+    """Cycles as written by ARCHIVE_CYCLES: [{"at", "group", "urgent": [FeedItem], "items": [FeedItem]}]."""
+    cycles = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            cycles.append({
+                "at": record["at"],
+                "group": record.get("group", "default"),
+                "urgent": [FeedItem.from_json(raw) for raw in record.get("urgent", [])],
+                "items": [FeedItem.from_json(raw) for raw in record.get("items", [])],
+            })
+    return cycles
+
+
+def read_rolling_file(path, per_cycle=ROLLING_CYCLE_ITEMS):
+    """The rolling file's items in the order they were written, per_cycle items to a cycle."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    items = []
+    for match in ROLLING_ENTRY.finditer(text):
+        published = match["published"]
+        try:
+            published_ts = dateparser.parse(published).timestamp()
+        except (ValueError, OverflowError, TypeError):
+            published_ts = None
+        items.append(FeedItem(match["title"], published, match["summary"], match["link"], published_ts, 0.0))
+    return [{"at": None, "group": "default", "urgent": [], "items": items[i:i + per_cycle]}
+            for i in range(0, len(items), per_cycle)]
+
+
+def read_archive(path, per_cycle=ROLLING_CYCLE_ITEMS):
+    if path.endswith(".jsonl"):
+        return read_cycle_archive(path)
+    return read_rolling_file(path, per_cycle)
+
+
+def item_key(route_name, item):
+    return route_name, item.link or item.title
+
+
+# -------- Replay --------
+def load_config(path, prompt=None):
+    config = {}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    if prompt:
+        config["prompt_file"] = os.path.abspath(prompt)
+    return config
+
+
+def build_engine(config, folder, verbose):
+    isolate_engine_files(folder)
+    engine = SentinelEngine()
+    engine.log_sink.echo = verbose
+    engine.load_profiles()
+    engine.load_app_state()
+    engine.settings.update(config.get("settings", {}))
+    engine.settings.update({
+        "SLACK_WEBHOOK_URL": "",
+        "WRITE_TO_FILE": "0",
+        "BULK_ANALYSIS": "0",
+        "ARCHIVE_CYCLES": "0",
+        "TRACE_CYCLES": "0",
+    })
+    engine.apply_settings()
+    # Alerts stay local: no per-profile webhooks either
+    engine.profile_routes = {name: {k: v for k, v in route.items() if k != "slack_webhook_url"}
+                             for name, route in engine.profile_routes.items()}
+    if config.get("topics"):
+        engine.topics = list(config["topics"])
+    if config.get("prompt_file") and not engine.load_prompt_file(config["prompt_file"]):
+        raise SystemExit(f"Could not load prompt {config['prompt_file']}")
+    engine.on_reply = lambda msg: None
+    engine.on_report = lambda text: None
+    return engine
+
+
+def replay(label, config, cycles, args, folder):
+    engine = build_engine(config, folder, args.verbose)
+    verdicts = {}  # (profile, item key) -> HIT in any chunk holding the item
+    titles = {}
+
+    def on_verdict(job, hit):
+        for route in job["routes"]:
+            for item in job["items"]:
+                key = item_key(route.name, item)
+                verdicts[key] = verdicts.get(key, False) or hit
+                titles[key] = item.title
+
+    engine.on_verdict = on_verdict
+    print(f"[{label}] chunk size {engine.config.chunk_size}, MAX_TOKENS {engine.config.max_tokens}, "
+          f"prompt {engine.prompt_file}, topics: {engine.get_topics_string()}")
+
+    seconds = []
+    replayed = 0
+    before = stage_totals(engine.metrics.snapshot())
+    started = time.perf_counter()
+    try:
+        for n, cycle in enumerate(cycles):
+            group = engine.groups.get(cycle["group"]) or engine.groups["default"]
+            now = time.time()
+            for item in cycle["urgent"] + cycle["items"]:
+                item.fetched_at = now  # fetch-to-HIT then measures the replayed cycle, not the archive's age
+                item.note = None
+            cycle_started = time.perf_counter()
+            engine.run_fetch_cycle(group, (list(cycle["urgent"]), list(cycle["items"])))
+            while engine.fetch_busy():  # urgent items finish on the fast lane
+                time.sleep(0.01)
+            elapsed = time.perf_counter() - cycle_started
+            seconds.append(elapsed)
+            replayed += len(cycle["urgent"]) + len(cycle["items"])
+            engine.log_sink.drain()
+            if args.verbose:
+                print(f"[{label}] cycle {n + 1}: {elapsed:.2f}s, {len(cycle['urgent']) + len(cycle['items'])} items")
+            if args.speed > 0 and n + 1 < len(cycles) and cycle["at"] and cycles[n + 1]["at"]:
+                gap = (cycles[n + 1]["at"] - cycle["at"]) / args.speed - elapsed
+                if gap > 0:
+                    time.sleep(gap)
+        wall = time.perf_counter() - started
+        stages = diff_stages(stage_totals(engine.metrics.snapshot()), before)
+        left_over = engine.overflow.depth()
+    finally:
+        engine.shutdown(timeout=10)
+        engine.log_sink.drain()
+        engine.log_sink.close()
+
+    ordered = sorted(seconds)
+    requests = sum(v for k, v in stages.items() if k.startswith("llm_requests_"))
+    return {
+        "label": label,
+        "config": config,
+        "cycles": len(cycles),
+        "items": replayed,
+        "items_analysed": len({key[1] for key in verdicts}),
+        "left_over": left_over,
+        "wall_s": wall,
+        "items_per_s": replayed / sum(seconds) if sum(seconds) else 0.0,
+        "cycle_s": {"mean": sum(seconds) / len(seconds) if seconds else 0.0,
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+                    "max": ordered[-1] if ordered else 0.0},
+        "llm_requests": requests,
+        "llm_s_mean": stages["llm_s"] / requests if requests else 0.0,
+        "tokens": stages.get("llm_prompt_tokens", 0) + stages.get("llm_completion_tokens", 0),
+        "hit_chunks": stages["hits"],
+        "fetch_to_hit_s_mean": stages["fetch_to_hit_s"] / stages["hits"] if stages["hits"] else None,
+        "hit_items": sorted(key for key, hit in verdicts.items() if hit),
+        "verdicts": verdicts,
+        "titles": titles,
+    }
+
+
+def print_report(results):
+    rows = (
+        ("cycles", "cycles", "{:.0f}"),
+        ("items replayed", "items", "{:.0f}"),
+        ("items analysed", "items_analysed", "{:.0f}"),
+        ("left in overflow", "left_over", "{:.0f}"),
+        ("wall seconds", "wall_s", "{:.1f}"),
+        ("items/s", "items_per_s", "{:.1f}"),
+        ("cycle s mean", None, "{:.2f}"),
+        ("cycle s p95", None, "{:.2f}"),
+        ("LLM requests", "llm_requests", "{:.0f}"),
+        ("LLM s per request", "llm_s_mean", "{:.2f}"),
+        ("tokens", "tokens", "{:.0f}"),
+        ("HIT chunks", "hit_chunks", "{:.0f}"),
+        ("cycle-to-HIT s mean", "fetch_to_hit_s_mean", "{:.2f}"),
+        ("items in HIT chunks", None, "{:.0f}"),
+    )
+    print()
+    print(f"{'':22}" + "".join(f"{r['label']:>14}" for r in results))
+    for title, key, fmt in rows:
+        cells = []
+        for r in results:
+            if title == "cycle s mean":
+                value = r["cycle_s"]["mean"]
+            elif title == "cycle s p95":
+                value = r["cycle_s"]["p95"]
+            elif title == "items in HIT chunks":
+                value = len(r["hit_items"])
+            else:
+                value = r[key]
+            cells.append(f"{'n/a' if value is None else fmt.format(value):>14}")
+        print(f"{title:22}" + "".join(cells))
+
+    if len(results) < 2:
+        return
+    a, b = results
+    hits_a, hits_b = set(a["hit_items"]), set(b["hit_items"])
+    both = set(a["verdicts"]) & set(b["verdicts"])
+    print()
+    print(f"HIT in both: {len(hits_a & hits_b)}, NO HIT in both: {len(both - hits_a - hits_b)}, "
+          f"analysed by only one: {len(set(a['verdicts']) ^ set(b['verdicts']))}")
+    for label, only, other in ((a["label"], hits_a - hits_b, b), (b["label"], hits_b - hits_a, a)):
+        print(f"HIT in {label} only: {len(only)}")
+        for key in sorted(only)[:SAMPLE_TITLES]:
+            profile = f"[{key[0]}] " if key[0] else ""
+            missing = "" if key in other["verdicts"] else " (not analysed by the other)"
+            print(f"    {profile}{a['titles'].get(key) or b['titles'].get(key)}{missing}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay archived Sentinel cycles through one or two configurations.")
+    parser.add_argument("archive", nargs="?",
+                        help="cycle_archive.jsonl or a rolling file (default: cycle_archive.jsonl, else rolling_rss.txt)")
+    parser.add_argument("--config-a", help="JSON overrides for configuration A (default: app_state.json as saved)")
+    parser.add_argument("--config-b", help="JSON overrides for configuration B")
+    parser.add_argument("--prompt-a", help="prompt file for configuration A")
+    parser.add_argument("--prompt-b", help="prompt file for configuration B")
+    parser.add_argument("--cycles", type=int, default=0, help="replay only the first N cycles (0 = all)")
+    parser.add_argument("--rolling-cycle-items", type=int, default=ROLLING_CYCLE_ITEMS,
+                        help="items per cycle when replaying a rolling file")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="replay at this multiple of the recorded pace, e.g. 60 (0 = as fast as the LLM allows; "
+                             "the rolling file has no timings and always replays at full speed)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="print the engine log")
+    args = parser.parse_args(argv)
+
+    path = args.archive
+    if not path:
+        path = sentinel_engine.CYCLE_ARCHIVE_FILE
+        if not os.path.exists(path):
+            path = sentinel_engine.ROLLING_FILE
+    try:
+        cycles = read_archive(path, max(1, args.rolling_cycle_items))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not read {path}: {e}")
+        return 2
+    if args.cycles > 0:
+        cycles = cycles[:args.cycles]
+    if not cycles:
+        print(f"No archived items in {path}. Turn on ARCHIVE_CYCLES or WRITE_TO_FILE and let Sentinel run first.")
+        return 2
+
+    configs = [("A", load_config(args.config_a, args.prompt_a))]
+    if args.config_b or args.prompt_b:
+        configs.append(("B", load_config(args.config_b, args.prompt_b)))
+    total = sum(len(c["urgent"]) + len(c["items"]) for c in cycles)
+    print(f"Replaying {len(cycles)} cycles, {total} items from {path}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="sentinel-replay-") as folder:
+        for label, config in configs:
+            run_folder = os.path.join(folder, label)
+            os.makedirs(run_folder)
+            results.append(replay(label, config, cycles, args, run_folder))
+    print_report(results)
+
+    if args.json:
+        for r in results:
+            r["hit_items"] = [list(key) for key in r["hit_items"]]
+            r.pop("verdicts")
+            r.pop("titles")
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"archive": path, "results": results}, f, indent=2)
+        print(f"results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+import sentinel_engine
+from sentinel_engine import FeedItem, SentinelEngine
+
+ENGINE_FILES = ("ROLLING_FILE", "PIPELINE_STATE_FILE", "REPORT_HISTORY_FILE", "METRICS_FILE", "TOKEN_USAGE_FILE",
+                "LOG_FILE", "EMBEDDING_CACHE_FILE", "CYCLE_ARCHIVE_FILE", "TRACE_DIR")
+
+
+class FakeReply:
+    status_code = 200
+
+    def __init__(self, prompt):
+        self.prompt_tokens = len(prompt) // 4
+
+    def json(self):
+        return {"choices": [{"message": {"content": "NO HIT"}}],
+                "usage": {"prompt_tokens": self.prompt_tokens, "completion_tokens": 10}}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    for name in ENGINE_FILES:
+        monkeypatch.setattr(sentinel_engine, name, str(tmp_path / name.lower()))
+    prompts = []
+
+    def post(url, json, timeout):
+        prompts.append(json["messages"][0]["content"])
+        return FakeReply(prompts[-1])
+
+    monkeypatch.setattr(sentinel_engine.requests, "post", post)
+    engine = SentinelEngine()
+    engine.settings.update({
+        "LMSTUDIO_URL": "http://llm.invalid/v1/chat/completions",
+        "SLACK_WEBHOOK_URL": "",
+        "WRITE_TO_FILE": "0",
+        "BULK_ANALYSIS": "0",
+        "USE_CHUNKED_MODE": "1",
+        "CHUNK_SIZE": 500,
+        "TOKEN_BUDGET_PER_CYCLE": 1100,
+    })
+    engine.apply_settings()
+    engine.on_reply = lambda msg: None
+    engine.on_report = lambda text: None
+    engine.prompts = prompts
+    yield engine
+    engine.shutdown(timeout=5)
+    engine.log_sink.close()
+
+
+def items(count, prefix):
+    now = time.time()
+    return [FeedItem(f"{prefix} headline {n}", "today", "word " * 30, f"http://x/{prefix}/{n}", None, now)
+            for n in range(count)]
+
+
+def test_chunks_over_the_cycle_budget_carry_over(engine):
+    group = engine.groups["default"]
+    engine.run_fetch_cycle(group, ([], items(8, "first")))
+    assert len(engine.prompts) == 2  # two items per chunk, and a third chunk would pass the budget
+    assert engine.overflow.depth("default") == 4
+    engine.run_fetch_cycle(group, ([], items(2, "second")))
+    assert len(engine.prompts) == 4
+    # The carried items go first, so this cycle's own items are the ones left waiting
+    assert all("first headline" in p and "second headline" not in p for p in engine.prompts[2:])
+    assert engine.overflow.depth("default") == 2
@@ -0,0 +1,45 @@
+import threading
+
+from sentinel_engine import HISTORY_PAGE_SIZE, ReportHistoryStore
+
+
+def test_reopened_store_pages_back_every_report(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    store = ReportHistoryStore(path)
+    total = HISTORY_PAGE_SIZE * 2 + 5
+    for n in range(total):
+        store.append(f"ts{n}", f"report {n}\nline two")
+    reopened = ReportHistoryStore(path)
+    assert len(reopened) == total
+    assert reopened.get(0) == ("ts0", "report 0\nline two")
+    assert reopened.get(HISTORY_PAGE_SIZE) == (f"ts{HISTORY_PAGE_SIZE}", f"report {HISTORY_PAGE_SIZE}\nline two")
+    assert reopened.get(total - 1)[1].startswith(f"report {total - 1}")
+    assert list(reopened.newlines) == [1] * total
+
+
+def test_append_after_reading_the_last_page(tmp_path):
+    store = ReportHistoryStore(str(tmp_path / "history.jsonl"))
+    store.append("t0", "first")
+    assert store.get(0) == ("t0", "first")  # caches the last page
+    store.append("t1", "second")
+    assert store.get(1) == ("t1", "second")
+
+
+def test_concurrent_appends_keep_the_index_in_order(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    store = ReportHistoryStore(path)
+
+    def append_many(worker):
+        for n in range(50):
+            store.append(f"w{worker}", f"{worker}-{n}")
+
+    threads = [threading.Thread(target=append_many, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store) == 200
+    assert list(store.offsets) == sorted(store.offsets)
+    texts = {store.get(row)[1] for row in range(len(store))}
+    assert texts == {f"{w}-{n}" for w in range(4) for n in range(50)}
+    assert len(ReportHistoryStore(path)) == 200
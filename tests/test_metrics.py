@@ -0,0 +1,20 @@
+from sentinel_engine import Metrics
+
+
+def test_render_mixed_label_types():
+    metrics = Metrics()
+    metrics.inc("sentinel_feed_responses_total", feed="http://a", status="error")
+    metrics.inc("sentinel_feed_responses_total", feed="http://a", status=200)
+    metrics.inc("sentinel_feed_responses_total", feed="http://a", status=200)
+    text = metrics.render()
+    assert 'sentinel_feed_responses_total{feed="http://a",status="200"} 2' in text
+    assert 'sentinel_feed_responses_total{feed="http://a",status="error"} 1' in text
+    counters = {c["labels"]["status"]: c["value"] for c in metrics.snapshot()["counters"]}
+    assert counters == {"200": 2, "error": 1}
+
+
+def test_render_mixed_histogram_labels():
+    metrics = Metrics()
+    metrics.observe("sentinel_llm_request_seconds", 0.2, kind="alert")
+    metrics.observe("sentinel_llm_request_seconds", 0.3, kind=None)
+    assert 'sentinel_llm_request_seconds_count{kind="None"} 1' in metrics.render()
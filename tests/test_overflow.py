@@ -0,0 +1,42 @@
+import time
+
+import sentinel_engine
+from sentinel_engine import FeedItem, Metrics, OverflowQueue
+
+
+def item(title, fetched_at):
+    return FeedItem(title, "today", "Summary", f"http://x/{title}", None, fetched_at)
+
+
+def test_take_drops_expired_and_keeps_the_rest_oldest_first():
+    now = time.time()
+    metrics = Metrics()
+    overflow = OverflowQueue(metrics)
+    overflow.put("default", [item("newest", now - 10), item("expired", now - 7200)])
+    overflow.put("default", [item("middle", now - 60), item("oldest", now - 600)])
+    overflow.put("other", [item("elsewhere", now)])
+    fresh, expired = overflow.take("default", max_age=3600)
+    assert [i.title for i in fresh] == ["oldest", "middle", "newest"]
+    assert expired == 1
+    assert overflow.depth("default") == 0
+    assert overflow.depth() == 1
+    assert overflow.take("default", max_age=3600) == ([], 0)
+    assert 'sentinel_items_total{stage="overflow_expired"} 1' in metrics.render()
+
+
+def test_put_beyond_the_cap_drops_the_oldest(monkeypatch):
+    monkeypatch.setattr(sentinel_engine, "OVERFLOW_MAX_ITEMS", 3)
+    now = time.time()
+    overflow = OverflowQueue(Metrics())
+    assert overflow.put("default", [item(str(n), now - n) for n in range(5)]) == 2
+    fresh, _ = overflow.take("default", max_age=3600)
+    assert [i.title for i in fresh] == ["2", "1", "0"]
+
+
+def test_queue_survives_a_json_round_trip():
+    now = time.time()
+    overflow = OverflowQueue(Metrics())
+    overflow.put("default", [item("a", now - 5), item("b", now)])
+    restored = OverflowQueue(Metrics())
+    restored.load_json(overflow.to_json())
+    assert [i.title for i in restored.take("default", max_age=60)[0]] == ["a", "b"]
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from sentinel_engine import CycleScheduler
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_triggers_during_a_cycle_coalesce_into_one_run():
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def run_cycle():
+        runs.append(time.monotonic())
+        started.set()
+        release.wait(5)
+
+    scheduler = CycleScheduler("test", run_cycle, log=lambda msg: None)
+    try:
+        assert scheduler.trigger()
+        assert started.wait(5)
+        assert scheduler.trigger()  # queued as the next run
+        assert not scheduler.trigger()
+        assert not scheduler.trigger()
+        assert not scheduler.tick()
+        assert scheduler.stats()["queue_depth"] == 2
+        release.set()
+        wait_for(lambda: not scheduler.is_busy())
+        stats = scheduler.stats()
+        assert (stats["cycles"], stats["coalesced"], stats["overruns"]) == (2, 2, 1)
+        assert len(runs) == 2
+    finally:
+        release.set()
+        scheduler.stop()
+
+
+def test_failed_cycle_keeps_the_scheduler_running():
+    calls = []
+
+    def run_cycle():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    logged = []
+    scheduler = CycleScheduler("test", run_cycle, log=logged.append)
+    try:
+        scheduler.trigger()
+        wait_for(lambda: scheduler.stats()["cycles"] == 1)
+        scheduler.trigger()
+        wait_for(lambda: scheduler.stats()["cycles"] == 2)
+        assert any("cycle failed: boom" in msg for msg in logged)
+    finally:
+        scheduler.stop()
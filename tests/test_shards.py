@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import time
+
+from sentinel_engine import FeedItem, HashRing, Metrics, SharedStore
+
+
+def test_ring_moves_few_feeds_when_a_worker_is_added():
+    urls = [f"http://feeds.example/{n}.rss" for n in range(1000)]
+    three = HashRing(["worker-0", "worker-1", "worker-2"])
+    four = HashRing(["worker-0", "worker-1", "worker-2", "worker-3"])
+    moved = sum(1 for url in urls if three.owner(url) != four.owner(url))
+    assert {three.owner(url) for url in urls} == {"worker-0", "worker-1", "worker-2"}
+    assert moved < len(urls) / 2
+
+
+def test_ring_only_moves_feeds_to_or_from_the_changed_worker():
+    urls = [f"http://feeds.example/{n}.rss" for n in range(1000)]
+    three = HashRing(["worker-0", "worker-1", "worker-2"])
+    four = HashRing(["worker-0", "worker-1", "worker-2", "worker-3"])
+    two = HashRing(["worker-0", "worker-2"])
+    for url in urls:
+        if three.owner(url) != four.owner(url):
+            assert four.owner(url) == "worker-3"
+        if three.owner(url) != "worker-1":
+            assert two.owner(url) == three.owner(url)
+
+
+def test_ring_assignment_is_stable_across_processes():
+    # Every worker builds its own ring, so ownership may not depend on node order or hash seeds
+    urls = [f"http://feeds.example/{n}.rss" for n in range(200)]
+    ring = HashRing(["worker-0", "worker-1", "worker-2"])
+    shuffled = HashRing(["worker-2", "worker-0", "worker-1"])
+    assert [ring.owner(url) for url in urls] == [shuffled.owner(url) for url in urls]
+    script = ("from sentinel_engine import HashRing\n"
+              "ring = HashRing(['worker-0', 'worker-1', 'worker-2'])\n"
+              "print(' '.join(ring.owner(f'http://feeds.example/{n}.rss') for n in range(200)))")
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         env={**os.environ, "PYTHONHASHSEED": "12345"}).stdout
+    assert out.split() == [ring.owner(url) for url in urls]
+
+
+def test_store_dedupes_across_connections(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = SharedStore(path), SharedStore(path)
+    try:
+        assert first.claim(["a", "b", "b"], time.time()) == {"a", "b"}
+        assert second.claim(["b", "c"], time.time()) == {"c"}
+        item = FeedItem("Title", "today", "Summary", "http://x/1", None, time.time())
+        second.push("default", [item])
+        second.push("default", [item], urgent=True)
+        assert first.pending()[("default", False)][0] == 1
+        assert [i.title for i in first.take("default")] == ["Title"]
+        assert first.take("default") == []
+        assert len(first.take("default", urgent=True)) == 1
+    finally:
+        first.close()
+        second.close()
+
+
+def test_workers_alive_gauge_renders():
+    metrics = Metrics()
+    metrics.set("sentinel_shard_workers_alive", 2)
+    text = metrics.render()
+    assert "# TYPE sentinel_shard_workers_alive gauge" in text
+    assert "sentinel_shard_workers_alive 2" in text
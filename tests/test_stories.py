@@ -0,0 +1,48 @@
+from sentinel_engine import FeedItem, StoryClusters
+
+NOW = 1_700_000_000.0
+WINDOW = 6 * 3600
+
+
+def item(title, summary=""):
+    return FeedItem(title, "today", summary, "http://x/1", None, NOW)
+
+
+def test_repeat_of_a_known_story_is_held_back():
+    stories = StoryClusters()
+    first = item("Port strike halts container shipping in Rotterdam")
+    forwarded, held = stories.filter([first], WINDOW, novelty=0.5, now=NOW)
+    assert forwarded == [first] and held == 0
+    assert first.note is None
+    repeat = item("Rotterdam port strike halts container shipping")
+    forwarded, held = stories.filter([repeat], WINDOW, novelty=0.5, now=NOW + 60)
+    assert forwarded == [] and held == 1
+    assert len(stories) == 1
+
+
+def test_follow_up_with_new_facts_is_forwarded_with_a_digest():
+    stories = StoryClusters()
+    stories.filter([item("Port strike halts container shipping in Rotterdam")], WINDOW, novelty=0.5, now=NOW)
+    follow_up = item("Rotterdam port strike widens", "Unions in Antwerp announce a weeklong walkout")
+    forwarded, held = stories.filter([follow_up], WINDOW, novelty=0.3, now=NOW + 60)
+    assert forwarded == [follow_up] and held == 0
+    assert follow_up.note.startswith("[Ongoing story since")
+    assert "Port strike halts container shipping in Rotterdam" in follow_up.note
+
+
+def test_escalation_term_overrides_novelty():
+    stories = StoryClusters()
+    stories.filter([item("Port strike halts container shipping in Rotterdam")], WINDOW, novelty=0.5, now=NOW)
+    escalation = item("Rotterdam port strike: explosion at container terminal")
+    forwarded, _ = stories.filter([escalation], WINDOW, novelty=0.99, now=NOW + 60)
+    assert forwarded == [escalation]
+
+
+def test_story_expires_after_the_window():
+    stories = StoryClusters()
+    stories.filter([item("Port strike halts container shipping in Rotterdam")], WINDOW, novelty=0.5, now=NOW)
+    again = item("Rotterdam port strike halts container shipping")
+    forwarded, held = stories.filter([again], WINDOW, novelty=0.5, now=NOW + WINDOW + 1)
+    assert forwarded == [again] and held == 0
+    assert again.note is None
+    assert len(stories) == 1